@@ -1,11 +1,32 @@
 import streamlit as st
+import copy
 import uuid
+from functools import partial
 import pandas as pd
+import time
+import metrics
+import session_memory
+import session_spill
+import shared_config
+import shared_price_cache
+import tracing
 import json
-import math
 import os
 from collections import Counter
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from quote_store import QuoteStore
+from session_state_store import AGGREGATE_KEYS, BACKEND_ERRORS, SESSION_KEY_PARAM, SessionQuoteStore, open_backend
+from price_book import PriceBookLookup, MANIFEST_NAME
+from quote_export import to_csv, to_pdf, to_xlsx
+from diagnostics import NULL_PROFILER, PHASES, HISTORY_KEY, RerunProfiler, runs_per_interaction
+from line_items import COLUMNS as LINE_ITEM_COLUMNS, get_name_index, map_header, parse_line_item
+from material_search import get_material_index
+from pricing import (
+    PLACEHOLDER, CompiledConfig, config_version, get_discount_tier_details, get_multiplier,
+    get_suggested_sides_tier, get_banner_mesh_details, order_total_sqft, IncrementalPricer, PriceCache
+)
 os.environ.setdefault('TERM', 'xterm')
+RUN_STARTED = time.perf_counter()
 # --- Page Configuration (BEST PRACTICE FIX: Must be the first st command) ---
 st.set_page_config(layout="wide", page_title="Quote Calculator")
 
@@ -40,6 +61,23 @@ st.markdown("""
 
 st.title("Quote Calculator")
 
+# --- DIAGNOSTICS ---
+# The admin diagnostics toggle is only offered when the server runs with CALCULATOR_DIAGNOSTICS=1;
+# with the panel off every phase timer below is a no-op.
+DIAGNOSTICS_AVAILABLE = os.environ.get('CALCULATOR_DIAGNOSTICS') == '1'
+PROFILER = RerunProfiler(st.session_state) if DIAGNOSTICS_AVAILABLE and st.session_state.get('show_diagnostics') else NULL_PROFILER
+# Span traces for offline latency analysis; see tracing.py (off unless QUOTE_TRACE_FILE is set).
+_run_ctx = get_script_run_ctx()
+SESSION_ID = _run_ctx.session_id if _run_ctx else "bare"
+TRACE = tracing.begin(SESSION_ID)
+session_memory.track("Calculator")
+# Idle sessions may have been spilled to disk (see session_spill.py); bring this one back first.
+session_spill.start()
+session_spill.restore(st.session_state)
+# Prometheus exporter for ops (see metrics.py; off unless QUOTE_METRICS_PORT is set).
+metrics.start()
+RUN_STATS = {"pricing_calls": 0}
+
 # --- CONFIGURATION LOADER ---
 def load_config(file_path='config.json'):
     try:
@@ -57,13 +95,27 @@ def load_config(file_path='config.json'):
         st.error(f"FATAL: Error decoding '{file_path}'. Please ensure it is valid JSON. Error: {e}")
         st.stop()
 
-if 'config' not in st.session_state:
-    st.session_state.config = load_config()
+with PROFILER.phase("config_load"):
+    if 'config' not in st.session_state:
+        with TRACE.span("load_config"):
+            st.session_state.config = load_config()
+        metrics.count_config_load("calculator")
+        st.session_state.config_loaded_version = config_version(st.session_state.config)
+
+    config = st.session_state.config
+
+    # Re-hashed every run: the editor pages change the session's config in place.
+    st.session_state.config_version = config_version(config)
 
-config = st.session_state.config
+    # A session without unsaved config edits follows configs published to the shared
+    # segment by any process (see shared_config.py); one with edits keeps its own.
+    if shared_config.SEGMENT_PATH and st.session_state.config_version == st.session_state.get('config_loaded_version'):
+        shared = shared_config.attached()
+        if shared is not None and shared.version != st.session_state.config_version:
+            config = st.session_state.config = copy.deepcopy(shared.config)
+            st.session_state.config_version = st.session_state.config_loaded_version = shared.version
 
 # --- Unpack loaded data from config ---
-PLACEHOLDER = "-- SELECT --"
 MATERIALS = config.get('MATERIALS', {})
 SIDES_TIERS_MAP = config.get('SIDES_TIERS_MAP', {})
 SIDEDNESS_OPTIONS = config.get('SIDEDNESS_OPTIONS', [])
@@ -86,189 +138,136 @@ ADDITIONAL_TIME_OPTIONS = list(ADDITIONAL_TIME_MAP.keys())
 ADDED_INSTALL_OPTIONS = list(ADDED_INSTALL_MAP.keys())
 
 
-# --- DYNAMIC COST CALCULATION (Original) ---
-def calculate_additional_costs(cost_config):
-    bx4_vars = cost_config.get("cons_bx_4", {})
-    bx4_v1 = bx4_vars.get("variable_1", 0)
-    bx4_v2 = bx4_vars.get("variable_2", 1)
-    bx4_v3 = bx4_vars.get("variable_3", 0)
-    calculated_bx4 = (bx4_v1 / bx4_v2) * bx4_v3 if bx4_v2 != 0 else 0
-
-    bx6_vars = cost_config.get("cons_bx_6", {})
-    bx6_v1 = bx6_vars.get("variable_1", 0)
-    bx6_v2 = bx6_vars.get("variable_2", 1)
-    bx6_v3 = bx6_vars.get("variable_3", 0)
-    calculated_bx6 = (bx6_v1 / bx6_v2) * bx6_v3 if bx6_v2 != 0 else 0
-
-    default_prodcuts_an = cost_config.get("prodcuts_an", 16.21)
-    return calculated_bx4, calculated_bx6, default_prodcuts_an
-
-ADDITIONAL_COSTS_CONFIG = config.get('ADDITIONAL_COSTS', {})
-cons_bx_4, cons_bx_6, default_prodcuts_an = calculate_additional_costs(ADDITIONAL_COSTS_CONFIG)
-
-# --- NEW: DYNAMIC PRODCUTS_AN CALCULATION ---
-def calculate_dynamic_prodcuts_an(vars, Q_Quantity):
-    if not vars or Q_Quantity == 0:
-        return 0, 0
-    AW_Roll_Costs = vars.get("AW_Roll_Costs", 0)
-    AU_Material_Length = vars.get("AU_Material_Length", 1)
-    AV_Material_Width = vars.get("AV_Material_Width", 1)
-    AQ_SQ = vars.get("AQ_SQ", 0)
-    AS_Laminate_Loading = vars.get("AS_Laminate_Loading", 0)
-    AT_Labour = vars.get("AT_Labour", 0)
-    constant_BY8 = vars.get("constant_BY8", 0)
-    Per_hour_rate = vars.get("Per_hour_rate", 0)
-    denominator_ax = (AU_Material_Length * AV_Material_Width) / 144
-    AX_Sq_material = AW_Roll_Costs / denominator_ax if denominator_ax != 0 else 0
-    form_response_bx8 = (constant_BY8 / 60) * Per_hour_rate
-    AO = (AX_Sq_material * AQ_SQ) + AS_Laminate_Loading + AT_Labour
-    AN = AO + (form_response_bx8 / Q_Quantity) + AS_Laminate_Loading
-    return AO, AN
-
-# --- Helper functions ---
-def excel_floor(number, significance):
-    if significance == 0: return 0
-    return math.floor(number / significance) * significance
-
-def excel_ceiling(number, significance):
-    if significance == 0: return 0
-    return math.ceil(number / significance) * significance
-
-def calculate_material_price(material_data):
-    results = {'preferred_base': 0, 'preferred_value': 0, 'corporate_base': 0, 'corporate_value': 0, 'wholesale_base': 0, 'wholesale_value': 0}
-    try:
-        p_vars = material_data['Preferred']
-        p_base = excel_floor(p_vars.get('preferred_historical_price', 0) * p_vars.get('preferred_fine_tune_modifier', 0), FALL_BACK_VALUE)
-        results['preferred_base'] = p_base
-        results['preferred_value'] = p_base * (1 - p_vars.get('preferred_discount_value', 0))
-
-        c_vars = material_data['Corporate']
-        c_base = excel_ceiling(p_base * c_vars.get('corporate_historical_price', 0), FALL_BACK_VALUE)
-        results['corporate_base'] = c_base
-        results['corporate_value'] = c_base * (1 - c_vars.get('corporate_discount_value', 0))
-
-        w_vars = material_data['Wholesale']
-        w_base = excel_ceiling(p_base * w_vars.get('wholesale_historical_price', 0), FALL_BACK_VALUE)
-        results['wholesale_base'] = w_base
-        results['wholesale_value'] = w_base * (1 - w_vars.get('wholesale_discount_value', 0))
-    except (KeyError, TypeError): pass
-    return results
-
-def get_discount_tier_details(total_sqft, all_tiers):
-    best_tier_desc = "N/A"
-    for min_sqft, (description, _) in sorted(all_tiers.items()):
-        if total_sqft >= min_sqft:
-            best_tier_desc = description
-    return best_tier_desc
-
-def get_multiplier(num_entries):
-    for min_entries, value in sorted(MULTIPLES_MAP.items(), reverse=True):
-        if num_entries >= min_entries:
-            return f"{min_entries}+ entries" if min_entries != 1 else "1 entry", value
-    return "N/A", 1
-
-def get_suggested_sides_tier(sqft, sidedness):
-    if sidedness == "No Print": return "NO PRINT"
-    if sidedness == "Single Sided":
-        if sqft >= 1.0: return "STANDARD OVER 1sq'"
-        if sqft >= 0.5: return "SMALL Between 1sq' - 0.5sq'"
-        if sqft >= 0.25: return "SMALL BETWEEN 0.5 - .25 sq' /peice"
-        return "SMALLEST UNDER 0.05 sq' /peice"
-    if sidedness == "Double Sided":
-        if sqft >= 1.0: return "DOUBLE SIDED Over 1 SQ'"
-        if sqft >= 0.5: return "DOUBLE SIDED between 1sq' - 0.5sq' per peice"
-        if sqft >= 0.25: return "DOUBLE SIDED under 0.5 - .25 sq' /peice"
-        return "DOUBLE SIDED under 0.05 sq' /peice"
-    return TIER_DESCRIPTIONS[0] if TIER_DESCRIPTIONS else "N/A"
-
-def get_banner_mesh_details(sqft, option_details):
-    if not option_details: return "N/A", 0.0
-    # This function expects the tiered list directly
-    tier_list = option_details
-    for min_sqft, price, desc_prefix in tier_list:
-        if sqft >= min_sqft:
-            return f"{desc_prefix}", price
-    return "N/A", 0.0
-
-
-# --- NEW CALCULATION LOGIC ---
-def calculate_entry_total(calc_data, customer_type, selected_percentage, adjustment_percentage, multiples_value, prodcuts_an):
-    """Calculates the total for a single line item based on the customer type."""
-    multiples_value_for_entry = multiples_value
-    entry_total = 0
-    entry_quantity = calc_data.get('qty', 0)
-    if entry_quantity == 0:
-        return 0
-    # Part A
-    part_a_base = calc_data['active_base_amount'] * calc_data['sqft_per_piece'] * calc_data['sides_cost_per_unit']
-    part_a_discounted = part_a_base * (1 - (selected_percentage + adjustment_percentage))
-
-    # Part B
-    part_b_original = calc_data['cut_cost_per_unit'] * calc_data['sqft_per_piece']
-    part_b = part_b_original + part_a_discounted
-
-    # Part C
-    part_c_numerator = (calc_data['finishing_price_per_unit'] * calc_data['sqft_per_piece'] * entry_quantity) + (prodcuts_an / multiples_value_for_entry)
-    part_c = part_c_numerator / entry_quantity
-
-    # Part D
-    part_d = 0
-    if calc_data['cut_cost_per_unit'] > 0.0:
-        if customer_type == 'Preferred':
-            part_d = (cons_bx_4 / multiples_value_for_entry) / entry_quantity
-        elif customer_type in ['Corporate', 'Wholesale']:
-            part_d = (cons_bx_4 / (multiples_value_for_entry + 0.5)) / entry_quantity
-
-    # Part E
-    part_e = 0
-    if calc_data['finishing_price_per_unit'] > 0:
-        if customer_type == 'Preferred':
-            part_e = (cons_bx_6 / multiples_value_for_entry) / entry_quantity
-        elif customer_type in ['Corporate', 'Wholesale']:
-            part_e = (cons_bx_6 / (multiples_value_for_entry + 0.5)) / entry_quantity
-
-    # Part F
-    part_f = (calc_data['additional_time_cost_per_unit'] / entry_quantity) + calc_data['added_install_cost_per_unit']
-
-    price_per_single_piece = part_b + part_c + part_d + part_e + part_f
-    entry_total = (price_per_single_piece) * 1.1
-    return entry_total
-
-
-def calculate_all_prices_for_entry(calculation_data, all_material_prices, all_discount_percentages, adjustment_percentage, multiples_value, prodcuts_an_for_entry):
-    all_prices = {}
-
-    customer_types_map = {
-        'Preferred': {'base': all_material_prices.get('preferred_base', 0), 'value': all_material_prices.get('preferred_value', 0), 'discount': all_discount_percentages[0]},
-        'Corporate': {'base': all_material_prices.get('corporate_base', 0), 'value': all_material_prices.get('corporate_value', 0), 'discount': all_discount_percentages[1]},
-        'Wholesale': {'base': all_material_prices.get('wholesale_base', 0), 'value': all_material_prices.get('wholesale_value', 0), 'discount': all_discount_percentages[2]}
-    }
+@st.cache_resource(max_entries=4)
+def get_compiled_config(version, _config):
+    """One compiled config per config version, shared by every session.
 
-    for cust_type, data in customer_types_map.items():
-        # Assemble the specific calc_data for this customer type
-        specific_calc_data = calculation_data.copy()
-        specific_calc_data['active_base_amount'] = data['base']
-        specific_calc_data['base_price_per_sqft'] = data['value']
-
-        all_prices[cust_type] = calculate_entry_total(
-            specific_calc_data,
-            cust_type,
-            data['discount'],
-            adjustment_percentage,
-            multiples_value,
-            prodcuts_an_for_entry
-        )
-    return all_prices
+    Compiled from a copy, so later in-place edits to the session's config cannot leak
+    into the cached config other sessions are pricing with.
+    """
+    compiled = CompiledConfig(copy.deepcopy(_config))
+    if compiled.version != version:
+        raise ValueError(f"config changed while compiling version {version} (now {compiled.version})")
+    return compiled
+
+def compiled_config_for(version, config):
+    """The host-wide shared segment when it holds this version (see shared_config.py), else this process's own."""
+    if shared_config.SEGMENT_PATH:
+        shared = shared_config.attached()
+        if shared is not None and shared.version == version:
+            return shared
+    return get_compiled_config(version, config)
+
+# --- WIDGET OPTIONS ---
+def _indexed(names):
+    names = list(names)
+    return names, {name: i for i, name in enumerate(names)}
+
+class WidgetOptions:
+    """Option lists, labels and name -> index maps for the entry widgets, built once per config version."""
+
+    def __init__(self, compiled):
+        self.types, self.type_index = _indexed(compiled.materials)
+        self.materials, self.material_index = {}, {}
+        for material_type, materials in compiled.materials.items():
+            self.materials[material_type], self.material_index[material_type] = _indexed(materials)
+        self.sidedness, self.sidedness_index = _indexed(compiled.sidedness_options)
+        self.tiers, self.tier_index = _indexed(compiled.tier_descriptions)
+        self.tier_labels = {name: f"{name} - ${cost:.2f}" for name, cost in compiled.sides_tiers_map.items()}
+        self.banner_mesh, self.banner_mesh_index = _indexed([PLACEHOLDER, "None", *compiled.banner_mesh_finishing])
+        self.finishing_types, self.finishing_type_index = _indexed([PLACEHOLDER, *compiled.specialty_finishing])
+        self.finishing_options, self.finishing_option_index = {}, {}
+        for finishing_type, options in compiled.specialty_finishing.items():
+            self.finishing_options[finishing_type], self.finishing_option_index[finishing_type] = _indexed(options)
+        self.cut, self.cut_index = _indexed([PLACEHOLDER, *compiled.cut_cost_map])
+        self.cut_labels = {PLACEHOLDER: PLACEHOLDER, **{name: f"{name} - ${cost:.2f}" for name, cost in compiled.cut_cost_map.items()}}
+        self.time, self.time_index = _indexed(compiled.additional_time_map)
+        self.time_labels = {name: f"{name} - ${cost:.2f}" for name, cost in compiled.additional_time_map.items()}
+        self.install, self.install_index = _indexed(compiled.added_install_map)
+        self.install_labels = {name: f"{name} - ${cost:.2f}" for name, cost in compiled.added_install_map.items()}
+        self.adjustment, self.adjustment_index = _indexed(compiled.print_adjustment_fixed)
+        self.adjustment_labels = {name: f"{name} ({value:+.2%})" for name, value in compiled.print_adjustment_fixed.items()}
+        self.discount_tiers, self.discount_tier_index = _indexed(compiled.discount_tier_options)
+        self.discounts = compiled.discount_tier_options
+        self.discount_labels = {
+            desc: f"{desc} (P:{d[0]:.1%} | C:{d[1]:.1%} | W:{d[2]:.1%})" for desc, d in compiled.discount_tier_options.items()
+        }
+        self._volume_discount_tiers = compiled.volume_discount_tiers
+        self._auto_discount = (None, 0)
+
+    def auto_discount_index(self, total_sqft_order):
+        """Index of the discount tier the order total selects; every entry of a run asks for the same total."""
+        total, index = self._auto_discount
+        if total != total_sqft_order:
+            index = self.discount_tier_index.get(get_discount_tier_details(total_sqft_order, self._volume_discount_tiers), 0)
+            self._auto_discount = (total_sqft_order, index)
+        return index
+
+@st.cache_resource(max_entries=4)
+def get_widget_options(version, _compiled):
+    """Widget options for a compiled config; version is the hash of the contents it was compiled from."""
+    return WidgetOptions(_compiled)
+
+# Types with more materials than this get a search box, and their Material picker only
+# lists the current material plus the best MATERIAL_PICKER_LIMIT matches (see material_search.py).
+MATERIAL_PICKER_THRESHOLD = 100
+MATERIAL_PICKER_LIMIT = 50
+
+with PROFILER.phase("config_load"):
+    COMPILED_CONFIG = compiled_config_for(st.session_state.config_version, config)
+    OPTIONS = get_widget_options(COMPILED_CONFIG.version, COMPILED_CONFIG)
+    MATERIAL_INDEX = get_material_index(COMPILED_CONFIG)
+
+# --- INCREMENTAL RECALCULATION ---
+# Kept per session: an edit reprices the edited entry, plus any entry whose multiplier or
+# order-total tier crossed a breakpoint; everything else reuses its last price. Repricing
+# goes through a per-session LRU of results keyed on the entry's inputs, tiers, multiplier
+# and config version, so identical items and undone edits cost no arithmetic. Its misses go
+# to the process-wide cache shared by all sessions, when enabled (see shared_price_cache.py).
+#
+#   QUOTE_PRICE_CACHE_ENTRIES   results kept per session (default 1024)
+if 'price_cache' not in st.session_state:
+    st.session_state.price_cache = PriceCache(int(os.environ.get('QUOTE_PRICE_CACHE_ENTRIES', '1024')), source=shared_price_cache.get())
+PRICE_CACHE = st.session_state.price_cache
+if st.session_state.get('incremental_pricer') is None or st.session_state.incremental_pricer.compiled is not COMPILED_CONFIG:
+    st.session_state.incremental_pricer = IncrementalPricer(COMPILED_CONFIG, PRICE_CACHE)
+PRICER = st.session_state.incremental_pricer
+
+# --- PRICE BOOK LOOKUP MODE ---
+PRICE_BOOK_DIR = os.environ.get('PRICE_BOOK_DIR', 'price_book')
+
+@st.cache_resource(max_entries=2)
+def get_price_book(directory, manifest_mtime):
+    """Attaches to a generated price book; a regenerated manifest (new mtime) re-attaches."""
+    return PriceBookLookup(directory)
+
+PRICE_BOOK = None
+price_book_manifest = os.path.join(PRICE_BOOK_DIR, MANIFEST_NAME)
+if os.path.exists(price_book_manifest) and st.sidebar.toggle("Price book lookup", key="use_price_book", help="Serve standard items from the generated price book instead of computing them."):
+    PRICE_BOOK = get_price_book(PRICE_BOOK_DIR, os.path.getmtime(price_book_manifest))
+    if PRICE_BOOK.config_version != COMPILED_CONFIG.version:
+        st.sidebar.warning(f"Price book was generated for config {PRICE_BOOK.config_version}, not the active config {COMPILED_CONFIG.version}. Prices are computed live until it is regenerated.")
+        PRICE_BOOK = None
 
 # --- INSTANT UPDATE SOLUTION: Callback Functions ---
 def trigger_recalculation():
     """This callback recalculates the total SQFT from the main entries list and stores it in session_state."""
-    total_sqft = sum(
-        (((e.get('w_ft', 0) * 12 + e.get('w_in', 0)) * (e.get('h_ft', 0) * 12 + e.get('h_in', 0))) / 144) * e.get('qty', 1)
-        for e in st.session_state.entries
-    )
-    st.session_state.total_sqft_order = total_sqft
+    ctx = get_script_run_ctx()
+    in_callback = ctx is not None and not ctx.has_script_started
+    with tracing.current(SESSION_ID, in_callback).span("trigger_recalculation", entry_count=len(st.session_state.entries)):
+        st.session_state.total_sqft_order = order_total_sqft(st.session_state.entries)
+
+def rerun():
+    """st.rerun(), after closing this run's profile and trace so the next run starts fresh ones."""
+    PROFILER.mark_rerun()
+    tracing.finish(SESSION_ID, entry_count=len(st.session_state.entries),
+                   config_version=st.session_state.config_version, ended_by="rerun")
+    metrics.observe_rerun(SESSION_ID, time.perf_counter() - RUN_STARTED, len(st.session_state.entries),
+                          RUN_STATS["pricing_calls"], st.session_state.get('price_book_hits', 0), ended_by="rerun")
+    persist_quote_state()
+    st.rerun()
 
+@session_spill.restores
 def sync_entry_and_recalculate(entry_id, field_name):
     """
     This is the master callback. It syncs the widget's value to the
@@ -283,6 +282,151 @@ def sync_entry_and_recalculate(entry_id, field_name):
                 # No st.rerun() here, it will be handled by the main loop check
             break
 
+@session_spill.restores
+def override_discount_tier(entry_id):
+    """
+    Stores a Discount Tier picked by the user on its entry. Picking the tier the order total
+    selects clears the override, so the entry follows the order total (and repricing) again.
+    """
+    for entry in st.session_state.entries:
+        if entry['id'] == entry_id:
+            selected = st.session_state.get(f"discount_tier_{entry_id}")
+            auto_index = OPTIONS.auto_discount_index(st.session_state.get('total_sqft_order', 0))
+            if OPTIONS.discount_tiers and selected == OPTIONS.discount_tiers[auto_index]:
+                entry.pop('discount_tier_selection', None)
+            else:
+                entry['discount_tier_selection'] = selected
+            trigger_recalculation()
+            break
+
+# --- PASTE ROWS FROM A SPREADSHEET ---
+@session_spill.restores
+def add_pasted_rows():
+    """
+    Parses tab-separated rows pasted from a spreadsheet into entries and appends all valid
+    ones in a single update. A header row is optional; without one, columns are read in
+    LINE_ITEM_COLUMNS order. Runs as a callback, so the whole paste costs one rerun.
+    """
+    lines = [line for line in st.session_state.get('paste_rows_text', '').splitlines() if line.strip()]
+    if not lines:
+        return
+    header = map_header(lines[0].split('\t'))
+    if 'type' in header and 'material' in header:
+        lines = lines[1:]
+        first_row_number = 2
+    else:
+        header = LINE_ITEM_COLUMNS
+        first_row_number = 1
+
+    name_index = get_name_index(COMPILED_CONFIG)
+    new_entries, rejected = [], []
+    for row_number, line in enumerate(lines, start=first_row_number):
+        row = {column: value for column, value in zip(header, line.split('\t')) if column}
+        entry, errors = parse_line_item(row, name_index)
+        if entry:
+            new_entries.append(entry)
+        else:
+            rejected.append(f"Row {row_number}: {'; '.join(errors)}")
+
+    st.session_state.entries.extend(new_entries)
+    trigger_recalculation()
+    st.session_state.paste_rows_errors = rejected
+    st.session_state.paste_rows_status = f"Added {len(new_entries)} entries, rejected {len(rejected)} rows."
+    if not rejected:
+        st.session_state.paste_rows_text = ""
+
+# --- QUOTE PERSISTENCE ---
+@st.cache_resource
+def get_quote_store():
+    return QuoteStore()
+
+def clear_entry_widget_state(entry_ids):
+    """Drops widget values keyed on these entries so reloaded entries render from their saved data."""
+    suffixes = tuple(f"_{entry_id}" for entry_id in entry_ids)
+    if not suffixes:
+        return
+    for key in [k for k in st.session_state.keys() if isinstance(k, str) and k.endswith(suffixes)]:
+        del st.session_state[key]
+
+@session_spill.restores
+def save_current_quote():
+    quote_id, written, removed = get_quote_store().save_quote(
+        st.session_state.entries,
+        st.session_state.config_version,
+        customer=st.session_state.get('quote_customer', ''),
+        notes=st.session_state.get('quote_notes', ''),
+        quote_id=st.session_state.get('quote_id')
+    )
+    st.session_state.quote_id = quote_id
+    st.session_state.quote_status = f"Quote saved ({written} line items written, {removed} removed)."
+
+@session_spill.restores
+def load_saved_quote():
+    quote = get_quote_store().load_quote(st.session_state.get('quote_to_load'))
+    if quote is None:
+        st.session_state.quote_status = "The selected quote no longer exists."
+        return
+    clear_entry_widget_state([e['id'] for e in st.session_state.entries] + [e['id'] for e in quote['entries']])
+    st.session_state.entries = quote['entries']
+    st.session_state.quote_id = quote['id']
+    st.session_state.quote_customer = quote['customer']
+    st.session_state.quote_notes = quote['notes']
+    if quote['config_version'] != st.session_state.config_version:
+        st.session_state.quote_status = f"Loaded quote was priced against config {quote['config_version']}; prices shown use the current config."
+    else:
+        st.session_state.quote_status = f"Loaded quote with {len(quote['entries'])} line items."
+    trigger_recalculation()
+
+@session_spill.restores
+def start_new_quote():
+    clear_entry_widget_state([e['id'] for e in st.session_state.entries])
+    for key in ('entries', 'quote_id', 'quote_status'):
+        st.session_state.pop(key, None)
+    st.session_state.quote_customer = ""
+    st.session_state.quote_notes = ""
+
+# --- EXTERNAL QUOTE STATE ---
+# With QUOTE_STATE_BACKEND set, the quote is also kept in a shared backend under a key in the
+# URL, so a reconnect to another server process picks it up (see session_state_store.py).
+QUOTE_STATE_BACKEND = os.environ.get('QUOTE_STATE_BACKEND')
+
+@st.cache_resource
+def get_session_quote_store(backend_url):
+    return SessionQuoteStore(open_backend(backend_url))
+
+QUOTE_STATE = get_session_quote_store(QUOTE_STATE_BACKEND) if QUOTE_STATE_BACKEND else None
+if QUOTE_STATE is not None:
+    SESSION_KEY = st.query_params.get(SESSION_KEY_PARAM)
+    if not SESSION_KEY:
+        SESSION_KEY = st.query_params[SESSION_KEY_PARAM] = uuid.uuid4().hex
+    if '_quote_state_synced' not in st.session_state:
+        # First run of this session in this process: pick up a quote stored by any process.
+        with TRACE.span("load_quote_state"):
+            try:
+                stored = QUOTE_STATE.load(SESSION_KEY)
+            except BACKEND_ERRORS as e:
+                st.warning(f"Could not load the saved session quote: {e}")
+                stored = None
+        st.session_state._quote_state_synced = None
+        if stored is not None:
+            entries, aggregates, st.session_state._quote_state_synced = stored
+            st.session_state.setdefault('entries', entries)
+            for key in AGGREGATE_KEYS:
+                if aggregates.get(key) is not None:
+                    st.session_state.setdefault(key, aggregates[key])
+
+def persist_quote_state():
+    """Writes the entries changed since the last write to the quote state backend."""
+    if QUOTE_STATE is None:
+        return
+    aggregates = {key: st.session_state.get(key) for key in AGGREGATE_KEYS}
+    with TRACE.span("persist_quote_state"):
+        try:
+            st.session_state._quote_state_synced, _, _ = QUOTE_STATE.save(
+                SESSION_KEY, st.session_state.entries, aggregates, st.session_state._quote_state_synced)
+        except BACKEND_ERRORS as e:
+            st.sidebar.warning(f"Quote state backend unavailable; this quote lives only in this server process. ({e})")
+
 # --- Layout Rendering Function ---
 def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiples_label, is_last_entry):
     material_name = entry.get('material', 'New Entry')
@@ -298,14 +442,20 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
 
         type_col, material_col, remove_col = st.columns([2, 3, 1])
         with type_col:
-            type_options = list(MATERIALS.keys())
-            type_index = type_options.index(entry.get('type', type_options[0]))
-            st.selectbox("Type", type_options, index=type_index, key=f"type_{entry['id']}", on_change=sync_entry_and_recalculate, args=(entry['id'], 'type'))
+            type_index = OPTIONS.type_index.get(entry.get('type'), 0)
+            st.selectbox("Type", OPTIONS.types, index=type_index, key=f"type_{entry['id']}", on_change=sync_entry_and_recalculate, args=(entry['id'], 'type'))
         with material_col:
-            material_options = list(MATERIALS.get(entry['type'], {}).keys())
+            material_options = OPTIONS.materials.get(entry['type'])
             if material_options:
-                if entry.get('material') not in material_options: entry['material'] = material_options[0]
-                material_index = material_options.index(entry.get('material', material_options[0]))
+                material_index = OPTIONS.material_index[entry['type']].get(entry.get('material'))
+                if material_index is None:
+                    entry['material'], material_index = material_options[0], 0
+                if len(material_options) > MATERIAL_PICKER_THRESHOLD:
+                    query = st.text_input("Search materials", key=f"material_query_{entry['id']}",
+                                          placeholder=f"Search {len(material_options):,} materials, e.g. 13oz matte")
+                    matches = MATERIAL_INDEX[entry['type']].search(query, MATERIAL_PICKER_LIMIT)
+                    material_options = [entry['material'], *(name for name in matches if name != entry['material'])]
+                    material_index = 0
                 st.selectbox("Material", material_options, index=material_index, key=f"material_{entry['id']}", on_change=sync_entry_and_recalculate, args=(entry['id'], 'material'))
             else:
                 st.warning(f"No materials for type '{entry['type']}'"); entry['material'] = None
@@ -331,27 +481,17 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
         sqft_per_piece = (total_width_inches * total_height_inches) / 144
         total_sqft_entry = sqft_per_piece * entry.get('qty', 1)
 
-        material_data = {}
-        all_material_prices = {}
-        if entry.get('material'):
-            material_data = MATERIALS.get(entry['type'], {}).get(entry['material'], {})
-            if material_data:
-                all_material_prices = calculate_material_price(material_data)
-
         metric_col1, metric_col2, _ = st.columns(3)
         metric_col1.metric(label="SQ'/piece", value=f"{sqft_per_piece:.2f}")
         metric_col2.metric(label="Total SQ'", value=f"{total_sqft_entry:.2f}")
 
         sc1, sc2, sc3 = st.columns([1, 2, 3])
-        sidedness_index = SIDEDNESS_OPTIONS.index(entry.get('sidedness', SIDEDNESS_OPTIONS[0]))
-        entry['sidedness'] = sc1.selectbox("Sidedness", options=SIDEDNESS_OPTIONS, index=sidedness_index, key=f"side_{entry['id']}")
-        suggested_tier = get_suggested_sides_tier(sqft_per_piece, entry['sidedness'])
-        try: tier_index = TIER_DESCRIPTIONS.index(suggested_tier)
-        except ValueError: tier_index = 0
-        def format_tier_option(name): return f"{name} - ${SIDES_TIERS_MAP.get(name, 0):.2f}"
-        selected_tier_desc = sc2.selectbox("Tier", options=TIER_DESCRIPTIONS, index=tier_index, key=f"sides_tier_{entry['id']}", format_func=format_tier_option)
+        sidedness_index = OPTIONS.sidedness_index.get(entry.get('sidedness'), 0)
+        entry['sidedness'] = sc1.selectbox("Sidedness", options=OPTIONS.sidedness, index=sidedness_index, key=f"side_{entry['id']}")
+        suggested_tier = get_suggested_sides_tier(sqft_per_piece, entry['sidedness'], OPTIONS.tiers)
+        tier_index = OPTIONS.tier_index.get(suggested_tier, 0)
+        selected_tier_desc = sc2.selectbox("Tier", options=OPTIONS.tiers, index=tier_index, key=f"sides_tier_{entry['id']}", format_func=OPTIONS.tier_labels.get)
         entry['sides_tier_selection'] = selected_tier_desc
-        sides_cost_per_unit = SIDES_TIERS_MAP.get(selected_tier_desc, 0)
         
         st.markdown("---")
         st.markdown("##### Finishing Options")
@@ -361,15 +501,12 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
 
         bm_col1, bm_col2 = st.columns(2)
         with bm_col1:
-            # Find index for selectbox
-            if entry.get('banner_mesh_selection') in BANNER_MESH_FINISHING_OPTIONS:
-                bm_index = BANNER_MESH_FINISHING_OPTIONS.index(entry['banner_mesh_selection'])
-            else:
-                bm_index = 0 # Default to placeholder
+            # Find index for selectbox; defaults to the placeholder
+            bm_index = OPTIONS.banner_mesh_index.get(entry.get('banner_mesh_selection'), 0)
 
             selected_banner_mesh_option = st.selectbox(
                 label="Banner/Mesh Finishing",
-                options=BANNER_MESH_FINISHING_OPTIONS,
+                options=OPTIONS.banner_mesh,
                 index=bm_index,
                 key=f"banner_mesh_fin_{entry['id']}"
             )
@@ -388,14 +525,11 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
 
         sf_col1, sf_col2, sf_col3 = st.columns(3)
         with sf_col1:
-            if entry.get('finishing_type') in FINISHING_TYPES:
-                finishing_type_index = FINISHING_TYPES.index(entry['finishing_type'])
-            else:
-                finishing_type_index = 0
-                
+            finishing_type_index = OPTIONS.finishing_type_index.get(entry.get('finishing_type'), 0)
+
             selected_type = st.selectbox(
                 label="Additional Finishing Type",
-                options=FINISHING_TYPES,
+                options=OPTIONS.finishing_types,
                 index=finishing_type_index,
                 key=f"fin_type_{entry['id']}"
             )
@@ -406,14 +540,12 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
 
         with sf_col2:
             options_for_type = SPECIALTY_FINISHING.get(selected_type, {})
-            if list(options_for_type.keys()):
+            if options_for_type:
                 # Ensure a valid option is selected, otherwise default
-                current_option = entry.get('finishing_option')
-                option_keys = list(options_for_type.keys())
-                if current_option not in option_keys:
-                    entry['finishing_option'] = option_keys[0]
-                
-                option_index = option_keys.index(entry['finishing_option'])
+                option_keys = OPTIONS.finishing_options[selected_type]
+                option_index = OPTIONS.finishing_option_index[selected_type].get(entry.get('finishing_option'))
+                if option_index is None:
+                    entry['finishing_option'], option_index = option_keys[0], 0
 
                 selected_option = st.selectbox("Option", options=option_keys, index=option_index, key=f"fin_opt_{entry['id']}")
                 entry['finishing_option'] = selected_option
@@ -424,137 +556,91 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
         with sf_col3:
             st.metric(label="Additional Cost/Unit", value=f"${specialty_finishing_price_per_unit:.2f}")
 
-        finishing_price_per_unit = banner_mesh_cost_per_unit + specialty_finishing_price_per_unit
         st.markdown("---")
 
         cc1, cc2, _ = st.columns(3)
         with cc1:
-            def format_cut_option(option_name):
-                price = CUT_COST_MAP.get(option_name, 0)
-                if option_name == PLACEHOLDER:
-                    return PLACEHOLDER
-                return f"{option_name} - ${price:.2f}"
-            
-            if entry.get('cut_cost_selection') in CUT_COST_OPTIONS:
-                cut_index = CUT_COST_OPTIONS.index(entry['cut_cost_selection'])
-            else:
-                cut_index = 0
+            cut_index = OPTIONS.cut_index.get(entry.get('cut_cost_selection'), 0)
 
             selected_cut_cost_desc = st.selectbox(
                 label="Cut Option",
-                options=CUT_COST_OPTIONS,
+                options=OPTIONS.cut,
                 index=cut_index,
                 key=f"cut_cost_{entry['id']}",
-                format_func=format_cut_option
+                format_func=OPTIONS.cut_labels.get
             )
             entry['cut_cost_selection'] = selected_cut_cost_desc
             
             if selected_cut_cost_desc == PLACEHOLDER:
                 st.warning("Selection required for Cut Option.")
 
-            cut_cost_per_unit = CUT_COST_MAP.get(selected_cut_cost_desc, 0)
-
         with cc2:
-            def format_time_option(option_name):
-                price = ADDITIONAL_TIME_MAP.get(option_name, 0)
-                return f"{option_name} - ${price:.2f}"
-
-            default_at_index = 0
-            if entry.get('additional_time_selection') in ADDITIONAL_TIME_OPTIONS:
-                default_at_index = ADDITIONAL_TIME_OPTIONS.index(entry['additional_time_selection'])
+            default_at_index = OPTIONS.time_index.get(entry.get('additional_time_selection'), 0)
 
             selected_at_desc = st.selectbox(
                 "Additional Time",
-                options=ADDITIONAL_TIME_OPTIONS,
+                options=OPTIONS.time,
                 index=default_at_index,
                 key=f"add_time_{entry['id']}",
-                format_func=format_time_option
+                format_func=OPTIONS.time_labels.get
             )
             entry['additional_time_selection'] = selected_at_desc
-            additional_time_cost_per_unit = ADDITIONAL_TIME_MAP.get(selected_at_desc, 0)
                 
         ai1, ai2 = st.columns(2)
         with ai1:
-            def format_install_option(option_name):
-                price = ADDED_INSTALL_MAP.get(option_name, 0)
-                return f"{option_name} - ${price:.2f}"
+            default_ai_index = OPTIONS.install_index.get(entry.get('added_install_selection'), 0)
 
-            default_ai_index = 0
-            if entry.get('added_install_selection') in ADDED_INSTALL_OPTIONS:
-                default_ai_index = ADDED_INSTALL_OPTIONS.index(entry['added_install_selection'])
-                
             selected_ai_desc = st.selectbox(
                 "Added Install/Item Per Piece",
-                options=ADDED_INSTALL_OPTIONS,
+                options=OPTIONS.install,
                 index=default_ai_index,
                 key=f"added_install_{entry['id']}",
-                format_func=format_install_option
+                format_func=OPTIONS.install_labels.get
             )
             entry['added_install_selection'] = selected_ai_desc
-            added_install_cost_per_unit = ADDED_INSTALL_MAP.get(selected_ai_desc, 0)
         with ai2:
-            def format_adjustment_option(name):
-                value = PRINT_ADJUSTMENT_FIXED[name]
-                return f"{name} ({value:+.2%})"
-
-            options = list(PRINT_ADJUSTMENT_FIXED.keys())
-            default_adj = entry.get('print_adjustment', options[0])
-            adj_index = options.index(default_adj) if default_adj in options else 0
+            adj_index = OPTIONS.adjustment_index.get(entry.get('print_adjustment'), 0)
 
             selected_adjustment_label = st.selectbox(
                 "Select Adjustment",
-                options=options,
+                options=OPTIONS.adjustment,
                 index=adj_index,
-                format_func=format_adjustment_option,
+                format_func=OPTIONS.adjustment_labels.get,
                 key=f"adjustment_{entry['id']}"
             )
             entry['print_adjustment'] = selected_adjustment_label
-            adjustment_percentage = PRINT_ADJUSTMENT_FIXED[selected_adjustment_label]
-
-        export_data = { "Type": entry.get('type'), "Material": entry.get('material'), "Num of pieces": entry.get('qty'), "Width (in)": total_width_inches, "Height (in)": total_height_inches, "SQ' per piece": f"{sqft_per_piece:.2f}", "Total SQ'": f"{total_sqft_entry:.2f}"}
-
-        calculation_data = {
-            "qty": entry.get('qty', 1), "sqft_per_piece": sqft_per_piece, "total_sqft_entry": total_sqft_entry,
-            "sides_cost_per_unit": sides_cost_per_unit, "finishing_price_per_unit": finishing_price_per_unit,
-            "cut_cost_per_unit": cut_cost_per_unit, "additional_time_cost_per_unit": additional_time_cost_per_unit,
-            "added_install_cost_per_unit": added_install_cost_per_unit,
-        }
 
         discount_col1, discount_col2 = st.columns([1, 2])
         with discount_col1:
-            discount_tier_options = {desc: discounts for _, (desc, discounts) in sorted(VOLUME_DISCOUNT_TIERS.items())}
-            options_list = list(discount_tier_options.keys())
-
-            def format_discount_tier(description):
-                discounts = discount_tier_options.get(description, [0, 0, 0])
-                p_disc, c_disc, w_disc = discounts[0], discounts[1], discounts[2]
-                return f"{description} (P:{p_disc:.1%} | C:{c_disc:.1%} | W:{w_disc:.1%})"
-
-            auto_selected_tier = get_discount_tier_details(total_sqft_order, VOLUME_DISCOUNT_TIERS)
-            try:
-                default_index = options_list.index(auto_selected_tier)
-            except ValueError:
-                default_index = 0
-            
+            # Only a tier the user picked is stored on the entry; otherwise the widget follows
+            # the tier the current order total selects.
+            tier_key = f"discount_tier_{entry['id']}"
+            tier_index = OPTIONS.discount_tier_index.get(entry.get('discount_tier_selection'))
+            if tier_index is None:
+                tier_index = OPTIONS.auto_discount_index(total_sqft_order)
+            if OPTIONS.discount_tiers and st.session_state.get(tier_key) != OPTIONS.discount_tiers[tier_index]:
+                st.session_state[tier_key] = OPTIONS.discount_tiers[tier_index]
             selected_tier_description = st.selectbox(
-                "Discount Tier", 
-                options=options_list, 
-                index=default_index, 
-                key=f"discount_tier_{entry['id']}",
-                format_func=format_discount_tier
+                "Discount Tier",
+                options=OPTIONS.discount_tiers,
+                key=tier_key,
+                format_func=OPTIONS.discount_labels.get,
+                on_change=override_discount_tier,
+                args=(entry['id'],)
             )
-            selected_tier_discounts = discount_tier_options[selected_tier_description]
-
-        prodcuts_an_vars = material_data.get("prodcuts_an_vars")
-        if prodcuts_an_vars:
-            _, prodcuts_an_for_entry = calculate_dynamic_prodcuts_an(prodcuts_an_vars, entry.get('qty', 1))
-        else:
-            prodcuts_an_for_entry = default_prodcuts_an
-
-        entry_prices = calculate_all_prices_for_entry(
-            calculation_data, all_material_prices, selected_tier_discounts,
-            adjustment_percentage, multiples_value, prodcuts_an_for_entry
-        )
+            selected_tier_discounts = OPTIONS.discounts[selected_tier_description]
+
+        with PROFILER.phase("entry_pricing"):
+            entry_prices = None
+            if PRICE_BOOK is not None:
+                entry_prices = PRICE_BOOK.lookup(entry, COMPILED_CONFIG, selected_tier_description, multiples_value)
+                if entry_prices is not None:
+                    st.session_state.price_book_hits += 1
+            if entry_prices is None:
+                with TRACE.span("calculate_all_prices_for_entry", entry_id=entry['id']):
+                    misses = PRICE_CACHE.misses
+                    entry_prices = PRICER.price(entry, total_sqft_order, multiples_value)['prices']
+                RUN_STATS["pricing_calls"] += PRICE_CACHE.misses - misses
         
         st.metric(label=f"Material Multiplier ({multiples_label})", value=f"x{multiples_value}")
 
@@ -571,6 +657,15 @@ def render_expanded_layout(entry, i, total_sqft_order, multiples_value, multiple
             price_per_sqft_pref, price_per_sqft_corp, price_per_sqft_whole = 0, 0, 0
 
 
+        export_data = {
+            "Type": entry.get('type'), "Material": entry.get('material'), "Num of pieces": entry.get('qty'),
+            "Width (in)": total_width_inches, "Height (in)": total_height_inches, "Sidedness": entry.get('sidedness'),
+            "SQ' per piece": round(sqft_per_piece, 2), "Total SQ'": round(total_sqft_entry, 2),
+            "Discount Tier": selected_tier_description, "Multiplier": multiples_value,
+            "Preferred": round(entry_prices.get('Preferred', 0), 2), "Corporate": round(entry_prices.get('Corporate', 0), 2), "Wholesale": round(entry_prices.get('Wholesale', 0), 2),
+            "Preferred per SQ'": round(price_per_sqft_pref, 2), "Corporate per SQ'": round(price_per_sqft_corp, 2), "Wholesale per SQ'": round(price_per_sqft_whole, 2),
+        }
+
         p_col, c_col, w_col = st.columns(3)
         with p_col:
             st.metric(label=preferred_label, value=f"${entry_prices.get('Preferred', 0):,.2f}/{price_per_sqft_pref:,.2f} per sq'")
@@ -606,30 +701,38 @@ data_for_export, all_entry_totals = [], []
 remove_entry_index = None
 if not st.session_state.entries: st.warning("No quote entries yet. Click below to add one.")
 
-current_total_sqft = sum((((e.get('w_ft', 0) * 12 + e.get('w_in', 0)) * (e.get('h_ft', 0) * 12 + e.get('h_in', 0))) / 144) * e.get('qty', 1) for e in st.session_state.entries)
-if st.session_state.get('total_sqft_order', -1) != current_total_sqft:
-    trigger_recalculation()
-    st.rerun()
+with PROFILER.phase("aggregate_recompute"):
+    current_total_sqft = order_total_sqft(st.session_state.entries)
+    needs_rerun = st.session_state.get('total_sqft_order', -1) != current_total_sqft
+    if needs_rerun:
+        trigger_recalculation()
+    material_type_counts = Counter(e.get('material') for e in st.session_state.entries)
+if needs_rerun:
+    rerun()
 
-material_type_counts = Counter(e.get('material') for e in st.session_state.entries)
+st.session_state.price_book_hits = 0
+PRICER.begin()
 total_sqft_order = st.session_state.get('total_sqft_order', 0)
 
 for i, entry in enumerate(st.session_state.entries):
     material_count = material_type_counts.get(entry.get('material'), 1)
-    multiples_label, multiples_value = get_multiplier(material_count)
+    multiples_label, multiples_value = get_multiplier(material_count, MULTIPLES_MAP)
     is_last_entry = (i == len(st.session_state.entries) - 1)
 
-    status, export_data = render_expanded_layout(
-        entry, i, total_sqft_order, multiples_value, multiples_label, is_last_entry
-    )
+    with PROFILER.entry(f"#{i + 1} {entry.get('material', 'New Entry')}"), TRACE.span("render_expanded_layout", index=i):
+        status, export_data = render_expanded_layout(
+            entry, i, total_sqft_order, multiples_value, multiples_label, is_last_entry
+        )
     if status == "remove_entry": remove_entry_index = i
     else:
         if export_data: data_for_export.append(export_data)
 
+PRICER.retain(e['id'] for e in st.session_state.entries)
+
 if remove_entry_index is not None:
     st.session_state.entries.pop(remove_entry_index)
     trigger_recalculation()
-    st.rerun()
+    rerun()
 
 st.divider()
 if st.button("➕ Add New Entry", use_container_width=True):
@@ -646,7 +749,29 @@ if st.button("➕ Add New Entry", use_container_width=True):
             "print_adjustment": list(PRINT_ADJUSTMENT_FIXED.keys())[0] if PRINT_ADJUSTMENT_FIXED else None
         })
         trigger_recalculation()
-        st.rerun()
+        rerun()
+
+with st.expander("📋 Paste Rows from Spreadsheet"):
+    st.caption(f"Paste tab-separated rows copied from a spreadsheet. Include a header row, or use the column order: {', '.join(LINE_ITEM_COLUMNS)}.")
+    st.text_area("Rows", key="paste_rows_text", height=150, label_visibility="collapsed")
+    st.button("Add Pasted Rows", on_click=add_pasted_rows, use_container_width=True)
+    if st.session_state.get('paste_rows_status'):
+        st.caption(st.session_state.paste_rows_status)
+    for error in st.session_state.get('paste_rows_errors', []):
+        st.error(error)
+
+# --- Quote Export ---
+# Files are built from data_for_export only when a button is clicked, on a separate thread,
+# and clicking does not rerun the page.
+if data_for_export:
+    export_name = (st.session_state.get('quote_customer') or "quote").strip().replace(" ", "_")
+    csv_col, xlsx_col, pdf_col = st.columns(3)
+    csv_col.download_button("⬇️ Export CSV", data=partial(to_csv, data_for_export), file_name=f"{export_name}.csv",
+                            mime="text/csv", on_click="ignore", use_container_width=True)
+    xlsx_col.download_button("⬇️ Export Excel", data=partial(to_xlsx, data_for_export), file_name=f"{export_name}.xlsx",
+                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", on_click="ignore", use_container_width=True)
+    pdf_col.download_button("⬇️ Export PDF", data=partial(to_pdf, data_for_export, "Quote", st.session_state.get('quote_customer', '')),
+                            file_name=f"{export_name}.pdf", mime="application/pdf", on_click="ignore", use_container_width=True)
 
 # --- SIDEBAR FINAL DISPLAY ---
 with st.sidebar.expander("Go to Entry...", expanded=True):
@@ -658,4 +783,93 @@ with st.sidebar.expander("Go to Entry...", expanded=True):
 
 st.sidebar.divider()
 st.sidebar.metric(label="TOTAL SQ' IN ORDER", value=f"{st.session_state.total_sqft_order:.2f}")
-st.sidebar.divider()
\ No newline at end of file
+if PRICE_BOOK is not None:
+    st.sidebar.caption(f"Price book served {st.session_state.price_book_hits} of {len(st.session_state.entries)} entries.")
+if PRICER.reused:
+    st.sidebar.caption(f"Repriced {PRICER.repriced} of {PRICER.repriced + PRICER.reused} computed entries; the rest were unchanged.")
+st.sidebar.divider()
+
+with st.sidebar.expander("Saved Quotes", expanded=False):
+    st.text_input("Customer", key="quote_customer")
+    st.text_area("Notes", key="quote_notes", height=80)
+    save_col, new_col = st.columns(2)
+    save_col.button("💾 Save", on_click=save_current_quote, use_container_width=True)
+    new_col.button("🆕 New", on_click=start_new_quote, use_container_width=True)
+
+    saved_quotes = get_quote_store().list_quotes(limit=50)
+    if saved_quotes:
+        quote_labels = {
+            q['id']: f"{q['customer'] or 'No customer'} — {pd.Timestamp(q['updated_at'], unit='s'):%Y-%m-%d %H:%M} ({q['line_count']} items)"
+            for q in saved_quotes
+        }
+        st.selectbox("Open a saved quote", options=list(quote_labels.keys()), format_func=quote_labels.get, key="quote_to_load")
+        st.button("📂 Load", on_click=load_saved_quote, use_container_width=True)
+    else:
+        st.caption("No saved quotes yet.")
+
+    if st.session_state.get('quote_status'):
+        st.caption(st.session_state.quote_status)
+
+# --- DIAGNOSTICS PANEL ---
+if DIAGNOSTICS_AVAILABLE:
+    st.sidebar.divider()
+    st.sidebar.toggle("🩺 Diagnostics", key="show_diagnostics", help="Time each phase of every rerun for this session.")
+if PROFILER.enabled:
+    last_run = PROFILER.finish(len(st.session_state.entries))
+    history = list(st.session_state[HISTORY_KEY])
+    with st.sidebar.expander("Rerun Profile", expanded=True):
+        st.metric("Last run", f"{last_run['total'] * 1000:,.0f} ms", help="Everything above this panel, for this script run.")
+        st.dataframe(pd.DataFrame({
+            "phase": PHASES,
+            "ms": [last_run['phases'][phase] * 1000 for phase in PHASES],
+            "avg ms (recent)": [sum(r['phases'][phase] for r in history) / len(history) * 1000 for phase in PHASES],
+        }), hide_index=True, use_container_width=True)
+        cache_lookups = PRICE_CACHE.hits + PRICE_CACHE.misses
+        st.caption(f"Price cache (this session): {PRICE_CACHE.hits:,} hits, {PRICE_CACHE.misses:,} misses"
+                   f"{f' ({PRICE_CACHE.hits / cache_lookups:.0%} hit rate)' if cache_lookups else ''}, "
+                   f"{len(PRICE_CACHE):,} of {PRICE_CACHE.max_entries:,} results kept.")
+        if PRICE_CACHE.source is not None:
+            shared = PRICE_CACHE.source.stats()
+            st.caption(f"Shared price cache (all sessions): {shared['hits']:,} hits, {shared['misses']:,} misses, "
+                       f"{shared['entries']:,} of {shared['max_entries']:,} results kept.")
+        interaction_runs = runs_per_interaction(history)
+        st.caption(f"Script runs per interaction (latest last): {', '.join(map(str, interaction_runs[-10:]))}")
+        if last_run['slowest_entries']:
+            st.write("Slowest entries")
+            st.dataframe(pd.DataFrame(
+                [(label, total * 1000, pricing * 1000) for label, total, pricing in last_run['slowest_entries']],
+                columns=["entry", "total ms", "pricing ms"]
+            ), hide_index=True, use_container_width=True)
+
+    with st.sidebar.expander("Session Memory"):
+        if st.button("Measure all sessions", help="Walks every live session's state in this server process."):
+            records = session_memory.measure_sessions()
+            st.dataframe(pd.DataFrame([{
+                "session": r['session_id'][:8] + (" (you)" if r['session_id'] == SESSION_ID else ""),
+                "page": r['page'], "idle min": r['idle_seconds'] / 60, "KiB": r['total_bytes'] / 1024,
+            } for r in records]), hide_index=True, use_container_width=True)
+            by_key = Counter()
+            for r in records:
+                by_key.update(r['keys'])
+            st.write("By state key (all sessions)")
+            st.dataframe(pd.DataFrame(
+                [(key, size / 1024) for key, size in by_key.most_common()], columns=["key", "KiB"]
+            ), hide_index=True, use_container_width=True)
+        # Process-wide tracemalloc; while on, this session snapshots the heap after each of its runs.
+        if st.toggle("Trace allocations", key="trace_memory", help="Slows the whole server while on."):
+            session_memory.start_tracing()
+            session_memory.take_snapshot(f"{SESSION_ID[:8]} run at {time.strftime('%H:%M:%S')}")
+            diff = session_memory.snapshot_diff(top=10)
+            if diff is None:
+                st.caption("Rerun once more to diff against this snapshot.")
+            else:
+                old_label, new_label, rows = diff
+                st.caption(f"Growth from {old_label} to {new_label}")
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        elif session_memory.tracing_memory():
+            session_memory.stop_tracing()
+
+persist_quote_state()
+tracing.finish(SESSION_ID, entry_count=len(st.session_state.entries), config_version=st.session_state.config_version)
+metrics.observe_rerun(SESSION_ID, time.perf_counter() - RUN_STARTED, len(st.session_state.entries),
+                      RUN_STATS["pricing_calls"], st.session_state.price_book_hits)
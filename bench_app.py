@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Widget
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+from bench_pricing import baseline, git_commit, load_history, machine_id
+from synthetic_data import make_config, make_order
+
+# End-to-end rerun benchmark: drives Calculator.py headlessly through AppTest with orders of
+# N entries and measures each interaction's wall time, the script runs it triggered (a
+# st.rerun() inside the script counts as a second run) and the widgets it emitted.
+
+CALCULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Calculator.py")
+DEFAULT_HISTORY = "bench_app_history.jsonl"
+DEFAULT_SIZES = (1, 10, 100, 500)
+DEFAULT_THRESHOLD = 1.5
+
+_runners = []
+_original_runner_init = LocalScriptRunner.__init__
+
+
+def _tracking_runner_init(self, *args, **kwargs):
+    _original_runner_init(self, *args, **kwargs)
+    _runners.append(self)
+
+
+LocalScriptRunner.__init__ = _tracking_runner_init
+
+
+def _measure(at, interaction):
+    """Runs one interaction; returns (seconds, script runs, widgets in the final page)."""
+    _runners.clear()
+    started = time.perf_counter()
+    interaction()
+    seconds = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"Calculator raised: {at.exception[0].value}")
+    runs = sum(event == ScriptRunnerEvent.SCRIPT_STARTED for runner in _runners for event in runner.events)
+    widgets = sum(isinstance(node, Widget) for node in at._tree)
+    return seconds, runs, widgets
+
+
+def _button(at, label):
+    return next(button for button in at.button if button.label == label)
+
+
+def bench_size(size, config):
+    """Yields (interaction, seconds, runs, widgets) for an order of `size` entries."""
+    at = AppTest.from_file(CALCULATOR, default_timeout=600)
+    at.session_state.entries = make_order(config, size, seed=size)
+
+    yield ("first_load", *_measure(at, at.run))
+    yield ("rerun_unchanged", *_measure(at, at.run))
+
+    last = at.session_state.entries[-1]
+    qty = at.number_input(key=f"qty_{last['id']}")
+    yield ("change_qty", *_measure(at, lambda: qty.set_value(qty.value + 1).run()))
+
+    first = at.session_state.entries[0]
+    material = at.selectbox(key=f"material_{first['id']}")
+    other = next((m for m in material.options if m != material.value), material.value)
+    yield ("change_material", *_measure(at, lambda: material.set_value(other).run()))
+
+    yield ("add_entry", *_measure(at, lambda: _button(at, "➕ Add New Entry").click().run()))
+
+    removed = at.session_state.entries[0]['id']
+    yield ("remove_entry", *_measure(at, lambda: at.button(key=f"remove_{removed}").click().run()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Calculator.py reruns headlessly for orders of increasing size")
+    parser.add_argument(
+        "-n", "--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+        help="Comma-separated entry counts")
+    parser.add_argument(
+        "--history", default=DEFAULT_HISTORY,
+        help="JSONL file runs are appended to and compared against")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Slowdown ratio vs. the baseline that counts as a regression")
+    parser.add_argument(
+        "--no-record", action="store_true",
+        help="Compare only; do not append this run to the history")
+    parser.add_argument(
+        "--accept", action="store_true",
+        help="Record this run even if it regressed, making its timings part of the baseline")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    history_path = os.path.abspath(args.history)
+
+    history = load_history(history_path)
+    machine = machine_id()
+    reference = baseline(history, machine)
+    results, regressions = {}, []
+
+    print(f"{'interaction':<22} {'N':>5} {'wall ms':>10} {'runs':>5} {'widgets':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        # The calculator reads config.json and writes quotes.db relative to the working directory.
+        config = make_config(material_types=6, materials_per_type=10, volume_tiers=5)
+        with open(os.path.join(workdir, "config.json"), 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        os.environ["QUOTES_DB_PATH"] = os.path.join(workdir, "quotes.db")
+        os.environ["PRICE_BOOK_DIR"] = os.path.join(workdir, "price_book")
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for size in sizes:
+                for interaction, seconds, runs, widgets in bench_size(size, config):
+                    name = f"{interaction}[{size}]"
+                    results[name] = seconds
+                    results[f"{name}.runs"] = runs
+                    results[f"{name}.widgets"] = widgets
+                    line = f"{interaction:<22} {size:>5} {seconds * 1000:>10.1f} {runs:>5} {widgets:>8}"
+                    if name in reference:
+                        ratio = seconds / reference[name]
+                        line += f"   x{ratio:.2f} vs baseline"
+                        if ratio > args.threshold:
+                            regressions.append(name)
+                            line += f"   REGRESSION (> x{args.threshold:.2f})"
+                    if reference.get(f"{name}.runs") is not None and runs > reference[f"{name}.runs"]:
+                        regressions.append(f"{name}.runs")
+                        line += f"   MORE RUNS (baseline {reference[f'{name}.runs']:g})"
+                    print(line)
+        finally:
+            os.chdir(cwd)
+
+    # A regressed run is kept out of the history unless accepted, so it cannot drag the baseline along.
+    if regressions and not args.accept and not args.no_record:
+        print(f"Not recording this run in {args.history} because it regressed; rerun with --accept to record it.")
+    elif not args.no_record:
+        record = {
+            "timestamp": time.time(), "commit": git_commit(), "machine": machine,
+            "unit": "seconds_per_interaction", "results": results,
+        }
+        with open(history_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+    if not reference:
+        print(f"No earlier runs for this machine in {args.history}; this run becomes the baseline.")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import Counter
+from pricing import (
+    CompiledConfig, calculate_all_prices_for_entry, calculate_dynamic_prodcuts_an, calculate_entry_total,
+    calculate_material_price, get_banner_mesh_details, get_discount_tier_details, get_multiplier, price_order
+)
+from synthetic_data import make_config, make_order
+
+# Micro-benchmarks for the pricing hot path over synthetic configs and orders of increasing
+# size. Every run is appended to a JSONL history file and compared with the median of the
+# previous runs on the same machine; a benchmark slower than its threshold fails the run.
+
+DEFAULT_HISTORY = "bench_history.jsonl"
+BASELINE_RUNS = 5
+DEFAULT_THRESHOLD = 1.25
+# File I/O and whole-order pricing are noisier than the pure functions.
+THRESHOLDS = {"load_config": 1.5, "price_order": 1.4}
+
+# (material types, materials per type, volume tiers)
+CONFIG_SCALES = {"small": (3, 5, 3), "medium": (10, 40, 12), "large": (25, 200, 50)}
+ORDER_SIZES = (10, 100, 500)
+
+
+def _timed(func, repeat):
+    """Best-of-repeat seconds per call, with the loop count picked by timeit's autorange."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _calc_data(entry):
+    return {
+        "qty": entry['qty'], "sqft_per_piece": 6.25, "total_sqft_entry": 6.25 * entry['qty'],
+        "sides_cost_per_unit": 1.2, "finishing_price_per_unit": 0.5, "cut_cost_per_unit": 0.1,
+        "additional_time_cost_per_unit": 15, "added_install_cost_per_unit": 2.5,
+    }
+
+
+def build_benchmarks(workdir):
+    """Yields (name, callable) pairs; names read '<function>[<scale>]'."""
+    for scale, (types, per_type, tiers) in CONFIG_SCALES.items():
+        config = make_config(types, per_type, tiers)
+        compiled = CompiledConfig(config)
+        entry = make_order(config, 1)[0]
+        material_data = config['MATERIALS'][entry['type']][entry['material']]
+        an_vars = material_data['prodcuts_an_vars']
+        material_prices = compiled.material_prices[(entry['type'], entry['material'])]
+        calc_data = {**_calc_data(entry), "active_base_amount": material_prices['corporate_base']}
+        discounts = [0.05, 0.07, 0.1]
+        big_sqft = max(compiled.volume_discount_tiers) + 1
+        hem = compiled.banner_mesh_finishing["Hem & Grommet"]
+
+        config_path = os.path.join(workdir, f"config_{scale}.json")
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+
+        def load_config(path=config_path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        yield f"calculate_material_price[{scale}]", lambda: calculate_material_price(material_data, compiled.fall_back_value)
+        yield f"calculate_dynamic_prodcuts_an[{scale}]", lambda: calculate_dynamic_prodcuts_an(an_vars, entry['qty'])
+        yield f"calculate_entry_total[{scale}]", lambda: calculate_entry_total(
+            calc_data, 'Corporate', 0.07, 0.0, 1.5, 16.21, compiled.cons_bx_4, compiled.cons_bx_6)
+        yield f"calculate_all_prices_for_entry[{scale}]", lambda: calculate_all_prices_for_entry(
+            calc_data, material_prices, discounts, 0.0, 1.5, 16.21, compiled.cons_bx_4, compiled.cons_bx_6)
+        yield f"get_discount_tier_details[{scale}]", lambda: get_discount_tier_details(big_sqft, compiled.volume_discount_tiers)
+        yield f"get_multiplier[{scale}]", lambda: get_multiplier(7, compiled.multiples_map)
+        yield f"get_banner_mesh_details[{scale}]", lambda: get_banner_mesh_details(120, hem)
+        yield f"load_config[{scale}]", load_config
+        for size in ORDER_SIZES:
+            order = make_order(config, size, seed=size)
+            counts = Counter(e['material'] for e in order)
+            yield f"price_order[{scale},{size}]", lambda order=order, counts=counts: price_order(order, compiled, None, counts)
+
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{platform.python_implementation()} {platform.python_version()}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history, machine, runs=BASELINE_RUNS):
+    """Median seconds per call of each benchmark over the last `runs` runs on this machine."""
+    samples = {}
+    for record in [r for r in history if r.get('machine') == machine][-runs:]:
+        for name, seconds in record['results'].items():
+            samples.setdefault(name, []).append(seconds)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def threshold_for(name, default):
+    return THRESHOLDS.get(name.split('[', 1)[0], default)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pricing engine and flag regressions against previous runs")
+    parser.add_argument(
+        "--history", default=DEFAULT_HISTORY,
+        help="JSONL file runs are appended to and compared against")
+    parser.add_argument(
+        "-k", "--filter",
+        help="Only run benchmarks whose name contains this text")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5,
+        help="Timing repeats per benchmark (best one is kept)")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Slowdown ratio vs. the baseline that counts as a regression (per-function overrides still apply)")
+    parser.add_argument(
+        "--no-record", action="store_true",
+        help="Compare only; do not append this run to the history")
+    parser.add_argument(
+        "--accept", action="store_true",
+        help="Record this run even if it regressed, making its timings part of the baseline")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    machine = machine_id()
+    reference = baseline(history, machine)
+    results, regressions = {}, []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, func in build_benchmarks(workdir):
+            if args.filter and args.filter not in name:
+                continue
+            seconds = _timed(func, args.repeat)
+            results[name] = seconds
+            line = f"{name:<45} {seconds * 1e6:>12.3f} us"
+            if name in reference:
+                ratio = seconds / reference[name]
+                limit = threshold_for(name, args.threshold)
+                line += f"   x{ratio:.2f} vs baseline"
+                if ratio > limit:
+                    regressions.append(name)
+                    line += f"   REGRESSION (> x{limit:.2f})"
+            print(line)
+
+    # A regressed run is kept out of the history unless accepted, so it cannot drag the baseline along.
+    if regressions and not args.accept and not args.no_record:
+        print(f"Not recording this run in {args.history} because it regressed; rerun with --accept to record it.")
+    elif not args.no_record:
+        record = {
+            "timestamp": time.time(), "commit": git_commit(), "machine": machine,
+            "unit": "seconds_per_call", "results": results,
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+    if not reference:
+        print(f"No earlier runs for this machine in {args.history}; this run becomes the baseline.")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
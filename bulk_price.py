@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+from line_items import COLUMNS, get_name_index, map_header, parse_line_item
+from pricing import CompiledConfig, PRICE_CUSTOMER_TYPES, entry_sqft_per_piece, price_order
+
+OUTPUT_COLUMNS = [
+    "row", *COLUMNS,
+    "sqft_per_piece", "total_sqft", "discount_tier", "multiples_value",
+    *PRICE_CUSTOMER_TYPES, "errors",
+]
+
+
+def _is_excel(path):
+    return os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm")
+
+
+def read_rows(input_path):
+    """
+    Streams (row_number, row) pairs from a CSV or XLSX file, where row maps canonical
+    column names to raw cell values. Row numbers match the spreadsheet (header is row 1).
+    """
+    if _is_excel(input_path):
+        from openpyxl import load_workbook
+        workbook = load_workbook(input_path, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        handle = open(input_path, 'r', newline='', encoding='utf-8-sig')
+        rows = csv.reader(handle)
+    try:
+        columns = map_header(next(rows, []))
+        if "type" not in columns or "material" not in columns:
+            sys.exit(f"{input_path}: the header row must include at least 'type' and 'material' columns.")
+        for row_number, values in enumerate(rows, start=2):
+            if not any(v not in (None, "") for v in values):
+                continue
+            yield row_number, {column: value for column, value in zip(columns, values) if column}
+    finally:
+        if _is_excel(input_path):
+            workbook.close()
+        else:
+            handle.close()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self._path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Priced")
+        self._sheet.append(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._path)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def order_context(input_path, index):
+    """First pass: total sqft and per-material entry counts of every valid row in the file."""
+    total_sqft, material_counts = 0, Counter()
+    for _, row in read_rows(input_path):
+        entry, _ = parse_line_item(row, index)
+        if entry:
+            total_sqft += entry_sqft_per_piece(entry) * entry['qty']
+            material_counts[entry['material']] += 1
+    return total_sqft, material_counts
+
+
+def price_file(input_path, output_path, config, chunk_size=1000, per_line=False):
+    """
+    Prices every line item of a CSV/XLSX file and writes a priced copy with per-row errors.
+    By default the file is one order, so volume tiers and multiples come from all of its
+    valid rows; with per_line each row is priced as a single-line order.
+    Returns (rows priced, rows rejected, order totals per customer type).
+    """
+    compiled = CompiledConfig(config)
+    index = get_name_index(compiled)
+    total_sqft, material_counts = (None, None) if per_line else order_context(input_path, index)
+
+    writer = XlsxWriter(output_path) if _is_excel(output_path) else CsvWriter(output_path)
+    priced_count, rejected_count = 0, 0
+    totals = dict.fromkeys(PRICE_CUSTOMER_TYPES, 0)
+    try:
+        for chunk in _chunks(read_rows(input_path), chunk_size):
+            parsed = [(row_number, row, *parse_line_item(row, index)) for row_number, row in chunk]
+            valid = [entry for _, _, entry, _ in parsed if entry]
+            if per_line:
+                results = [price_order([entry], compiled)[0][0] for entry in valid]
+            else:
+                results, _ = price_order(valid, compiled, total_sqft, material_counts)
+            results = iter(results)
+
+            output = []
+            for row_number, row, entry, errors in parsed:
+                cells = [row_number, *(row.get(column, "") for column in COLUMNS)]
+                if entry is None:
+                    rejected_count += 1
+                    output.append([*cells, "", "", "", "", "", "", "", "; ".join(errors)])
+                    continue
+                result = next(results)
+                calc = result['calculation_data']
+                for cust_type in PRICE_CUSTOMER_TYPES:
+                    totals[cust_type] += result['prices'][cust_type]
+                priced_count += 1
+                output.append([
+                    *cells, round(calc['sqft_per_piece'], 4), round(calc['total_sqft_entry'], 4),
+                    result['discount_tier'], result['multiples_value'],
+                    *(round(result['prices'][cust_type], 2) for cust_type in PRICE_CUSTOMER_TYPES), "",
+                ])
+            writer.write(output)
+    finally:
+        writer.close()
+    return priced_count, rejected_count, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Price a CSV/XLSX file of quote line items and write a priced copy with per-row validation errors")
+    parser.add_argument(
+        "input",
+        help="CSV or XLSX file of line items (type, material, w_ft, w_in, h_ft, h_in, qty, sidedness, ...)")
+    parser.add_argument(
+        "-o", "--output",
+        help="Priced output file (.csv or .xlsx); defaults to <input>_priced.csv")
+    parser.add_argument(
+        "-c", "--config", default="config.json",
+        help="Path to your config.json")
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="Rows parsed and priced per chunk")
+    parser.add_argument(
+        "--per-line", action="store_true",
+        help="Price every row as its own single-line order instead of treating the file as one order")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    output = args.output or f"{os.path.splitext(args.input)[0]}_priced.csv"
+
+    started = time.perf_counter()
+    priced, rejected, totals = price_file(args.input, output, config, args.chunk_size, args.per_line)
+    elapsed = time.perf_counter() - started
+    rows = priced + rejected
+    print(f"Priced {priced} rows, rejected {rejected} in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    for cust_type, total in totals.items():
+        print(f"  {cust_type} total: ${total:,.2f}", file=sys.stderr)
+    print(f"Written priced line items to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import time
+from collections import deque
+
+# Lightweight per-rerun profiling for the calculator's diagnostics panel. The calculator
+# wraps its phases in profiler.phase(...); when diagnostics are off it gets NULL_PROFILER,
+# whose methods do nothing, so the disabled cost is one no-op call per phase.
+
+HISTORY_KEY = "_diagnostics_history"
+PENDING_RERUN_KEY = "_diagnostics_pending_rerun"
+HISTORY_LENGTH = 50
+SLOWEST_ENTRIES = 5
+
+# Phases in display order.
+PHASES = ("config_load", "aggregate_recompute", "entry_pricing", "entry_render", "other")
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _Entry:
+    __slots__ = ("profiler", "label", "started", "pricing_before")
+
+    def __init__(self, profiler, label):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        self.pricing_before = self.profiler.phases.get("entry_pricing", 0.0)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.started
+        pricing = self.profiler.phases.get("entry_pricing", 0.0) - self.pricing_before
+        self.profiler.add("entry_render", total - pricing)
+        self.profiler.entries.append((self.label, total, pricing))
+        return False
+
+
+class RerunProfiler:
+    """Collects phase timings for one script run and files them into the session's history."""
+
+    enabled = True
+
+    def __init__(self, state):
+        self.state = state
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.entries = []
+        # A run started by st.rerun() belongs to the same interaction as the run before it.
+        self.interaction_run = state.pop(PENDING_RERUN_KEY, 0) + 1
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def entry(self, label):
+        return _Entry(self, label)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark_rerun(self):
+        """Call right before st.rerun() so the next run is counted against this interaction."""
+        self.finish()
+        self.state[PENDING_RERUN_KEY] = self.interaction_run
+
+    def finish(self, entry_count=None):
+        """Closes the run and appends its record to the session history (once)."""
+        if self.started is None:
+            return self.state.get(HISTORY_KEY, [None])[-1]
+        total = time.perf_counter() - self.started
+        self.started = None
+        phases = {name: self.phases.get(name, 0.0) for name in PHASES if name != "other"}
+        phases["other"] = max(total - sum(phases.values()), 0.0)
+        record = {
+            "total": total,
+            "phases": phases,
+            "interaction_run": self.interaction_run,
+            "entry_count": len(self.entries) if entry_count is None else entry_count,
+            "slowest_entries": sorted(self.entries, key=lambda e: e[1], reverse=True)[:SLOWEST_ENTRIES],
+        }
+        history = self.state.get(HISTORY_KEY)
+        if history is None:
+            history = self.state[HISTORY_KEY] = deque(maxlen=HISTORY_LENGTH)
+        history.append(record)
+        return record
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullProfiler:
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def entry(self, label):
+        return self._phase
+
+    def add(self, name, seconds):
+        pass
+
+    def mark_rerun(self):
+        pass
+
+    def finish(self, entry_count=None):
+        return None
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def runs_per_interaction(history):
+    """Script runs each recent interaction took (1 = no extra st.rerun())."""
+    counts = []
+    for record in history:
+        if record["interaction_run"] == 1 or not counts:
+            counts.append(1)
+        else:
+            counts[-1] = record["interaction_run"]
+    return counts
@@ -0,0 +1,146 @@
+import math
+import uuid
+from pricing import PLACEHOLDER
+
+# Parsing and validation of line items that arrive as rows of text (spreadsheets, pasted
+# clipboard data) into calculator entries. Names are matched case-insensitively against
+# the config, through name indexes that are built once per config version.
+
+# Canonical column -> accepted header spellings (compared case-insensitively). The second
+# spelling of most columns is the calculator's own widget label.
+COLUMN_ALIASES = {
+    "type": ["type", "material type"],
+    "material": ["material", "specific material"],
+    "w_ft": ["w_ft", "width (ft)", "width ft"],
+    "w_in": ["w_in", "width (in)", "width in"],
+    "h_ft": ["h_ft", "height (ft)", "height ft"],
+    "h_in": ["h_in", "height (in)", "height in"],
+    "qty": ["qty", "num of pieces", "quantity", "pieces"],
+    "sidedness": ["sidedness", "sides"],
+    "banner_mesh": ["banner_mesh", "banner/mesh finishing", "banner mesh"],
+    "finishing_type": ["finishing_type", "additional finishing type", "finishing"],
+    "finishing_option": ["finishing_option", "option", "finishing option"],
+    "cut": ["cut", "cut option"],
+    "time": ["time", "additional time"],
+    "install": ["install", "added install/item per piece", "added install"],
+    "adjustment": ["adjustment", "select adjustment", "print adjustment"],
+}
+COLUMNS = list(COLUMN_ALIASES)
+_HEADER_LOOKUP = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+# Upper bounds on sizes and quantities, so a stray huge number is rejected with its row
+# instead of overflowing when the order is totalled.
+MAX_FEET = 1000
+MAX_INCHES = MAX_FEET * 12
+MAX_QTY = 1000000
+
+_name_indexes = {}
+
+
+def _fold(names):
+    return {str(name).strip().casefold(): name for name in names}
+
+
+class NameIndex:
+    """Case-insensitive name -> canonical config name maps for every selectable option."""
+
+    def __init__(self, compiled):
+        self.version = compiled.version
+        self.types = _fold(compiled.materials)
+        self.materials = {t: _fold(materials) for t, materials in compiled.materials.items()}
+        self.sidedness = _fold(compiled.sidedness_options)
+        self.banner_mesh = _fold(["None", *compiled.banner_mesh_finishing])
+        self.finishing_types = _fold(compiled.specialty_finishing)
+        self.finishing_options = {t: _fold(options) for t, options in compiled.specialty_finishing.items()}
+        self.cut = _fold(compiled.cut_cost_map)
+        self.time = _fold(compiled.additional_time_options)
+        self.install = _fold(compiled.added_install_options)
+        self.adjustment = _fold(compiled.print_adjustment_options)
+        self.defaults = {
+            "sidedness": compiled.sidedness_options[0] if compiled.sidedness_options else None,
+            "time": compiled.additional_time_options[0] if compiled.additional_time_options else None,
+            "install": compiled.added_install_options[0] if compiled.added_install_options else None,
+            "adjustment": compiled.print_adjustment_options[0] if compiled.print_adjustment_options else None,
+        }
+
+
+def get_name_index(compiled):
+    """Returns the name index for a compiled config, building it once per config version."""
+    index = _name_indexes.get(compiled.version)
+    if index is None:
+        if len(_name_indexes) >= 4:
+            _name_indexes.pop(next(iter(_name_indexes)))
+        index = _name_indexes[compiled.version] = NameIndex(compiled)
+    return index
+
+
+def map_header(header):
+    """Maps spreadsheet headers to canonical columns; unknown headers map to None."""
+    return [_HEADER_LOOKUP.get(str(h).strip().casefold()) if h is not None else None for h in header]
+
+
+def _resolve(value, names, label, errors, default=None):
+    text = str(value).strip() if value is not None else ""
+    if not text:
+        if default is None:
+            errors.append(f"{label} is required")
+        return default
+    name = names.get(text.casefold())
+    if name is None:
+        errors.append(f"unknown {label} '{text}'")
+    return name
+
+
+def _to_int(value, label, errors, default, minimum, maximum):
+    text = str(value).strip() if value is not None else ""
+    if not text:
+        return default
+    try:
+        number = float(text)
+    except ValueError:
+        errors.append(f"{label} '{text}' is not a number")
+        return default
+    if not math.isfinite(number):
+        errors.append(f"{label} '{text}' is not a finite number")
+        return default
+    if number != int(number) or not minimum <= number <= maximum:
+        errors.append(f"{label} must be a whole number from {minimum} to {maximum}")
+        return default
+    return int(number)
+
+
+def parse_line_item(row, index):
+    """
+    Turns a row (canonical column -> raw value) into a calculator entry.
+    Returns (entry, errors); entry is None when the row cannot be priced.
+    """
+    errors = []
+    material_type = _resolve(row.get("type"), index.types, "type", errors)
+    material = None
+    if material_type:
+        material = _resolve(row.get("material"), index.materials.get(material_type, {}), f"{material_type} material", errors)
+
+    entry = {
+        "id": str(uuid.uuid4()),
+        "type": material_type,
+        "material": material,
+        "w_ft": _to_int(row.get("w_ft"), "width (ft)", errors, 0, 0, MAX_FEET),
+        "w_in": _to_int(row.get("w_in"), "width (in)", errors, 0, 0, MAX_INCHES),
+        "h_ft": _to_int(row.get("h_ft"), "height (ft)", errors, 0, 0, MAX_FEET),
+        "h_in": _to_int(row.get("h_in"), "height (in)", errors, 0, 0, MAX_INCHES),
+        "qty": _to_int(row.get("qty"), "qty", errors, 1, 1, MAX_QTY),
+        "sidedness": _resolve(row.get("sidedness"), index.sidedness, "sidedness", errors, index.defaults["sidedness"]),
+        "banner_mesh_selection": _resolve(row.get("banner_mesh"), index.banner_mesh, "banner/mesh finishing", errors, "None"),
+        "finishing_type": _resolve(row.get("finishing_type"), index.finishing_types, "finishing type", errors, PLACEHOLDER),
+        "cut_cost_selection": _resolve(row.get("cut"), index.cut, "cut option", errors, PLACEHOLDER),
+        "additional_time_selection": _resolve(row.get("time"), index.time, "additional time", errors, index.defaults["time"]),
+        "added_install_selection": _resolve(row.get("install"), index.install, "added install", errors, index.defaults["install"]),
+        "print_adjustment": _resolve(row.get("adjustment"), index.adjustment, "adjustment", errors, index.defaults["adjustment"]),
+    }
+    finishing_options = index.finishing_options.get(entry["finishing_type"])
+    if finishing_options:
+        option_default = next(iter(finishing_options.values()))
+        entry["finishing_option"] = _resolve(row.get("finishing_option"), finishing_options, "finishing option", errors, option_default)
+    if (entry["w_ft"] * 12 + entry["w_in"]) * (entry["h_ft"] * 12 + entry["h_in"]) == 0:
+        errors.append("width and height must both be greater than zero")
+    return (None if errors else entry), errors
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+
+# Localhost load generator for pricing_api.py: N client threads with keep-alive
+# connections post randomly built line items built from the config's own names.
+
+
+def random_item(config, rng):
+    material_type = rng.choice(list(config['MATERIALS']))
+    return {
+        "type": material_type,
+        "material": rng.choice(list(config['MATERIALS'][material_type])),
+        "w_ft": rng.randint(1, 10), "w_in": rng.randint(0, 11),
+        "h_ft": rng.randint(1, 10), "h_in": rng.randint(0, 11),
+        "qty": rng.randint(1, 50),
+    }
+
+
+def build_body(endpoint, config, items_per_request, rng):
+    if endpoint == "entry":
+        return {"item": random_item(config, rng)}
+    return {"items": [random_item(config, rng) for _ in range(items_per_request)]}
+
+
+def run_client(host, port, endpoint, bodies, deadline, latencies, failures):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request("POST", f"/price/{endpoint}", body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                failures.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            failures.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test a running pricing_api.py server on localhost")
+    parser.add_argument(
+        "-c", "--config", default="config.json",
+        help="Path to the config.json the server uses (for material names)")
+    parser.add_argument(
+        "--host", default="127.0.0.1")
+    parser.add_argument(
+        "-p", "--port", type=int, default=8502)
+    parser.add_argument(
+        "-e", "--endpoint", choices=["entry", "batch", "order"], default="entry",
+        help="Endpoint to exercise")
+    parser.add_argument(
+        "-n", "--items", type=int, default=50,
+        help="Items per batch/order request")
+    parser.add_argument(
+        "-t", "--threads", type=int, default=8,
+        help="Concurrent client connections")
+    parser.add_argument(
+        "-d", "--duration", type=float, default=10,
+        help="Test length in seconds")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    rng = random.Random(0)
+    bodies = [json.dumps(build_body(args.endpoint, config, args.items, rng)).encode() for _ in range(200)]
+
+    latencies, failures = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=run_client, args=(args.host, args.port, args.endpoint, bodies, deadline, latencies, failures))
+        for _ in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(latencies)} requests ok, {len(failures)} failed in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:,.1f} req/s, {args.threads} connections, endpoint /price/{args.endpoint})")
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        print(f"latency ms: p50 {cuts[49] * 1000:.1f}  p95 {cuts[94] * 1000:.1f}  p99 {cuts[98] * 1000:.1f}  max {max(latencies) * 1000:.1f}")
+    if failures:
+        print(f"first failures: {failures[:5]}")
+
+if __name__ == "__main__":
+    main()
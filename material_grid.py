@@ -0,0 +1,148 @@
+import copy
+import json
+import os
+import stat
+import tempfile
+import pandas as pd
+
+# Per-material cost variables as one table (a row per material, a column per variable) for
+# the bulk cost editor. Bulk operations are applied to whole columns at once, the edited
+# table is validated as a whole, and only cells that changed are written back, into a copy
+# of the config that is saved in a single atomic write.
+
+GRID_FIELDS = {
+    "Preferred": ("preferred_historical_price", "preferred_fine_tune_modifier", "preferred_discount_value"),
+    "Corporate": ("corporate_historical_price", "corporate_discount_value"),
+    "Wholesale": ("wholesale_historical_price", "wholesale_discount_value"),
+    "prodcuts_an_vars": ("AW_Roll_Costs", "AV_Material_Width", "AU_Material_Length", "AT_Labour",
+                         "AS_Laminate_Loading", "AQ_SQ", "constant_BY8", "Per_hour_rate"),
+}
+KEY_COLUMNS = ["type", "material"]
+VALUE_COLUMNS = [var for variables in GRID_FIELDS.values() for var in variables]
+PRICE_COLUMNS = [var for section in ("Preferred", "Corporate", "Wholesale") for var in GRID_FIELDS[section]]
+AN_COLUMNS = list(GRID_FIELDS["prodcuts_an_vars"])
+DISCOUNT_COLUMNS = ["preferred_discount_value", "corporate_discount_value", "wholesale_discount_value"]
+
+BULK_OPERATIONS = {
+    "Increase by %": lambda values, amount: values * (1 + amount / 100),
+    "Add": lambda values, amount: values + amount,
+    "Multiply by": lambda values, amount: values * amount,
+    "Set to": lambda values, amount: values.where(values.isna(), amount),
+}
+
+
+def materials_frame(materials, material_type=None):
+    """The grid for one material type, or for every type when material_type is None."""
+    rows = []
+    for type_name, type_materials in materials.items():
+        if material_type is not None and type_name != material_type:
+            continue
+        for name, material in type_materials.items():
+            row = {"type": type_name, "material": name}
+            for section, variables in GRID_FIELDS.items():
+                values = material.get(section) or {}
+                row.update((var, values.get(var)) for var in variables)
+            rows.append(row)
+    frame = pd.DataFrame(rows, columns=KEY_COLUMNS + VALUE_COLUMNS)
+    frame[VALUE_COLUMNS] = frame[VALUE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    return frame
+
+
+def bulk_update(frame, column, operation, amount, material_type=None, name_contains=""):
+    """Applies one operation to a column for every matching row; returns (new frame, rows changed).
+
+    Blank cells (e.g. a material without prodcuts_an_vars) stay blank.
+    """
+    mask = frame[column].notna()
+    if material_type is not None:
+        mask &= frame["type"] == material_type
+    if name_contains:
+        mask &= frame["material"].str.contains(name_contains, case=False, regex=False)
+    updated = frame.copy()
+    updated.loc[mask, column] = BULK_OPERATIONS[operation](frame.loc[mask, column], amount)
+    return updated, int(mask.sum())
+
+
+def validate_frame(frame):
+    """Problems that would stop the grid from being saved; empty when every row is valid."""
+    problems = []
+    values = frame[VALUE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    labels = frame["type"] + "/" + frame["material"]
+
+    def report(mask, message):
+        rows, columns = mask.to_numpy().nonzero()
+        problems.extend(f"{labels.iat[row]}: {mask.columns[column]} {message}" for row, column in zip(rows, columns))
+
+    report(frame[VALUE_COLUMNS].notna() & values.isna(), "is not a number")
+    report(values[PRICE_COLUMNS].isna() & frame[PRICE_COLUMNS].isna(), "is required")
+    report(values < 0, "cannot be negative")
+    report(values[DISCOUNT_COLUMNS] > 1, "is a fraction and cannot exceed 1")
+    # prodcuts_an_vars is optional, but must be complete when present.
+    an_present = values[AN_COLUMNS].notna()
+    report((~an_present).mul(an_present.any(axis=1), axis=0).astype(bool), "is required when any AN formula variable is set")
+    report(values[["AV_Material_Width", "AU_Material_Length"]] == 0, "cannot be zero")
+    return problems
+
+
+def changed_rows(original, edited):
+    """Boolean mask of the rows whose values differ between two grids with the same rows."""
+    before, after = original[VALUE_COLUMNS], edited[VALUE_COLUMNS]
+    return ~((before == after) | (before.isna() & after.isna())).all(axis=1)
+
+
+def _same(before, after):
+    return before == after or (pd.isna(before) and pd.isna(after))
+
+
+def _config_number(value, previous):
+    """A grid value as written to config.json: whole numbers stay ints where the config had an int."""
+    value = float(value)
+    if isinstance(previous, int) and not isinstance(previous, bool) and value.is_integer():
+        return int(value)
+    return value
+
+
+def apply_frame(materials, original, edited):
+    """
+    Returns (materials with the grid's changed cells applied, how many materials changed).
+    materials itself is left untouched: only the changed materials, and the type mappings
+    holding them, are copied.
+    """
+    updated = dict(materials)
+    mask = changed_rows(original, edited)
+    for before, after in zip(original[mask].itertuples(index=False), edited[mask].itertuples(index=False)):
+        before, after = before._asdict(), after._asdict()
+        material_type, name = after["type"], after["material"]
+        if updated[material_type] is materials[material_type]:
+            updated[material_type] = dict(materials[material_type])
+        material = updated[material_type][name] = copy.deepcopy(materials[material_type][name])
+        for section, variables in GRID_FIELDS.items():
+            changed = [var for var in variables if not _same(before[var], after[var])]
+            if not changed:
+                continue
+            if section == "prodcuts_an_vars" and all(pd.isna(after[var]) for var in variables):
+                # Blank AN variables mean the default prodcuts_an applies.
+                material.pop(section, None)
+                continue
+            values = material.setdefault(section, {})
+            for var in changed:
+                values[var] = _config_number(after[var], values.get(var))
+    return updated, int(mask.sum())
+
+
+def write_config(config, path='config.json'):
+    """Writes config to path atomically: readers see the old file or the new one, never a partial write."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
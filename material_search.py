@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import argparse
+import bisect
+import json
+import re
+import time
+from pricing import CompiledConfig
+
+# Search over material names for catalogs with thousands of materials per type. Each type
+# gets an index built once per config version: a sorted name list for prefix matches, a
+# token -> names map (queried by token prefix, so "13o ban" finds "Banner 13oz Matte"),
+# and a trigram map over the token vocabulary for misspellings. The calculator's material
+# picker and the Material Management page only send the matching slice to the browser.
+
+_WORD = re.compile(r"[^\W_]+")
+# Share of trigrams a misspelled token must have in common with a catalog token.
+FUZZY_THRESHOLD = 0.3
+
+_material_indexes = {}
+
+
+def _fold(text):
+    return str(text).strip().casefold()
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MaterialSearch:
+    """Ranked search over one list of names: whole-name prefix, then every token, then fuzzy tokens."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._prefixes = sorted((_fold(name), i) for i, name in enumerate(self.names))
+        self._postings = {}
+        for i, name in enumerate(self.names):
+            for token in _WORD.findall(_fold(name)):
+                self._postings.setdefault(token, set()).add(i)
+        self._vocabulary = sorted(self._postings)
+        self._token_trigrams = {}
+        self._trigram_counts = {}
+        for token in self._vocabulary:
+            trigrams = _trigrams(token)
+            self._trigram_counts[token] = len(trigrams)
+            for trigram in trigrams:
+                self._token_trigrams.setdefault(trigram, []).append(token)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _name_prefix(self, query):
+        start = bisect.bisect_left(self._prefixes, (query, -1))
+        matches = []
+        for folded, i in self._prefixes[start:]:
+            if not folded.startswith(query):
+                break
+            matches.append(i)
+        return sorted(matches)
+
+    def _token_prefix(self, token):
+        start = bisect.bisect_left(self._vocabulary, token)
+        matches = set()
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(token):
+                break
+            matches |= self._postings[candidate]
+        return matches
+
+    def _fuzzy_token(self, token):
+        """{name index: best similarity} over catalog tokens that look like a misspelling of token."""
+        trigrams = _trigrams(token)
+        shared = {}
+        for trigram in trigrams:
+            for candidate in self._token_trigrams.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        scores = {}
+        for candidate, count in shared.items():
+            similarity = count / (len(trigrams) + self._trigram_counts[candidate] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                for i in self._postings[candidate]:
+                    scores[i] = max(scores.get(i, 0), similarity)
+        return scores
+
+    def search(self, query, limit=None):
+        """Names matching query, best first; all names in their original order for an empty query."""
+        query = _fold(query)
+        if not query:
+            return self.names[:limit]
+        ranked = self._name_prefix(query)
+        tokens = _WORD.findall(query)
+        if tokens and (limit is None or len(ranked) < limit):
+            exact = set.intersection(*(self._token_prefix(token) for token in tokens))
+            ranked += sorted(exact.difference(ranked))
+            if limit is None or len(ranked) < limit:
+                # Each token matches by prefix or, failing that, by spelling.
+                scores = None
+                for token in tokens:
+                    token_scores = self._fuzzy_token(token)
+                    for i in self._token_prefix(token):
+                        token_scores[i] = 1.0
+                    scores = token_scores if scores is None else {
+                        i: scores[i] + score for i, score in token_scores.items() if i in scores}
+                seen = set(ranked)
+                ranked += sorted((i for i in scores if i not in seen), key=lambda i: (-scores[i], i))
+        return [self.names[i] for i in ranked[:limit]]
+
+
+def build_material_index(materials):
+    """{material type: MaterialSearch} for a MATERIALS mapping."""
+    return {material_type: MaterialSearch(names) for material_type, names in materials.items()}
+
+
+def get_material_index(compiled):
+    """Returns the material index for a compiled config, building it once per config version."""
+    index = _material_indexes.get(compiled.version)
+    if index is None:
+        if len(_material_indexes) >= 4:
+            _material_indexes.pop(next(iter(_material_indexes)))
+        index = _material_indexes[compiled.version] = build_material_index(compiled.materials)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search the materials in config.json the way the calculator's material picker does")
+    parser.add_argument(
+        "query",
+        help="Search text, e.g. '13oz ban'")
+    parser.add_argument(
+        "-c", "--config", default="config.json",
+        help="Path to your config.json")
+    parser.add_argument(
+        "-t", "--type",
+        help="Only search this material type")
+    parser.add_argument(
+        "-n", "--limit", type=int, default=20,
+        help="Matches to show per type")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        compiled = CompiledConfig(json.load(f))
+    start = time.perf_counter()
+    index = get_material_index(compiled)
+    print(f"Indexed {sum(map(len, index.values()))} materials in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for material_type, search in index.items():
+        if args.type and material_type != args.type:
+            continue
+        start = time.perf_counter()
+        matches = search.search(args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if matches:
+            print(f"{material_type} ({elapsed_ms:.2f} ms): {', '.join(matches)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus metrics for the Streamlit server process. Set QUOTE_METRICS_PORT to serve
+# them in the Prometheus text format on http://<host>:<port>/metrics from a background
+# thread; without it (or without prometheus_client installed) every function here is a no-op.
+
+METRICS_PORT = os.environ.get('QUOTE_METRICS_PORT')
+METRICS_ADDR = os.environ.get('QUOTE_METRICS_ADDR', '0.0.0.0')
+# Sessions that have not rerun for this long no longer count as active.
+SESSION_IDLE_SECONDS = 30 * 60
+
+_lock = threading.Lock()
+_metrics = None
+# session id -> (last rerun time, entry count)
+_sessions = {}
+
+
+def _create(port):
+    from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+    from prometheus_client.core import GaugeMetricFamily
+
+    registry = CollectorRegistry()
+
+    class SessionCollector:
+        """Active sessions and the entries they hold, computed at scrape time."""
+
+        def collect(self):
+            cutoff = time.time() - SESSION_IDLE_SECONDS
+            with _lock:
+                for session_id in [s for s, (seen, _) in _sessions.items() if seen < cutoff]:
+                    del _sessions[session_id]
+                entry_counts = [entries for _, entries in _sessions.values()]
+            yield GaugeMetricFamily("calculator_active_sessions", "Sessions that reran in the last 30 minutes", value=len(entry_counts))
+            yield GaugeMetricFamily("calculator_active_session_entries", "Quote entries held by active sessions", value=sum(entry_counts))
+            yield GaugeMetricFamily("calculator_active_session_entries_max", "Largest quote held by an active session", value=max(entry_counts, default=0))
+
+    registry.register(SessionCollector())
+    metrics = {
+        "reruns": Counter("calculator_reruns", "Calculator script runs", ["ended_by"], registry=registry),
+        "rerun_seconds": Histogram(
+            "calculator_rerun_seconds", "Calculator script run wall time", registry=registry,
+            buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)),
+        "pricing_calls": Counter("calculator_pricing_calls", "Entries priced by the pricing engine", registry=registry),
+        "price_book_hits": Counter("calculator_price_book_hits", "Entries served from the price book", registry=registry),
+        "config_loads": Counter("calculator_config_loads", "Config loads from file or secrets", ["page"], registry=registry),
+        "config_write_seconds": Histogram(
+            "editor_config_write_seconds", "Time to write config.json from an editor page", ["page"], registry=registry,
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)),
+        "config_write_failures": Counter("editor_config_write_failures", "Failed config.json writes", ["page"], registry=registry),
+    }
+    try:
+        start_http_server(int(port), addr=METRICS_ADDR, registry=registry)
+    except OSError as e:
+        # Usually a re-import of this module after a code change, with the first server still bound.
+        print(f"metrics: could not serve on port {port}: {e}", file=sys.stderr)
+    return metrics
+
+
+def _get():
+    global _metrics
+    if _metrics is None and METRICS_PORT:
+        with _lock:
+            if _metrics is None:
+                try:
+                    _metrics = _create(METRICS_PORT)
+                except ImportError:
+                    print("metrics: QUOTE_METRICS_PORT is set but prometheus_client is not installed", file=sys.stderr)
+                    _metrics = {}
+    return _metrics
+
+
+def start():
+    """Starts the exporter (once per process) if it is configured."""
+    _get()
+
+
+def observe_rerun(session_id, seconds, entry_count, pricing_calls=0, price_book_hits=0, ended_by="complete"):
+    metrics = _get()
+    if not metrics:
+        return
+    metrics["reruns"].labels(ended_by).inc()
+    metrics["rerun_seconds"].observe(seconds)
+    metrics["pricing_calls"].inc(pricing_calls)
+    metrics["price_book_hits"].inc(price_book_hits)
+    with _lock:
+        _sessions[session_id] = (time.time(), entry_count)
+
+
+def count_config_load(page):
+    metrics = _get()
+    if metrics:
+        metrics["config_loads"].labels(page).inc()
+
+
+@contextmanager
+def time_config_write(page):
+    """Times an editor's config.json write; failures are counted separately."""
+    metrics = _get()
+    if not metrics:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics["config_write_failures"].labels(page).inc()
+        raise
+    metrics["config_write_seconds"].labels(page).observe(time.perf_counter() - started)
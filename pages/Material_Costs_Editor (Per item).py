@@ -1,8 +1,19 @@
 import streamlit as st
+import session_memory
+import session_spill
+import shared_config
+import metrics
+import copy
 import json
 import os
+import pandas as pd
+from quote_store import QuoteStore
+from repricing import INLINE_QUOTE_LIMIT, reprice_corpus, summarize_impact
 
 st.set_page_config(layout="wide", page_title="Material Cost Editor (Per item)")
+session_memory.track("Material Costs Editor")
+session_spill.start()
+session_spill.restore(st.session_state)
 st.title("Material Cost Editor (Per item)")
 
 # --- CONFIGURATION LOADER ---
@@ -26,9 +37,20 @@ def reload_config():
     if 'config' in st.session_state:
         del st.session_state['config']
 
+def apply_material_edits(material, edits):
+    """Writes the edited variables into a material's Preferred/Corporate/Wholesale/prodcuts_an_vars sections."""
+    for section, values in edits.items():
+        material.setdefault(section, {}).update(values)
+
+@st.cache_resource
+def get_quote_store():
+    return QuoteStore()
+
 # --- Initialize Config if not present ---
+metrics.start()
 if 'config' not in st.session_state:
     st.session_state.config = load_config()
+    metrics.count_config_load("material_costs")
 
 config = st.session_state.config
 
@@ -89,40 +111,74 @@ if selected_type and selected_material_name:
         new_Per_hour_rate = st.number_input("Per_hour_rate", value=float(an_vars.get("Per_hour_rate", 0)), format="%.2f", key=f"{selected_material_name}_phr")
 
 
+    edits = {
+        "Preferred": {
+            "preferred_historical_price": preferred_historical_price,
+            "preferred_fine_tune_modifier": preferred_fine_tune_modifier,
+            "preferred_discount_value": preferred_discount_value,
+        },
+        "Corporate": {
+            "corporate_historical_price": corporate_historical_price,
+            "corporate_discount_value": corporate_discount_value,
+        },
+        "Wholesale": {
+            "wholesale_historical_price": wholesale_historical_price,
+            "wholesale_discount_value": wholesale_discount_value,
+        },
+        "prodcuts_an_vars": {
+            "AW_Roll_Costs": new_AW_Roll_Costs,
+            "AV_Material_Width": new_AV_Material_Width,
+            "AU_Material_Length": new_AU_Material_Length,
+            "AT_Labour": new_AT_Labour,
+            "AS_Laminate_Loading": new_AS_Laminate_Loading,
+            "AQ_SQ": new_AQ_SQ,
+            "constant_BY8": new_constant_BY8,
+            "Per_hour_rate": new_Per_hour_rate,
+        },
+    }
+
     st.divider()
-    
+
+    # --- Impact Preview on Saved Quotes ---
+    with st.expander("Preview Impact on Saved Quotes"):
+        st.write(f"Reprices every saved quote that uses {selected_material_name} under the values on disk and the values above, before anything is saved.")
+        if st.button("Run Impact Analysis", use_container_width=True):
+            current_config = load_config()
+            proposed_config = copy.deepcopy(current_config)
+            apply_material_edits(proposed_config['MATERIALS'][selected_type][selected_material_name], edits)
+            store = get_quote_store()
+            quote_count = store.count_quotes(material=selected_material_name)
+            if quote_count == 0:
+                st.info(f"No saved quotes use {selected_material_name}.")
+            else:
+                progress = st.progress(0.0, text=f"Repricing {quote_count} quotes...")
+                impact_rows = []
+                for chunk_rows in reprice_corpus(store.iter_quotes(material=selected_material_name), current_config, proposed_config,
+                                                 workers=None if quote_count > INLINE_QUOTE_LIMIT else 0):
+                    impact_rows.extend(chunk_rows)
+                    progress.progress(len(impact_rows) / quote_count, text=f"Repriced {len(impact_rows)} of {quote_count} quotes")
+                progress.empty()
+                st.subheader("Aggregate Impact by Customer Type")
+                st.dataframe(pd.DataFrame(summarize_impact(impact_rows)), hide_index=True, use_container_width=True)
+                st.subheader("Per-Quote Impact")
+                impact_df = pd.DataFrame(impact_rows)
+                impact_df['updated_at'] = pd.to_datetime(impact_df['updated_at'], unit='s')
+                st.dataframe(impact_df.drop(columns=['id']).sort_values('Preferred delta', key=abs, ascending=False), hide_index=True, use_container_width=True)
+
     # --- Save Button Logic ---
     save_col, reload_col = st.columns(2)
     with save_col:
         if st.button("Save Changes to Configuration File", use_container_width=True):
             # Update the config dictionary in session state with the new values
-            config['MATERIALS'][selected_type][selected_material_name]['Preferred']['preferred_historical_price'] = preferred_historical_price
-            config['MATERIALS'][selected_type][selected_material_name]['Preferred']['preferred_fine_tune_modifier'] = preferred_fine_tune_modifier
-            config['MATERIALS'][selected_type][selected_material_name]['Preferred']['preferred_discount_value'] = preferred_discount_value
-            
-            config['MATERIALS'][selected_type][selected_material_name]['Corporate']['corporate_historical_price'] = corporate_historical_price
-            config['MATERIALS'][selected_type][selected_material_name]['Corporate']['corporate_discount_value'] = corporate_discount_value
-
-            config['MATERIALS'][selected_type][selected_material_name]['Wholesale']['wholesale_historical_price'] = wholesale_historical_price
-            config['MATERIALS'][selected_type][selected_material_name]['Wholesale']['wholesale_discount_value'] = wholesale_discount_value
-            
-            # --- SAVE NEW AN FORMULA VARS ---
-            if 'prodcuts_an_vars' not in config['MATERIALS'][selected_type][selected_material_name]:
-                config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars'] = {}
-
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AW_Roll_Costs'] = new_AW_Roll_Costs
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AV_Material_Width'] = new_AV_Material_Width
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AU_Material_Length'] = new_AU_Material_Length
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AT_Labour'] = new_AT_Labour
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AS_Laminate_Loading'] = new_AS_Laminate_Loading
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['AQ_SQ'] = new_AQ_SQ
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['constant_BY8'] = new_constant_BY8
-            config['MATERIALS'][selected_type][selected_material_name]['prodcuts_an_vars']['Per_hour_rate'] = new_Per_hour_rate
+            apply_material_edits(config['MATERIALS'][selected_type][selected_material_name], edits)
 
             # Write the updated config back to the JSON file
             try:
-                with open('config.json', 'w', encoding='utf-8') as f:
+                with metrics.time_config_write("material_costs"), open('config.json', 'w', encoding='utf-8') as f:
                     json.dump(config, f, indent=2)
+                if shared_config.SEGMENT_PATH:
+                    # Every process on this host picks the saved config up from the shared segment.
+                    shared_config.publish_file('config.json')
                 st.success(f"Successfully saved changes for {selected_material_name}!")
                 st.info("Click 'Reload Configuration' to apply the changes to the app.")
             except Exception as e:
@@ -0,0 +1,198 @@
+import streamlit as st
+import session_memory
+import session_spill
+import shared_config
+import metrics
+import json
+import os
+import pandas as pd
+from material_grid import (
+    BULK_OPERATIONS, KEY_COLUMNS, VALUE_COLUMNS, apply_frame, bulk_update, changed_rows, materials_frame,
+    validate_frame, write_config
+)
+
+st.set_page_config(layout="wide", page_title="Material Cost Grid Editor (Bulk)")
+session_memory.track("Material Costs Grid Editor")
+session_spill.start()
+session_spill.restore(st.session_state)
+st.title("Material Cost Grid Editor (Bulk)")
+st.write("Edit the Preferred/Corporate/Wholesale variables and AN formula variables of many materials at once. "
+         "Bulk operations and cell edits stay in this grid until saved; saving validates the whole grid and writes config.json once.")
+
+ALL_TYPES = "All types"
+GRID_EDITOR_KEY = "cost_grid_editor"
+
+# --- CONFIGURATION LOADER ---
+def load_config(file_path='config.json'):
+    """
+    Loads configuration from a local file.
+    """
+    if not os.path.exists(file_path):
+        st.error(f"FATAL: The configuration file '{file_path}' was not found in the project directory.")
+        st.stop()
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        st.error(f"FATAL: Error decoding '{file_path}'. Please ensure it is valid JSON. Error: {e}")
+        st.stop()
+
+def reload_config():
+    """Clears the config from session state, forcing a reload on the next run."""
+    if 'config' in st.session_state:
+        del st.session_state['config']
+
+# --- WORKING GRID ---
+def load_grid(scope):
+    """Builds the working grid (and the copy it is compared against) from the config in session state."""
+    frame = materials_frame(st.session_state.config['MATERIALS'], None if scope == ALL_TYPES else scope)
+    st.session_state.cost_grid = frame
+    st.session_state.cost_grid_original = frame.copy()
+    st.session_state.cost_grid_scope = scope
+    st.session_state.pop(GRID_EDITOR_KEY, None)
+
+def with_editor_edits(grid):
+    """A copy of grid with the editor's pending cell edits applied."""
+    grid = grid.copy()
+    edits = st.session_state.get(GRID_EDITOR_KEY) or {}
+    for row, values in edits.get('edited_rows', {}).items():
+        for column, value in values.items():
+            grid.iat[int(row), grid.columns.get_loc(column)] = value
+    return grid
+
+def fold_grid_edits():
+    """Moves the editor's pending cell edits into the working grid, so bulk operations apply on top of them."""
+    st.session_state.cost_grid = with_editor_edits(st.session_state.cost_grid)
+    st.session_state.pop(GRID_EDITOR_KEY, None)
+
+def unsaved_count():
+    """Materials changed in the grid (bulk operations and cell edits) since it was loaded."""
+    if 'cost_grid' not in st.session_state:
+        return 0
+    return int(changed_rows(st.session_state.cost_grid_original, with_editor_edits(st.session_state.cost_grid)).sum())
+
+# --- DISCARDING UNSAVED CHANGES ---
+# Switching the material type or reloading the configuration rebuilds the grid. With unsaved
+# changes the action is held in grid_pending_action until the user confirms or cancels it.
+def run_grid_action(action, scope=None):
+    if action == "reload":
+        reload_config()
+    else:
+        st.session_state.grid_scope = scope
+    st.session_state.pop('cost_grid_scope', None)
+
+@session_spill.restores
+def request_scope_change():
+    if unsaved_count():
+        st.session_state.grid_pending_action = ("scope", st.session_state.grid_scope)
+        # Stay on the loaded grid until the switch is confirmed.
+        st.session_state.grid_scope = st.session_state.cost_grid_scope
+    else:
+        run_grid_action("scope", st.session_state.grid_scope)
+
+@session_spill.restores
+def request_reload():
+    if unsaved_count():
+        st.session_state.grid_pending_action = ("reload", None)
+    else:
+        run_grid_action("reload")
+
+@session_spill.restores
+def confirm_pending_action():
+    pending = st.session_state.pop('grid_pending_action', None)
+    if pending:
+        run_grid_action(*pending)
+
+@session_spill.restores
+def cancel_pending_action():
+    st.session_state.pop('grid_pending_action', None)
+
+@session_spill.restores
+def apply_bulk_operation():
+    fold_grid_edits()
+    column, operation, amount = st.session_state.bulk_column, st.session_state.bulk_operation, st.session_state.bulk_amount
+    bulk_type = st.session_state.get('bulk_type', ALL_TYPES)
+    st.session_state.cost_grid, count = bulk_update(
+        st.session_state.cost_grid, column, operation, amount,
+        material_type=None if bulk_type == ALL_TYPES else bulk_type,
+        name_contains=st.session_state.bulk_name_contains.strip()
+    )
+    st.session_state.grid_status = f"{operation} {amount:g} applied to {column} for {count} materials."
+
+# --- Initialize Config if not present ---
+metrics.start()
+if 'config' not in st.session_state:
+    st.session_state.config = load_config()
+    metrics.count_config_load("material_costs_grid")
+
+config = st.session_state.config
+
+st.header("1. Select Materials")
+type_options = [ALL_TYPES, *config['MATERIALS']]
+scope = st.selectbox("Material Type", options=type_options, key="grid_scope", on_change=request_scope_change)
+if 'cost_grid' not in st.session_state or st.session_state.get('cost_grid_scope') != scope:
+    load_grid(scope)
+pending_action = st.session_state.get('grid_pending_action')
+if pending_action:
+    action, pending_scope = pending_action
+    target = f"switching to {pending_scope}" if action == "scope" else "reloading the configuration"
+    st.warning(f"{unsaved_count()} materials have unsaved changes. Save them first, or discard them by {target}.")
+    discard_col, keep_col = st.columns(2)
+    discard_col.button("Discard Changes", on_click=confirm_pending_action, use_container_width=True)
+    keep_col.button("Keep Editing", on_click=cancel_pending_action, use_container_width=True)
+
+st.header("2. Bulk Operations")
+with st.form("bulk_operation_form"):
+    column_col, operation_col, amount_col, type_col, name_col = st.columns([3, 2, 2, 2, 3])
+    column_col.selectbox("Variable", options=VALUE_COLUMNS, key="bulk_column")
+    operation_col.selectbox("Operation", options=list(BULK_OPERATIONS), key="bulk_operation")
+    amount_col.number_input("Amount", value=0.0, format="%.4f", key="bulk_amount")
+    if scope == ALL_TYPES:
+        type_col.selectbox("Only type", options=type_options, key="bulk_type")
+    name_col.text_input("Only materials whose name contains", placeholder="e.g. vinyl", key="bulk_name_contains")
+    st.form_submit_button("Apply to Grid", on_click=apply_bulk_operation, use_container_width=True)
+if st.session_state.get('grid_status'):
+    st.success(st.session_state.pop('grid_status'))
+
+st.header("3. Edit Grid")
+edited = st.data_editor(
+    st.session_state.cost_grid,
+    key=GRID_EDITOR_KEY,
+    disabled=KEY_COLUMNS,
+    num_rows="fixed",
+    hide_index=True,
+    use_container_width=True,
+    column_config={column: st.column_config.NumberColumn(column, format="%.4f") for column in VALUE_COLUMNS},
+)
+changed_count = int(changed_rows(st.session_state.cost_grid_original, edited).sum())
+st.caption(f"{changed_count} of {len(edited)} materials changed since the grid was loaded.")
+
+problems = validate_frame(edited)
+if problems:
+    st.error(f"{len(problems)} problems must be fixed before saving.")
+    st.dataframe(pd.DataFrame({"problem": problems}), hide_index=True, use_container_width=True)
+
+st.header("4. Save and Reload")
+save_col, reload_col = st.columns(2)
+with save_col:
+    if st.button("Save Changes to Configuration File", disabled=bool(problems) or not changed_count, use_container_width=True):
+        # Apply the changed cells to a copy; it replaces the config in session state only once config.json is written
+        materials, saved_count = apply_frame(config['MATERIALS'], st.session_state.cost_grid_original, edited)
+        new_config = {**config, 'MATERIALS': materials}
+        try:
+            with metrics.time_config_write("material_costs_grid"):
+                write_config(new_config, 'config.json')
+            if shared_config.SEGMENT_PATH:
+                # Every process on this host picks the saved config up from the shared segment.
+                shared_config.publish_file('config.json')
+        except Exception as e:
+            st.error(f"Failed to save changes to config.json: {e}")
+        else:
+            st.session_state.config = new_config
+            st.session_state.grid_status = f"Successfully saved changes for {saved_count} materials! Click 'Reload Configuration' to apply them to the app."
+            st.session_state.pop('cost_grid_scope', None)
+            st.rerun()
+
+with reload_col:
+    st.button("Reload Configuration", type="primary", on_click=request_reload, use_container_width=True,
+              help="Click here after saving to make the new configuration active in the app.")
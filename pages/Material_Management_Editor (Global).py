@@ -1,9 +1,17 @@
 import streamlit as st
+import session_memory
+import session_spill
+import shared_config
+import metrics
 import json
 import os
+from material_search import MaterialSearch
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Material Management Editor")
+session_memory.track("Material Management Editor")
+session_spill.start()
+session_spill.restore(st.session_state)
 st.title("Material Management Editor")
 st.write("A global page to add or remove specific materials from an existing material type.")
 
@@ -28,9 +36,23 @@ def reload_config():
     if 'config' in st.session_state:
         del st.session_state['config']
 
+PAGE_SIZE = 25
+
+def material_search(material_type):
+    """Search index over the working copy's names for a type; dropped whenever materials are added or removed."""
+    indexes = st.session_state.setdefault('material_search', {})
+    if material_type not in indexes:
+        indexes[material_type] = MaterialSearch(sorted(st.session_state.materials_copy.get(material_type, {})))
+    return indexes[material_type]
+
+def reset_material_page():
+    st.session_state.material_page = 0
+
 # --- Initialize Config in Session State if not present ---
+metrics.start()
 if 'config' not in st.session_state:
     st.session_state.config = load_config()
+    metrics.count_config_load("material_management")
 
 # Use a working copy of the materials for UI operations
 if 'materials_copy' not in st.session_state:
@@ -42,7 +64,8 @@ st.header("1. Select Material Type")
 material_types = list(st.session_state.materials_copy.keys())
 selected_type = st.selectbox(
     "Select a material type to manage",
-    options=material_types
+    options=material_types,
+    on_change=reset_material_page
 )
 st.divider()
 
@@ -52,12 +75,18 @@ if selected_type:
     # --- UI for Removing Existing Materials ---
     st.header(f"2. Manage Materials for '{selected_type}'")
     
-    material_names = list(st.session_state.materials_copy.get(selected_type, {}).keys())
+    search = material_search(selected_type)
 
-    if not material_names:
+    if not len(search):
         st.warning(f"No specific materials found for the type '{selected_type}'.")
     else:
-        for material_name in sorted(material_names):
+        query = st.text_input("Search materials", key="material_query", on_change=reset_material_page,
+                              placeholder="e.g. 13oz matte")
+        matches = search.search(query)
+        page_count = max(1, -(-len(matches) // PAGE_SIZE))
+        page = min(st.session_state.get('material_page', 0), page_count - 1)
+        st.caption(f"{len(matches)} of {len(search)} materials — page {page + 1} of {page_count}")
+        for material_name in matches[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.text_input(
@@ -72,9 +101,20 @@ if selected_type:
                 if st.button("❌ Remove", key=f"remove_{selected_type}_{material_name}", use_container_width=True):
                     # Remove from the session state copy
                     del st.session_state.materials_copy[selected_type][material_name]
+                    st.session_state.pop('material_search', None)
                     st.success(f"'{material_name}' removed. Click 'Save Changes' to finalize.")
                     st.rerun()
 
+        prev_col, next_col = st.columns(2)
+        with prev_col:
+            if st.button("◀ Previous", disabled=page == 0, use_container_width=True):
+                st.session_state.material_page = page - 1
+                st.rerun()
+        with next_col:
+            if st.button("Next ▶", disabled=page + 1 >= page_count, use_container_width=True):
+                st.session_state.material_page = page + 1
+                st.rerun()
+
     st.divider()
 
     # --- UI for Adding a New Material ---
@@ -114,6 +154,7 @@ if selected_type:
                 }
                 # Add to the session state copy
                 st.session_state.materials_copy[selected_type][new_material_name] = default_structure
+                st.session_state.pop('material_search', None)
                 st.success(f"Successfully added '{new_material_name}'. Click 'Save Changes' to finalize.")
                 st.rerun()
 
@@ -129,8 +170,11 @@ with save_col:
         
         # Write the updated config back to the JSON file
         try:
-            with open('config.json', 'w', encoding='utf-8') as f:
+            with metrics.time_config_write("material_management"), open('config.json', 'w', encoding='utf-8') as f:
                 json.dump(st.session_state.config, f, indent=2)
+            if shared_config.SEGMENT_PATH:
+                # Every process on this host picks the saved config up from the shared segment.
+                shared_config.publish_file('config.json')
             st.success("Successfully saved material changes to 'config.json'!")
             st.info("Click 'Reload Configuration' to apply changes across the app.")
         except Exception as e:
@@ -141,5 +185,6 @@ with reload_col:
         # Clear the working copy and the main config to force a full reload
         if 'materials_copy' in st.session_state:
             del st.session_state['materials_copy']
+        st.session_state.pop('material_search', None)
         reload_config()
         st.rerun()
\ No newline at end of file
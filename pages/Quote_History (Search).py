@@ -0,0 +1,77 @@
+import streamlit as st
+import session_memory
+import session_spill
+import pandas as pd
+import time
+from quote_store import QuoteStore
+
+# --- Page Configuration ---
+st.set_page_config(layout="wide", page_title="Quote History")
+session_memory.track("Quote History")
+session_spill.start()
+session_spill.restore(st.session_state)
+st.title("Quote History")
+st.write("Search saved quotes by customer, material, finishing, size or notes, and reopen any of them in the calculator.")
+
+PAGE_SIZE = 20
+
+@st.cache_resource
+def get_quote_store():
+    return QuoteStore()
+
+def reset_page():
+    st.session_state.history_page = 0
+
+@session_spill.restores
+def open_in_calculator(quote_id):
+    """Loads a saved quote into the calculator's session state as an editable quote."""
+    quote = get_quote_store().load_quote(quote_id)
+    if quote is None:
+        st.session_state.history_status = "That quote no longer exists."
+        return
+    st.session_state.entries = quote['entries']
+    st.session_state.quote_id = quote['id']
+    st.session_state.quote_customer = quote['customer']
+    st.session_state.quote_notes = quote['notes']
+    if quote['config_version'] != st.session_state.get('config_version', quote['config_version']):
+        st.session_state.quote_status = f"Loaded quote was priced against config {quote['config_version']}; prices shown use the current config."
+    else:
+        st.session_state.quote_status = f"Loaded quote with {len(quote['entries'])} line items."
+    st.session_state.open_calculator = True
+
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
+
+if st.session_state.pop('open_calculator', False):
+    st.switch_page("Calculator.py")
+
+query = st.text_input("Search", placeholder="e.g. 4x8 double sided mesh stadium", key="history_query", on_change=reset_page)
+
+if query:
+    start = time.perf_counter()
+    results, total = get_quote_store().search_quotes(query, page=st.session_state.history_page, page_size=PAGE_SIZE)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    page_count = max(1, -(-total // PAGE_SIZE))
+    st.caption(f"{total} matching quotes ({elapsed_ms:.1f} ms) — page {st.session_state.history_page + 1} of {page_count}")
+
+    for result in results:
+        with st.container(border=True):
+            info_col, open_col = st.columns([5, 1])
+            with info_col:
+                st.markdown(f"**{result['customer'] or 'No customer'}** — {pd.Timestamp(result['updated_at'], unit='s'):%Y-%m-%d %H:%M} ({result['line_count']} items)")
+                st.caption(", ".join(result['materials']))
+            with open_col:
+                st.button("Open", key=f"open_{result['id']}", on_click=open_in_calculator, args=(result['id'],), use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button("◀ Previous", disabled=st.session_state.history_page == 0, use_container_width=True):
+            st.session_state.history_page -= 1
+            st.rerun()
+    with next_col:
+        if st.button("Next ▶", disabled=st.session_state.history_page + 1 >= page_count, use_container_width=True):
+            st.session_state.history_page += 1
+            st.rerun()
+
+if st.session_state.get('history_status'):
+    st.warning(st.session_state.pop('history_status'))
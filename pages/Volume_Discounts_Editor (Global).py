@@ -1,9 +1,19 @@
 import streamlit as st
+import session_memory
+import session_spill
+import shared_config
+import metrics
 import json
 import os
+import pandas as pd
+from quote_store import QuoteStore
+from repricing import INLINE_QUOTE_LIMIT, reprice_corpus, summarize_impact
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Volume Discounts Editor (Global)")
+session_memory.track("Volume Discounts Editor")
+session_spill.start()
+session_spill.restore(st.session_state)
 st.title("Volume Discount Tiers (Global)")
 
 # --- CONFIGURATION LOADER (Consistent with other admin panels) ---
@@ -29,9 +39,15 @@ def reload_config():
     if 'volume_tiers' in st.session_state:
         del st.session_state['volume_tiers']
 
+@st.cache_resource
+def get_quote_store():
+    return QuoteStore()
+
 # --- Initialize Config and Tiers in Session State if not present ---
+metrics.start()
 if 'config' not in st.session_state:
     st.session_state.config = load_config()
+    metrics.count_config_load("volume_discounts")
 
 if 'volume_tiers' not in st.session_state:
     # We work on a copy in session state to handle adds/removes before saving
@@ -131,8 +147,34 @@ with st.form("new_tier_form", clear_on_submit=True):
             st.rerun()
 st.divider()
 
+# --- Impact Preview on Saved Quotes ---
+st.header("3. Preview Impact on Saved Quotes")
+st.write("Reprices every saved quote under the tiers on disk and the tiers above, before anything is saved.")
+if st.button("Run Impact Analysis", use_container_width=True):
+    current_config = load_config()
+    proposed_config = {**current_config, 'VOLUME_DISCOUNT_TIERS': dict(st.session_state.volume_tiers)}
+    store = get_quote_store()
+    quote_count = store.count_quotes()
+    if quote_count == 0:
+        st.info("There are no saved quotes to analyse.")
+    else:
+        progress = st.progress(0.0, text=f"Repricing {quote_count} quotes...")
+        impact_rows = []
+        for chunk_rows in reprice_corpus(store.iter_quotes(), current_config, proposed_config,
+                                         workers=None if quote_count > INLINE_QUOTE_LIMIT else 0):
+            impact_rows.extend(chunk_rows)
+            progress.progress(len(impact_rows) / quote_count, text=f"Repriced {len(impact_rows)} of {quote_count} quotes")
+        progress.empty()
+        st.subheader("Aggregate Impact by Customer Type")
+        st.dataframe(pd.DataFrame(summarize_impact(impact_rows)), hide_index=True, use_container_width=True)
+        st.subheader("Per-Quote Impact")
+        impact_df = pd.DataFrame(impact_rows)
+        impact_df['updated_at'] = pd.to_datetime(impact_df['updated_at'], unit='s')
+        st.dataframe(impact_df.drop(columns=['id']).sort_values('Preferred delta', key=abs, ascending=False), hide_index=True, use_container_width=True)
+st.divider()
+
 # --- Save and Reload Logic ---
-st.header("3. Save and Reload")
+st.header("4. Save and Reload")
 save_col, reload_col = st.columns(2)
 with save_col:
     if st.button("Save Changes to Configuration File", use_container_width=True):
@@ -141,8 +183,11 @@ with save_col:
         
         # Write the updated config back to the JSON file
         try:
-            with open('config.json', 'w', encoding='utf-8') as f:
+            with metrics.time_config_write("volume_discounts"), open('config.json', 'w', encoding='utf-8') as f:
                 json.dump(st.session_state.config, f, indent=2)
+            if shared_config.SEGMENT_PATH:
+                # Every process on this host picks the saved config up from the shared segment.
+                shared_config.publish_file('config.json')
             st.success("Successfully saved changes to 'config.json'!")
             st.info("Click 'Reload Configuration' to apply changes across the app.")
         except Exception as e:
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from itertools import islice, product
+import numpy as np
+from pricing import (
+    CompiledConfig, PRICE_CUSTOMER_TYPES, calculate_all_prices_for_entry, entry_sqft_per_piece, get_suggested_sides_tier,
+    price_entry
+)
+
+DEFAULT_SIZES = "1x1,1x2,2x2,2x3,2x4,2x6,3x3,3x4,3x6,3x8,4x4,4x6,4x8,4x10,5x10,6x12"
+DEFAULT_QUANTITIES = "1,2,5,10,25,50,100"
+MANIFEST_NAME = "manifest.json"
+# Bumped when the files a price book is made of change; older books must be regenerated.
+BOOK_LAYOUT = 3
+# Rows the lookup index writer holds in memory before spilling a sorted run to disk, and
+# rows read from each run per step when the runs are merged.
+INDEX_RUN_ROWS = 1 << 20
+INDEX_MERGE_BLOCK = 1 << 16
+# Per row: the multiplier term, then each customer type's fixed and discounted terms (see price_terms).
+INDEX_ARRAYS = {"keys": (np.uint64, ()), "terms": (np.float64, (1 + 2 * len(PRICE_CUSTOMER_TYPES),))}
+
+COLUMNS = [
+    "material_type", "material", "width_in", "height_in", "qty", "sidedness",
+    "sqft_per_piece", "discount_tier", "multiples_value",
+    "preferred", "corporate", "wholesale",
+]
+
+_compiled = None
+
+
+def parse_sizes(spec):
+    """Parses 'WxH' sizes in feet (decimals allowed) into (width_in, height_in) tuples."""
+    sizes = []
+    for item in spec.split(','):
+        width_ft, height_ft = item.lower().strip().split('x')
+        sizes.append((round(float(width_ft) * 12), round(float(height_ft) * 12)))
+    return sizes
+
+
+def standard_entry(material_type, material, width_in, height_in, qty, sidedness):
+    """A price-book line item: no finishing, no cut, and the default time/install/adjustment options."""
+    return {
+        "type": material_type, "material": material,
+        "w_ft": width_in // 12, "w_in": width_in % 12,
+        "h_ft": height_in // 12, "h_in": height_in % 12,
+        "qty": qty, "sidedness": sidedness,
+        "banner_mesh_selection": "None",
+    }
+
+
+def file_stem(material_type):
+    """File name stem for a material type's files: a safe slug plus a hash, so any type name works."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", material_type).strip("_")[:40] or "type"
+    return f"{slug}-{hashlib.blake2b(material_type.encode('utf-8'), digest_size=4).hexdigest()}"
+
+
+def lookup_key(material_type, material, width_in, height_in, qty, sidedness):
+    """64-bit key of a price-book row; the lookup index is sorted on it."""
+    raw = "\x1f".join(map(str, (material_type, material, width_in, height_in, qty, sidedness)))
+    return int.from_bytes(hashlib.blake2b(raw.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def is_standard_entry(entry, compiled):
+    """True when an entry uses only the options a price-book row is priced with."""
+    return (
+        entry.get('banner_mesh_selection') not in compiled.banner_mesh_finishing
+        and not compiled.specialty_finishing.get(entry.get('finishing_type'))
+        and not compiled.cut_cost_map.get(entry.get('cut_cost_selection'), 0)
+        and entry.get('additional_time_selection') in (compiled.additional_time_options[:1] or [None])
+        and entry.get('added_install_selection') in (compiled.added_install_options[:1] or [None])
+        and entry.get('print_adjustment') in (compiled.print_adjustment_options[:1] or [None])
+        and entry.get('sides_tier_selection') == get_suggested_sides_tier(
+            entry_sqft_per_piece(entry), entry.get('sidedness'), compiled.tier_descriptions)
+    )
+
+
+def _init_worker(config):
+    global _compiled
+    _compiled = CompiledConfig(config)
+
+
+def price_terms(entry, compiled, result):
+    """
+    A standard entry's price for a customer type is fixed - discounted * discount + per_multiple
+    / multiples_value, whatever order it is in. Returns [per_multiple, then fixed and discounted
+    per customer type], recovered by repricing result's inputs at a few discounts and multipliers.
+    """
+    material_prices = compiled.material_prices.get((entry['type'], entry['material']), {})
+
+    def prices(discount, multiples_value):
+        return calculate_all_prices_for_entry(
+            result['calculation_data'], material_prices, [discount] * len(PRICE_CUSTOMER_TYPES),
+            result['adjustment_percentage'], multiples_value, result['prodcuts_an'], compiled.cons_bx_4, compiled.cons_bx_6)
+
+    undiscounted, discounted, doubled = prices(0, 1), prices(1, 1), prices(0, 2)
+    per_multiple = 2 * (undiscounted['Preferred'] - doubled['Preferred'])
+    terms = [per_multiple]
+    for cust_type in PRICE_CUSTOMER_TYPES:
+        terms += [undiscounted[cust_type] - per_multiple, undiscounted[cust_type] - discounted[cust_type]]
+    return terms
+
+
+def price_rows(rows):
+    """
+    Prices (material_type, material, width_in, height_in, qty, sidedness) tuples. Returns the
+    price sheet rows, each priced as a single-line order, and the rows' price terms for the
+    lookup index, which let any order context be applied to them at lookup.
+    """
+    priced, terms = [], []
+    for material_type, material, width_in, height_in, qty, sidedness in rows:
+        entry = standard_entry(material_type, material, width_in, height_in, qty, sidedness)
+        sqft_per_piece = (width_in * height_in) / 144
+        _, multiples_value = _compiled.get_multiplier(1)
+        result = price_entry(entry, _compiled, sqft_per_piece * qty, multiples_value)
+        priced.append((
+            material_type, material, width_in, height_in, qty, sidedness,
+            round(sqft_per_piece, 4), result['discount_tier'], multiples_value,
+            *(round(result['prices'][cust_type], 4) for cust_type in PRICE_CUSTOMER_TYPES),
+        ))
+        terms.append(price_terms(entry, _compiled, result))
+    return priced, terms
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._writer = None
+        self._path = path
+        self._pq = pq
+
+    def write(self, rows):
+        table = self._pa.Table.from_pylist([dict(zip(COLUMNS, row)) for row in rows])
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink}
+
+
+class LookupIndexWriter:
+    """
+    Builds the memory-mappable lookup index of one material type: sorted row keys in
+    <stem>.keys.npy, and each row's price terms (see price_terms) in <stem>.terms.npy, in
+    the same order.
+    At most run_rows rows are held in memory; beyond that, rows are spilled to disk as
+    sorted runs that close() merges into the index a block at a time.
+    """
+
+    def __init__(self, output_dir, stem, run_rows=INDEX_RUN_ROWS):
+        self._stem = stem
+        self._prefix = os.path.join(output_dir, stem)
+        self._run_rows = run_rows
+        self._buffer, self._buffered = [], 0
+        self._runs = []
+
+    def write(self, rows, terms):
+        keys = np.fromiter((lookup_key(*row[:6]) for row in rows), dtype=np.uint64, count=len(rows))
+        terms = np.array(terms, dtype=np.float64).reshape(-1, *INDEX_ARRAYS["terms"][1])
+        self._buffer.append({"keys": keys, "terms": terms})
+        self._buffered += len(rows)
+        if self._buffered >= self._run_rows:
+            self._spill()
+
+    def _sorted_buffer(self):
+        arrays = {
+            name: np.concatenate([part[name] for part in self._buffer]) if self._buffer else np.empty((0, *shape), dtype)
+            for name, (dtype, shape) in INDEX_ARRAYS.items()
+        }
+        order = np.argsort(arrays["keys"], kind='stable')
+        self._buffer, self._buffered = [], 0
+        return {name: array[order] for name, array in arrays.items()}
+
+    def _spill(self):
+        run = f"{self._prefix}.run{len(self._runs)}"
+        for name, array in self._sorted_buffer().items():
+            np.save(f"{run}.{name}.npy", array)
+        self._runs.append(run)
+
+    def _merge_runs(self, outputs):
+        runs = [{name: np.load(f"{run}.{name}.npy", mmap_mode='r') for name in INDEX_ARRAYS} for run in self._runs]
+        positions = [0] * len(runs)
+        written = 0
+        while written < len(outputs["keys"]):
+            live = [i for i, run in enumerate(runs) if positions[i] < len(run["keys"])]
+            # Every row up to the smallest last key of the runs' next blocks can be placed now.
+            bound = min(runs[i]["keys"][min(positions[i] + INDEX_MERGE_BLOCK, len(runs[i]["keys"])) - 1] for i in live)
+            spans = []
+            for i in live:
+                block = runs[i]["keys"][positions[i]:positions[i] + INDEX_MERGE_BLOCK]
+                spans.append((i, positions[i], positions[i] + int(np.searchsorted(block, bound, side='right'))))
+            order = np.argsort(np.concatenate([runs[i]["keys"][start:end] for i, start, end in spans]), kind='stable')
+            for name in INDEX_ARRAYS:
+                merged = np.concatenate([runs[i][name][start:end] for i, start, end in spans])[order]
+                outputs[name][written:written + len(order)] = merged
+            for i, _, end in spans:
+                positions[i] = end
+            written += len(order)
+
+    def close(self):
+        """Sorts and writes the index, returning the manifest fields that describe it."""
+        if self._runs and self._buffer:
+            self._spill()
+        if self._runs:
+            total = sum(len(np.load(f"{run}.keys.npy", mmap_mode='r')) for run in self._runs)
+            outputs = {
+                name: np.lib.format.open_memmap(f"{self._prefix}.{name}.npy.partial", mode='w+', dtype=dtype, shape=(total, *shape))
+                for name, (dtype, shape) in INDEX_ARRAYS.items()
+            }
+            self._merge_runs(outputs)
+            for output in outputs.values():
+                output.flush()
+            del outputs
+        else:
+            for name, array in self._sorted_buffer().items():
+                with open(f"{self._prefix}.{name}.npy.partial", 'wb') as f:
+                    np.save(f, array)
+        for name in INDEX_ARRAYS:
+            os.replace(f"{self._prefix}.{name}.npy.partial", f"{self._prefix}.{name}.npy")
+        for run in self._runs:
+            for name in INDEX_ARRAYS:
+                os.remove(f"{run}.{name}.npy")
+        return {"lookup": True, "index": self._stem}
+
+
+class PriceBookLookup:
+    """
+    Serves standard line items from a generated price book's memory-mapped lookup index.
+    Only the pages of the index that are actually searched get read from disk.
+    """
+
+    def __init__(self, output_dir):
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.output_dir = output_dir
+        self.config_version = manifest['params']['config_version']
+        # A book of an older layout serves nothing until it is regenerated.
+        self._types = manifest['completed'] if manifest['params'].get('layout') == BOOK_LAYOUT else {}
+        self._tables = {}
+
+    def _table(self, material_type):
+        if material_type not in self._tables:
+            info = self._types.get(material_type, {})
+            if info.get('lookup'):
+                prefix = os.path.join(self.output_dir, info['index'])
+                self._tables[material_type] = (
+                    np.load(f"{prefix}.keys.npy", mmap_mode='r'),
+                    np.load(f"{prefix}.terms.npy", mmap_mode='r'),
+                )
+            else:
+                self._tables[material_type] = None
+        return self._tables[material_type]
+
+    def lookup(self, entry, compiled, discount_tier, multiples_value):
+        """
+        Returns the three customer-type prices for a standard entry in an order with the given
+        discount tier and multiplier, or None when the entry is not in the book.
+        """
+        discounts = compiled.discount_tier_options.get(discount_tier)
+        if discounts is None or not multiples_value or compiled.version != self.config_version or not is_standard_entry(entry, compiled):
+            return None
+        table = self._table(entry.get('type'))
+        if table is None:
+            return None
+        keys, terms = table
+        key = lookup_key(
+            entry.get('type'), entry.get('material'),
+            entry.get('w_ft', 0) * 12 + entry.get('w_in', 0), entry.get('h_ft', 0) * 12 + entry.get('h_in', 0),
+            entry.get('qty', 1), entry.get('sidedness')
+        )
+        index = int(np.searchsorted(keys, np.uint64(key)))
+        if index >= len(keys) or int(keys[index]) != key:
+            return None
+        per_multiple, *fixed_discounted = terms[index].tolist()
+        return {
+            cust_type: fixed - discounted * discount + per_multiple / multiples_value
+            for cust_type, fixed, discounted, discount in zip(
+                PRICE_CUSTOMER_TYPES, fixed_discounted[::2], fixed_discounted[1::2], discounts)
+        }
+
+
+def load_manifest(output_dir, run_params, force):
+    """Returns the manifest to resume from, or a fresh one if nothing matching was started."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path) and not force:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('params') == run_params:
+            return manifest
+        sys.exit(f"{path} was written for a different config, grid or price book layout; rerun with --force to start over.")
+    return {"params": run_params, "completed": {}}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def generate_price_book(config, output_dir, sizes, quantities, sidedness_options, fmt="csv",
+                        material_types=None, workers=None, chunk_size=2000, force=False):
+    """
+    Streams every material x size x quantity x sidedness combination through the pricing
+    engine on a process pool and writes one file per material type, plus the lookup index
+    the calculator memory-maps. Types finish atomically and are recorded in the manifest,
+    so an interrupted run resumes at the next type.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    compiled = CompiledConfig(config)
+    run_params = {
+        "layout": BOOK_LAYOUT, "config_version": compiled.version, "format": fmt,
+        "sizes": [list(size) for size in sizes], "quantities": quantities, "sidedness": sidedness_options,
+    }
+    manifest = load_manifest(output_dir, run_params, force)
+    material_types = material_types or list(compiled.materials.keys())
+
+    context = multiprocessing.get_context('spawn')
+    total_rows, started = 0, time.perf_counter()
+    with context.Pool(processes=workers, initializer=_init_worker, initargs=(config,)) as pool:
+        for material_type in material_types:
+            if material_type in manifest['completed']:
+                print(f"{material_type}: already complete, skipping", file=sys.stderr)
+                continue
+            materials = list(compiled.materials.get(material_type, {}).keys())
+            grid = (
+                (material_type, material, width_in, height_in, qty, sidedness)
+                for material, (width_in, height_in), qty, sidedness in product(materials, sizes, quantities, sidedness_options)
+            )
+            # Files are named by a sanitized stem recorded in the manifest, never by the raw type name.
+            stem = file_stem(material_type)
+            file_path = os.path.join(output_dir, f"{stem}.{fmt}")
+            sink = SINKS[fmt](file_path + '.partial')
+            index_writer = LookupIndexWriter(output_dir, stem)
+            type_rows, type_started = 0, time.perf_counter()
+            last_report = type_started
+            try:
+                for priced, terms in pool.imap(price_rows, _chunks(grid, chunk_size)):
+                    sink.write(priced)
+                    index_writer.write(priced, terms)
+                    type_rows += len(priced)
+                    if time.perf_counter() - last_report >= 5:
+                        last_report = time.perf_counter()
+                        print(f"{material_type}: {type_rows} rows ({type_rows / (last_report - type_started):,.0f} rows/s)", file=sys.stderr)
+            finally:
+                sink.close()
+            os.replace(file_path + '.partial', file_path)
+            manifest['completed'][material_type] = {
+                "file": os.path.basename(file_path), "rows": type_rows, **index_writer.close()
+            }
+            save_manifest(output_dir, manifest)
+            total_rows += type_rows
+            elapsed = time.perf_counter() - type_started
+            print(f"{material_type}: {type_rows} rows in {elapsed:.2f}s ({type_rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"Total: {total_rows} rows in {elapsed:.2f}s ({total_rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate standard price sheets for every material, size, quantity and sidedness")
+    parser.add_argument(
+        "-i", "--input", default="config.json",
+        help="Path to your config.json")
+    parser.add_argument(
+        "-o", "--output-dir", default="price_book",
+        help="Directory for the per-material-type files and the resume manifest")
+    parser.add_argument(
+        "-f", "--format", choices=sorted(SINKS), default="csv",
+        help="Output file format")
+    parser.add_argument(
+        "--sizes", default=DEFAULT_SIZES,
+        help="Comma-separated WxH sizes in feet")
+    parser.add_argument(
+        "--quantities", default=DEFAULT_QUANTITIES,
+        help="Comma-separated quantity breaks")
+    parser.add_argument(
+        "--sidedness",
+        help="Comma-separated sidedness options; defaults to all options in the config")
+    parser.add_argument(
+        "--types",
+        help="Comma-separated material types to generate; defaults to all")
+    parser.add_argument(
+        "-j", "--workers", type=int,
+        help="Worker processes; defaults to the number of CPUs")
+    parser.add_argument(
+        "--chunk-size", type=int, default=2000,
+        help="Rows priced per worker task")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Ignore an existing manifest and regenerate every material type")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    generate_price_book(
+        config, args.output_dir,
+        sizes=parse_sizes(args.sizes),
+        quantities=[int(q) for q in args.quantities.split(',')],
+        sidedness_options=args.sidedness.split(',') if args.sidedness else config.get('SIDEDNESS_OPTIONS', []),
+        fmt=args.format,
+        material_types=args.types.split(',') if args.types else None,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        force=args.force,
+    )
+
+if __name__ == "__main__":
+    main()
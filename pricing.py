@@ -0,0 +1,530 @@
+import json
+import hashlib
+import math
+from collections import Counter, OrderedDict
+
+# Pure pricing engine shared by the calculator, the admin pages and the command-line tools.
+# Nothing in here may import streamlit: worker processes and the API server use it headless.
+
+PLACEHOLDER = "-- SELECT --"
+PRICE_CUSTOMER_TYPES = ('Preferred', 'Corporate', 'Wholesale')
+
+
+def config_version(config):
+    """Returns a short, stable hash identifying the pricing configuration."""
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+# --- DYNAMIC COST CALCULATION (Original) ---
+def calculate_additional_costs(cost_config):
+    bx4_vars = cost_config.get("cons_bx_4", {})
+    bx4_v1 = bx4_vars.get("variable_1", 0)
+    bx4_v2 = bx4_vars.get("variable_2", 1)
+    bx4_v3 = bx4_vars.get("variable_3", 0)
+    calculated_bx4 = (bx4_v1 / bx4_v2) * bx4_v3 if bx4_v2 != 0 else 0
+
+    bx6_vars = cost_config.get("cons_bx_6", {})
+    bx6_v1 = bx6_vars.get("variable_1", 0)
+    bx6_v2 = bx6_vars.get("variable_2", 1)
+    bx6_v3 = bx6_vars.get("variable_3", 0)
+    calculated_bx6 = (bx6_v1 / bx6_v2) * bx6_v3 if bx6_v2 != 0 else 0
+
+    default_prodcuts_an = cost_config.get("prodcuts_an", 16.21)
+    return calculated_bx4, calculated_bx6, default_prodcuts_an
+
+# --- NEW: DYNAMIC PRODCUTS_AN CALCULATION ---
+def calculate_dynamic_prodcuts_an(vars, Q_Quantity):
+    if not vars or Q_Quantity == 0:
+        return 0, 0
+    AW_Roll_Costs = vars.get("AW_Roll_Costs", 0)
+    AU_Material_Length = vars.get("AU_Material_Length", 1)
+    AV_Material_Width = vars.get("AV_Material_Width", 1)
+    AQ_SQ = vars.get("AQ_SQ", 0)
+    AS_Laminate_Loading = vars.get("AS_Laminate_Loading", 0)
+    AT_Labour = vars.get("AT_Labour", 0)
+    constant_BY8 = vars.get("constant_BY8", 0)
+    Per_hour_rate = vars.get("Per_hour_rate", 0)
+    denominator_ax = (AU_Material_Length * AV_Material_Width) / 144
+    AX_Sq_material = AW_Roll_Costs / denominator_ax if denominator_ax != 0 else 0
+    form_response_bx8 = (constant_BY8 / 60) * Per_hour_rate
+    AO = (AX_Sq_material * AQ_SQ) + AS_Laminate_Loading + AT_Labour
+    AN = AO + (form_response_bx8 / Q_Quantity) + AS_Laminate_Loading
+    return AO, AN
+
+# --- Helper functions ---
+def excel_floor(number, significance):
+    if significance == 0: return 0
+    return math.floor(number / significance) * significance
+
+def excel_ceiling(number, significance):
+    if significance == 0: return 0
+    return math.ceil(number / significance) * significance
+
+def calculate_material_price(material_data, fall_back_value=0.25):
+    results = {'preferred_base': 0, 'preferred_value': 0, 'corporate_base': 0, 'corporate_value': 0, 'wholesale_base': 0, 'wholesale_value': 0}
+    try:
+        p_vars = material_data['Preferred']
+        p_base = excel_floor(p_vars.get('preferred_historical_price', 0) * p_vars.get('preferred_fine_tune_modifier', 0), fall_back_value)
+        results['preferred_base'] = p_base
+        results['preferred_value'] = p_base * (1 - p_vars.get('preferred_discount_value', 0))
+
+        c_vars = material_data['Corporate']
+        c_base = excel_ceiling(p_base * c_vars.get('corporate_historical_price', 0), fall_back_value)
+        results['corporate_base'] = c_base
+        results['corporate_value'] = c_base * (1 - c_vars.get('corporate_discount_value', 0))
+
+        w_vars = material_data['Wholesale']
+        w_base = excel_ceiling(p_base * w_vars.get('wholesale_historical_price', 0), fall_back_value)
+        results['wholesale_base'] = w_base
+        results['wholesale_value'] = w_base * (1 - w_vars.get('wholesale_discount_value', 0))
+    except (KeyError, TypeError): pass
+    return results
+
+def get_discount_tier_details(total_sqft, all_tiers):
+    best_tier_desc = "N/A"
+    for min_sqft, (description, _) in sorted(all_tiers.items()):
+        if total_sqft >= min_sqft:
+            best_tier_desc = description
+    return best_tier_desc
+
+def get_multiplier(num_entries, multiples_map):
+    for min_entries, value in sorted(multiples_map.items(), reverse=True):
+        if num_entries >= min_entries:
+            return f"{min_entries}+ entries" if min_entries != 1 else "1 entry", value
+    return "N/A", 1
+
+def get_suggested_sides_tier(sqft, sidedness, tier_descriptions):
+    if sidedness == "No Print": return "NO PRINT"
+    if sidedness == "Single Sided":
+        if sqft >= 1.0: return "STANDARD OVER 1sq'"
+        if sqft >= 0.5: return "SMALL Between 1sq' - 0.5sq'"
+        if sqft >= 0.25: return "SMALL BETWEEN 0.5 - .25 sq' /peice"
+        return "SMALLEST UNDER 0.05 sq' /peice"
+    if sidedness == "Double Sided":
+        if sqft >= 1.0: return "DOUBLE SIDED Over 1 SQ'"
+        if sqft >= 0.5: return "DOUBLE SIDED between 1sq' - 0.5sq' per peice"
+        if sqft >= 0.25: return "DOUBLE SIDED under 0.5 - .25 sq' /peice"
+        return "DOUBLE SIDED under 0.05 sq' /peice"
+    return tier_descriptions[0] if tier_descriptions else "N/A"
+
+def get_banner_mesh_details(sqft, option_details):
+    if not option_details: return "N/A", 0.0
+    # This function expects the tiered list directly
+    tier_list = option_details
+    for min_sqft, price, desc_prefix in tier_list:
+        if sqft >= min_sqft:
+            return f"{desc_prefix}", price
+    return "N/A", 0.0
+
+
+# --- NEW CALCULATION LOGIC ---
+def calculate_entry_total(calc_data, customer_type, selected_percentage, adjustment_percentage, multiples_value, prodcuts_an, cons_bx_4, cons_bx_6):
+    """Calculates the total for a single line item based on the customer type."""
+    multiples_value_for_entry = multiples_value
+    entry_total = 0
+    entry_quantity = calc_data.get('qty', 0)
+    if entry_quantity == 0:
+        return 0
+    # Part A
+    part_a_base = calc_data['active_base_amount'] * calc_data['sqft_per_piece'] * calc_data['sides_cost_per_unit']
+    part_a_discounted = part_a_base * (1 - (selected_percentage + adjustment_percentage))
+
+    # Part B
+    part_b_original = calc_data['cut_cost_per_unit'] * calc_data['sqft_per_piece']
+    part_b = part_b_original + part_a_discounted
+
+    # Part C
+    part_c_numerator = (calc_data['finishing_price_per_unit'] * calc_data['sqft_per_piece'] * entry_quantity) + (prodcuts_an / multiples_value_for_entry)
+    part_c = part_c_numerator / entry_quantity
+
+    # Part D
+    part_d = 0
+    if calc_data['cut_cost_per_unit'] > 0.0:
+        if customer_type == 'Preferred':
+            part_d = (cons_bx_4 / multiples_value_for_entry) / entry_quantity
+        elif customer_type in ['Corporate', 'Wholesale']:
+            part_d = (cons_bx_4 / (multiples_value_for_entry + 0.5)) / entry_quantity
+
+    # Part E
+    part_e = 0
+    if calc_data['finishing_price_per_unit'] > 0:
+        if customer_type == 'Preferred':
+            part_e = (cons_bx_6 / multiples_value_for_entry) / entry_quantity
+        elif customer_type in ['Corporate', 'Wholesale']:
+            part_e = (cons_bx_6 / (multiples_value_for_entry + 0.5)) / entry_quantity
+
+    # Part F
+    part_f = (calc_data['additional_time_cost_per_unit'] / entry_quantity) + calc_data['added_install_cost_per_unit']
+
+    price_per_single_piece = part_b + part_c + part_d + part_e + part_f
+    entry_total = (price_per_single_piece) * 1.1
+    return entry_total
+
+
+def calculate_all_prices_for_entry(calculation_data, all_material_prices, all_discount_percentages, adjustment_percentage, multiples_value, prodcuts_an_for_entry, cons_bx_4, cons_bx_6):
+    all_prices = {}
+
+    customer_types_map = {
+        'Preferred': {'base': all_material_prices.get('preferred_base', 0), 'value': all_material_prices.get('preferred_value', 0), 'discount': all_discount_percentages[0]},
+        'Corporate': {'base': all_material_prices.get('corporate_base', 0), 'value': all_material_prices.get('corporate_value', 0), 'discount': all_discount_percentages[1]},
+        'Wholesale': {'base': all_material_prices.get('wholesale_base', 0), 'value': all_material_prices.get('wholesale_value', 0), 'discount': all_discount_percentages[2]}
+    }
+
+    for cust_type, data in customer_types_map.items():
+        # Assemble the specific calc_data for this customer type
+        specific_calc_data = calculation_data.copy()
+        specific_calc_data['active_base_amount'] = data['base']
+        specific_calc_data['base_price_per_sqft'] = data['value']
+
+        all_prices[cust_type] = calculate_entry_total(
+            specific_calc_data,
+            cust_type,
+            data['discount'],
+            adjustment_percentage,
+            multiples_value,
+            prodcuts_an_for_entry,
+            cons_bx_4,
+            cons_bx_6
+        )
+    return all_prices
+
+
+# --- HEADLESS ENTRY PRICING ---
+class CompiledConfig:
+    """
+    The loaded config unpacked the same way Calculator.py unpacks it, plus lookups that
+    would otherwise be rebuilt for every entry (material prices, sorted discount tiers).
+    Build one per config version and reuse it for every entry and order priced against it.
+    `material_prices` may be passed in precomputed (shared_config.py maps them from a
+    shared segment) instead of being derived from the materials.
+    """
+
+    def __init__(self, config, version=None, material_prices=None):
+        self.config = config
+        self.version = version or config_version(config)
+        self.materials = config.get('MATERIALS', {})
+        self.sides_tiers_map = config.get('SIDES_TIERS_MAP', {})
+        self.sidedness_options = config.get('SIDEDNESS_OPTIONS', [])
+        self.specialty_finishing = config.get('SPECIALTY_FINISHING', {})
+        self.banner_mesh_finishing = config.get('BANNER_MESH_FINISHING', {})
+        self.volume_discount_tiers = {int(k): v for k, v in config.get('VOLUME_DISCOUNT_TIERS', {}).items()}
+        self.print_adjustment_fixed = config.get('PRINT_ADJUSTMENT_FIXED', {})
+        self.multiples_map = {int(k): v for k, v in config.get('MULTIPLES_MAP', {}).items()}
+        self.fall_back_value = config.get('FALL_BACK_VALUE', 0.25)
+        self.cut_cost_map = config.get('CUT_COST_MAP', {})
+        self.additional_time_map = config.get('ADDITIONAL_TIME_MAP', {})
+        self.added_install_map = config.get('ADDED_INSTALL_MAP', {})
+        self.cons_bx_4, self.cons_bx_6, self.default_prodcuts_an = calculate_additional_costs(config.get('ADDITIONAL_COSTS', {}))
+
+        self.tier_descriptions = list(self.sides_tiers_map.keys())
+        self.additional_time_options = list(self.additional_time_map.keys())
+        self.added_install_options = list(self.added_install_map.keys())
+        self.print_adjustment_options = list(self.print_adjustment_fixed.keys())
+        self.discount_tier_options = {desc: discounts for _, (desc, discounts) in sorted(self.volume_discount_tiers.items())}
+        if material_prices is None:
+            material_prices = {
+                (material_type, name): calculate_material_price(data, self.fall_back_value)
+                for material_type, materials in self.materials.items()
+                for name, data in materials.items()
+            }
+        self.material_prices = material_prices
+
+    def get_multiplier(self, num_entries):
+        return get_multiplier(num_entries, self.multiples_map)
+
+
+def entry_sqft_per_piece(entry):
+    total_width_inches = (entry.get('w_ft', 0) * 12) + entry.get('w_in', 0)
+    total_height_inches = (entry.get('h_ft', 0) * 12) + entry.get('h_in', 0)
+    return (total_width_inches * total_height_inches) / 144
+
+
+def order_total_sqft(entries):
+    """Same total the calculator keeps in st.session_state.total_sqft_order."""
+    return sum(entry_sqft_per_piece(e) * e.get('qty', 1) for e in entries)
+
+
+def price_entry(entry, compiled, total_sqft_order, multiples_value):
+    """
+    Prices one entry exactly as render_expanded_layout does, resolving each selection the
+    way its widget would (stored choice if still valid, otherwise the widget's default).
+    Returns the three customer-type prices along with the resolved inputs behind them.
+    """
+    qty = entry.get('qty', 1)
+    sqft_per_piece = entry_sqft_per_piece(entry)
+
+    material_data = compiled.materials.get(entry.get('type'), {}).get(entry.get('material'), {}) if entry.get('material') else {}
+    all_material_prices = compiled.material_prices.get((entry.get('type'), entry.get('material')), {}) if material_data else {}
+
+    sidedness = entry.get('sidedness', compiled.sidedness_options[0] if compiled.sidedness_options else None)
+    sides_tier = entry.get('sides_tier_selection')
+    if sides_tier not in compiled.sides_tiers_map:
+        sides_tier = get_suggested_sides_tier(sqft_per_piece, sidedness, compiled.tier_descriptions)
+        if sides_tier not in compiled.sides_tiers_map:
+            sides_tier = compiled.tier_descriptions[0] if compiled.tier_descriptions else None
+    sides_cost_per_unit = compiled.sides_tiers_map.get(sides_tier, 0)
+
+    banner_mesh_tier, banner_mesh_cost_per_unit = "N/A", 0
+    banner_mesh_selection = entry.get('banner_mesh_selection')
+    if banner_mesh_selection in compiled.banner_mesh_finishing:
+        banner_mesh_tier, banner_mesh_cost_per_unit = get_banner_mesh_details(total_sqft_order, compiled.banner_mesh_finishing[banner_mesh_selection])
+
+    specialty_finishing_price_per_unit = 0
+    options_for_type = compiled.specialty_finishing.get(entry.get('finishing_type'), {})
+    if options_for_type:
+        finishing_option = entry.get('finishing_option')
+        if finishing_option not in options_for_type:
+            finishing_option = next(iter(options_for_type))
+        specialty_finishing_price_per_unit = options_for_type.get(finishing_option, 0)
+    finishing_price_per_unit = banner_mesh_cost_per_unit + specialty_finishing_price_per_unit
+
+    cut_cost_per_unit = compiled.cut_cost_map.get(entry.get('cut_cost_selection'), 0)
+
+    time_selection = entry.get('additional_time_selection')
+    if time_selection not in compiled.additional_time_map and compiled.additional_time_options:
+        time_selection = compiled.additional_time_options[0]
+    additional_time_cost_per_unit = compiled.additional_time_map.get(time_selection, 0)
+
+    install_selection = entry.get('added_install_selection')
+    if install_selection not in compiled.added_install_map and compiled.added_install_options:
+        install_selection = compiled.added_install_options[0]
+    added_install_cost_per_unit = compiled.added_install_map.get(install_selection, 0)
+
+    adjustment_selection = entry.get('print_adjustment')
+    if adjustment_selection not in compiled.print_adjustment_fixed and compiled.print_adjustment_options:
+        adjustment_selection = compiled.print_adjustment_options[0]
+    adjustment_percentage = compiled.print_adjustment_fixed.get(adjustment_selection, 0)
+
+    discount_tier = entry.get('discount_tier_selection')
+    if discount_tier not in compiled.discount_tier_options:
+        discount_tier = get_discount_tier_details(total_sqft_order, compiled.volume_discount_tiers)
+        if discount_tier not in compiled.discount_tier_options:
+            discount_tier = next(iter(compiled.discount_tier_options), None)
+    discounts = compiled.discount_tier_options.get(discount_tier, [0, 0, 0])
+
+    prodcuts_an_vars = material_data.get("prodcuts_an_vars")
+    if prodcuts_an_vars:
+        _, prodcuts_an_for_entry = calculate_dynamic_prodcuts_an(prodcuts_an_vars, qty)
+    else:
+        prodcuts_an_for_entry = compiled.default_prodcuts_an
+
+    calculation_data = {
+        "qty": qty, "sqft_per_piece": sqft_per_piece, "total_sqft_entry": sqft_per_piece * qty,
+        "sides_cost_per_unit": sides_cost_per_unit, "finishing_price_per_unit": finishing_price_per_unit,
+        "cut_cost_per_unit": cut_cost_per_unit, "additional_time_cost_per_unit": additional_time_cost_per_unit,
+        "added_install_cost_per_unit": added_install_cost_per_unit,
+    }
+    prices = calculate_all_prices_for_entry(
+        calculation_data, all_material_prices, discounts,
+        adjustment_percentage, multiples_value, prodcuts_an_for_entry,
+        compiled.cons_bx_4, compiled.cons_bx_6
+    )
+    return {
+        "prices": prices,
+        "calculation_data": calculation_data,
+        "sides_tier": sides_tier,
+        "banner_mesh_tier": banner_mesh_tier,
+        "discount_tier": discount_tier,
+        "discounts": discounts,
+        "adjustment_percentage": adjustment_percentage,
+        "multiples_value": multiples_value,
+        "prodcuts_an": prodcuts_an_for_entry,
+    }
+
+
+def price_order(entries, compiled, total_sqft_order=None, material_counts=None, cache=None):
+    """
+    Prices a whole order: total sqft and per-material counts are derived from all entries
+    first, as in the calculator's main loop, then every entry is priced in that context.
+    Pass total_sqft_order and material_counts to price a slice of a larger order instead,
+    and a cache (PriceCache or the shared one) to reuse results.
+    Returns (per-entry results, order totals per customer type).
+    """
+    if total_sqft_order is None:
+        total_sqft_order = order_total_sqft(entries)
+    if material_counts is None:
+        material_counts = Counter(e.get('material') for e in entries)
+    results = []
+    totals = dict.fromkeys(PRICE_CUSTOMER_TYPES, 0)
+    for entry in entries:
+        _, multiples_value = compiled.get_multiplier(material_counts.get(entry.get('material'), 1))
+        if cache is not None:
+            result = cache.price(entry, compiled, total_sqft_order, multiples_value, order_tiers(entry, compiled, total_sqft_order))
+        else:
+            result = price_entry(entry, compiled, total_sqft_order, multiples_value)
+        for cust_type in PRICE_CUSTOMER_TYPES:
+            totals[cust_type] += result['prices'][cust_type]
+        results.append(result)
+    return results, totals
+
+
+# --- PRICE CACHE ---
+# Every entry field price_entry reads. With the config version, the order-level tiers and
+# the multiplier, these determine an entry's price completely.
+PRICED_FIELDS = (
+    'type', 'material', 'w_ft', 'w_in', 'h_ft', 'h_in', 'qty', 'sidedness', 'sides_tier_selection',
+    'banner_mesh_selection', 'finishing_type', 'finishing_option', 'cut_cost_selection',
+    'additional_time_selection', 'added_install_selection', 'print_adjustment', 'discount_tier_selection',
+)
+
+
+def entry_fingerprint(entry):
+    return tuple(entry.get(field) for field in PRICED_FIELDS)
+
+
+def canonical_fingerprint(entry, compiled):
+    """
+    entry_fingerprint() with equivalent inputs folded together, for caches shared across
+    orders: sizes become total inches, and a selection the config does not offer becomes
+    None (price_entry resolves every unoffered value of a field the same way).
+    """
+    def offered(field, options):
+        value = entry.get(field)
+        return value if value in options else None
+
+    finishing_type = offered('finishing_type', compiled.specialty_finishing)
+    return (
+        entry.get('type'), entry.get('material'),
+        entry.get('w_ft', 0) * 12 + entry.get('w_in', 0), entry.get('h_ft', 0) * 12 + entry.get('h_in', 0),
+        entry.get('qty', 1), entry.get('sidedness', compiled.sidedness_options[0] if compiled.sidedness_options else None),
+        offered('sides_tier_selection', compiled.sides_tiers_map),
+        offered('banner_mesh_selection', compiled.banner_mesh_finishing),
+        finishing_type, offered('finishing_option', compiled.specialty_finishing.get(finishing_type, {})),
+        offered('cut_cost_selection', compiled.cut_cost_map),
+        offered('additional_time_selection', compiled.additional_time_map),
+        offered('added_install_selection', compiled.added_install_map),
+        offered('print_adjustment', compiled.print_adjustment_fixed),
+        offered('discount_tier_selection', compiled.discount_tier_options),
+    )
+
+
+def order_tiers(entry, compiled, total_sqft_order):
+    """The tiers the entry resolves from the order total (banner/mesh, auto discount); None if it does not depend on it."""
+    option = entry.get('banner_mesh_selection')
+    banner_mesh = option in compiled.banner_mesh_finishing
+    auto_discount = entry.get('discount_tier_selection') not in compiled.discount_tier_options
+    if not banner_mesh and not auto_discount:
+        return None
+    return (
+        get_banner_mesh_details(total_sqft_order, compiled.banner_mesh_finishing[option]) if banner_mesh else None,
+        get_discount_tier_details(total_sqft_order, compiled.volume_discount_tiers) if auto_discount else None,
+    )
+
+
+class PriceCache:
+    """
+    Bounded LRU of price_entry results keyed on what a price depends on, not on which entry
+    asked: identical line items, and an entry edited back to an earlier value, are hits.
+    Results are shared between hits and must not be modified.
+    """
+
+    def __init__(self, max_entries=1024, source=None):
+        self.max_entries = max_entries
+        # Misses are priced through source (e.g. a process-wide cache) when given.
+        self.source = source
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def price(self, entry, compiled, total_sqft_order, multiples_value, tiers):
+        """price_entry(entry, ...); tiers is order_tiers(entry, compiled, total_sqft_order)."""
+        key = (compiled.version, entry_fingerprint(entry), tiers, multiples_value)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+        if self.source is not None:
+            result = self.source.price(entry, compiled, total_sqft_order, multiples_value, tiers)
+        else:
+            result = price_entry(entry, compiled, total_sqft_order, multiples_value)
+        self._results[key] = result
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        self.misses += 1
+        return result
+
+
+# --- INCREMENTAL RECALCULATION ---
+class IncrementalPricer:
+    """
+    Reprices only what an edit affects. Each entry's last result is kept with what it was
+    priced against: the entry's own fields, its material multiplier and, for entries whose
+    price depends on the order total (banner/mesh finishing, or no explicit discount tier),
+    the tiers that total resolved to. An entry is repriced when its fields change, its
+    multiplier changes, or the order total crosses one of its tier breakpoints.
+    Build one per compiled config; results are only valid for that config. Repricing goes
+    through `cache` (a PriceCache) when one is given.
+    """
+
+    def __init__(self, compiled, cache=None):
+        self.compiled = compiled
+        self.cache = cache
+        # entry id -> (fields, multiples value, order total, order-level tiers, result)
+        self._priced = {}
+        # (order total, banner/mesh selection, discount tier selection) -> order_tiers(), this run
+        self._tiers = {}
+        self.repriced = 0
+        self.reused = 0
+
+    def begin(self):
+        """Starts a recalculation pass: resets the counters and the per-total tier memo."""
+        self._tiers.clear()
+        self.repriced = self.reused = 0
+
+    def _order_tiers(self, entry, total_sqft_order):
+        key = (total_sqft_order, entry.get('banner_mesh_selection'), entry.get('discount_tier_selection'))
+        if key not in self._tiers:
+            self._tiers[key] = order_tiers(entry, self.compiled, total_sqft_order)
+        return self._tiers[key]
+
+    def price(self, entry, total_sqft_order, multiples_value):
+        """price_entry(entry, ...), reusing the last result when nothing it depends on moved."""
+        fields = tuple(entry.items())
+        previous = self._priced.get(entry['id'])
+        if previous is not None and previous[0] == fields and previous[1] == multiples_value:
+            if previous[2] == total_sqft_order or previous[3] is None:
+                self.reused += 1
+                return previous[4]
+            tiers = self._order_tiers(entry, total_sqft_order)
+            if tiers == previous[3]:
+                self._priced[entry['id']] = (fields, multiples_value, total_sqft_order, tiers, previous[4])
+                self.reused += 1
+                return previous[4]
+        else:
+            tiers = self._order_tiers(entry, total_sqft_order)
+        if self.cache is not None:
+            result = self.cache.price(entry, self.compiled, total_sqft_order, multiples_value, tiers)
+        else:
+            result = price_entry(entry, self.compiled, total_sqft_order, multiples_value)
+        self._priced[entry['id']] = (fields, multiples_value, total_sqft_order, tiers, result)
+        self.repriced += 1
+        return result
+
+    def retain(self, entry_ids):
+        """Forgets entries no longer in the order."""
+        entry_ids = set(entry_ids)
+        for entry_id in [e for e in self._priced if e not in entry_ids]:
+            del self._priced[entry_id]
+
+    def price_order(self, entries, total_sqft_order=None, material_counts=None):
+        """Incremental price_order(): same (results, totals), repricing only what changed."""
+        if total_sqft_order is None:
+            total_sqft_order = order_total_sqft(entries)
+        if material_counts is None:
+            material_counts = Counter(e.get('material') for e in entries)
+        self.begin()
+        results = []
+        totals = dict.fromkeys(PRICE_CUSTOMER_TYPES, 0)
+        for entry in entries:
+            _, multiples_value = self.compiled.get_multiplier(material_counts.get(entry.get('material'), 1))
+            result = self.price(entry, total_sqft_order, multiples_value)
+            for cust_type in PRICE_CUSTOMER_TYPES:
+                totals[cust_type] += result['prices'][cust_type]
+            results.append(result)
+        self.retain(entry['id'] for entry in entries)
+        return results, totals
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+import shared_config
+import shared_price_cache
+from line_items import get_name_index, parse_line_item
+from pricing import CompiledConfig, PRICE_CUSTOMER_TYPES, entry_sqft_per_piece, order_total_sqft, order_tiers, price_entry, price_order
+
+# HTTP/JSON pricing service for the ERP and storefront. Line items use the same columns as
+# bulk_price.py (type, material, w_ft, w_in, h_ft, h_in, qty, sidedness, ...) and are
+# priced by the same engine as the calculator.
+#
+#   POST /price/entry  {"item": {...}, "total_sqft_order": 120.0, "multiples_value": 1}
+#   POST /price/batch  {"items": [...]}   every item priced as its own single-line order
+#   POST /price/order  {"items": [...]}   items priced together as one order
+#   GET  /health
+
+# Request bodies are decoded, validated and priced off the event loop: batches/orders up to
+# POOL_ITEM_THRESHOLD items in the server's thread pool, larger ones on the worker pool in chunks.
+POOL_ITEM_THRESHOLD = 2000
+POOL_CHUNK_SIZE = 500
+MAX_ITEMS = 100000
+
+_worker_compiled = None
+_worker_segment = None
+
+
+class StaleConfigVersion(Exception):
+    """A worker no longer holds the config version a request was pinned to."""
+
+
+def _init_worker(config, segment_path=None):
+    global _worker_compiled, _worker_segment
+    if segment_path:
+        # Workers price against the shared segment and follow it across config reloads.
+        _worker_segment = segment_path
+    else:
+        _worker_compiled = CompiledConfig(config)
+
+
+def _price_entries(entries, compiled, total_sqft_order=None, material_counts=None):
+    """Prices validated entries, as single-line orders unless an order context is given."""
+    cache = shared_price_cache.get()
+    if total_sqft_order is None:
+        return [price_order([entry], compiled, cache=cache)[0][0] for entry in entries]
+    return price_order(entries, compiled, total_sqft_order, material_counts, cache)[0]
+
+
+def _price_chunk(entries, version, total_sqft_order=None, material_counts=None):
+    """Prices a chunk on a worker against the config version its request was pinned to."""
+    global _worker_compiled
+    if _worker_segment and (_worker_compiled is None or _worker_compiled.version != version):
+        # Only re-attached when a request pins a version this worker has not seen yet.
+        _worker_compiled = shared_config.attached(_worker_segment)
+    if _worker_compiled is None or _worker_compiled.version != version:
+        raise StaleConfigVersion(version)
+    return _price_entries(entries, _worker_compiled, total_sqft_order, material_counts)
+
+
+class PricingService:
+    """
+    Holds one compiled config shared by every request, recompiled when the config file
+    changes, and a lazily started process pool whose workers compile the same version.
+    With a shared config segment (QUOTE_SHARED_CONFIG) the file is compiled once per host:
+    the service publishes it, and it and its workers attach to the segment instead.
+    """
+
+    def __init__(self, config_path, workers=None, segment_path=shared_config.SEGMENT_PATH):
+        self.config_path = config_path
+        self.workers = workers
+        self.segment_path = segment_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.compiled = None
+        self._pool = None
+        self._pool_version = None
+        self.refresh()
+
+    def refresh(self):
+        """Recompiles the config if the file changed since it was last read; returns the compiled config."""
+        mtime = os.stat(self.config_path).st_mtime_ns
+        if self.segment_path:
+            if mtime != self._mtime:
+                with self._lock:
+                    if mtime != self._mtime:
+                        self.compiled = shared_config.publish_file(self.config_path, self.segment_path)
+                        self._mtime = mtime
+            # Between file changes a request only re-attaches, following segments published elsewhere.
+            self.compiled = shared_config.attached(self.segment_path) or self.compiled
+            return self.compiled
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        self._config = json.load(f)
+                    self.compiled = CompiledConfig(self._config)
+                    self._mtime = mtime
+        return self.compiled
+
+    def pool(self):
+        """The worker pool, restarted whenever the config version changes (unless workers follow a segment)."""
+        with self._lock:
+            stale = self._pool_version != self.compiled.version and not self.segment_path
+            if self._pool is None or stale:
+                if self._pool is not None:
+                    # Drained, not cancelled: chunks already queued by in-flight requests still finish there.
+                    self._pool.shutdown(wait=False)
+                initargs = (None, self.segment_path) if self.segment_path else (self._config,)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=initargs
+                )
+                self._pool_version = self.compiled.version
+            return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def price_many(self, entries, compiled, total_sqft_order=None, material_counts=None):
+        """Prices entries against compiled (the request's pinned config), inline or across the worker pool."""
+        if len(entries) <= POOL_ITEM_THRESHOLD:
+            return await run_in_threadpool(_price_entries, entries, compiled, total_sqft_order, material_counts)
+        iterator = iter(entries)
+        futures = [
+            self._price_chunk_on(chunk, compiled, total_sqft_order, material_counts)
+            for chunk in iter(lambda: list(islice(iterator, POOL_CHUNK_SIZE)), [])
+        ]
+        return [result for chunk_results in await asyncio.gather(*futures) for result in chunk_results]
+
+    async def _price_chunk_on(self, chunk, compiled, total_sqft_order, material_counts):
+        loop = asyncio.get_running_loop()
+        try:
+            # Looked up per chunk, so no chunk is submitted to a pool another request has just restarted.
+            return await loop.run_in_executor(self.pool(), _price_chunk, chunk, compiled.version, total_sqft_order, material_counts)
+        except StaleConfigVersion:
+            # The workers already moved on to a newer config; keep the response on one version.
+            return await run_in_threadpool(_price_entries, chunk, compiled, total_sqft_order, material_counts)
+
+
+def _error(message, status_code=400, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status_code)
+
+
+async def _read_json(request):
+    body = await request.body()
+    try:
+        return await run_in_threadpool(json.loads, body)
+    except ValueError:
+        return None
+
+
+def _parse_items(items, compiled):
+    """Validates request line items; returns (entries, per-item errors keyed by position)."""
+    index = get_name_index(compiled)
+    entries, errors = [], {}
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[position] = ["item must be an object"]
+            continue
+        entry, item_errors = parse_line_item(item, index)
+        if item_errors:
+            errors[position] = item_errors
+        else:
+            entries.append(entry)
+    return entries, errors
+
+
+def _result_json(result):
+    calc = result['calculation_data']
+    return {
+        "prices": {cust_type: round(result['prices'][cust_type], 2) for cust_type in PRICE_CUSTOMER_TYPES},
+        "sqft_per_piece": round(calc['sqft_per_piece'], 4),
+        "total_sqft": round(calc['total_sqft_entry'], 4),
+        "sides_tier": result['sides_tier'],
+        "banner_mesh_tier": result['banner_mesh_tier'],
+        "discount_tier": result['discount_tier'],
+        "multiples_value": result['multiples_value'],
+    }
+
+
+def _batch_response(compiled, results):
+    return JSONResponse({"config_version": compiled.version, "results": [_result_json(r) for r in results]})
+
+
+def _order_context(entries):
+    return order_total_sqft(entries), Counter(entry['material'] for entry in entries)
+
+
+def _order_response(compiled, total_sqft_order, results):
+    totals = dict.fromkeys(PRICE_CUSTOMER_TYPES, 0)
+    for result in results:
+        for cust_type in PRICE_CUSTOMER_TYPES:
+            totals[cust_type] += result['prices'][cust_type]
+    return JSONResponse({
+        "config_version": compiled.version,
+        "total_sqft_order": round(total_sqft_order, 4),
+        "totals": {cust_type: round(total, 2) for cust_type, total in totals.items()},
+        "results": [_result_json(r) for r in results],
+    })
+
+
+def _price_single(body, compiled):
+    """Validates and prices a /price/entry request body; returns the response."""
+    entry, errors = parse_line_item(body["item"], get_name_index(compiled))
+    if errors:
+        return _error("invalid item", status_code=422, errors=errors)
+    total_sqft_order = body.get("total_sqft_order")
+    if total_sqft_order is None:
+        total_sqft_order = entry_sqft_per_piece(entry) * entry['qty']
+    multiples_value = body.get("multiples_value")
+    if multiples_value is None:
+        _, multiples_value = compiled.get_multiplier(1)
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (total_sqft_order, multiples_value)):
+        return _error("'total_sqft_order' and 'multiples_value' must be numbers")
+    if not (math.isfinite(total_sqft_order) and total_sqft_order >= 0):
+        return _error("'total_sqft_order' must be a finite number of at least 0", status_code=422)
+    if not (math.isfinite(multiples_value) and multiples_value > 0):
+        return _error("'multiples_value' must be a finite number greater than 0", status_code=422)
+    cache = shared_price_cache.get()
+    if cache is not None:
+        result = cache.price(entry, compiled, total_sqft_order, multiples_value, order_tiers(entry, compiled, total_sqft_order))
+    else:
+        result = price_entry(entry, compiled, total_sqft_order, multiples_value)
+    return JSONResponse({"config_version": compiled.version, **_result_json(result)})
+
+
+def _items_from(body):
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, _error("'items' must be a non-empty list")
+    if len(items) > MAX_ITEMS:
+        return None, _error(f"at most {MAX_ITEMS} items per request", status_code=413)
+    return items, None
+
+
+def create_app(config_path="config.json", workers=None):
+    service = PricingService(config_path, workers)
+
+    async def health(request):
+        compiled = await run_in_threadpool(service.refresh)
+        cache = shared_price_cache.get()
+        return JSONResponse({"status": "ok", "config_version": compiled.version,
+                             **({"price_cache": cache.stats()} if cache is not None else {})})
+
+    async def price_single(request):
+        body = await _read_json(request)
+        if not isinstance(body, dict) or not isinstance(body.get("item"), dict):
+            return _error("'item' must be an object")
+        compiled = await run_in_threadpool(service.refresh)
+        return await run_in_threadpool(_price_single, body, compiled)
+
+    async def price_batch(request):
+        items, response = _items_from(await _read_json(request))
+        if response:
+            return response
+        compiled = await run_in_threadpool(service.refresh)
+        entries, errors = await run_in_threadpool(_parse_items, items, compiled)
+        if errors:
+            return _error("invalid items", status_code=422, errors=errors)
+        results = await service.price_many(entries, compiled)
+        return await run_in_threadpool(_batch_response, compiled, results)
+
+    async def price_full_order(request):
+        items, response = _items_from(await _read_json(request))
+        if response:
+            return response
+        compiled = await run_in_threadpool(service.refresh)
+        entries, errors = await run_in_threadpool(_parse_items, items, compiled)
+        if errors:
+            return _error("invalid items", status_code=422, errors=errors)
+        total_sqft_order, material_counts = await run_in_threadpool(_order_context, entries)
+        results = await service.price_many(entries, compiled, total_sqft_order, material_counts)
+        return await run_in_threadpool(_order_response, compiled, total_sqft_order, results)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        service.shutdown()
+
+    return Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/price/entry", price_single, methods=["POST"]),
+            Route("/price/batch", price_batch, methods=["POST"]),
+            Route("/price/order", price_full_order, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the quote pricing engine as a local HTTP/JSON API")
+    parser.add_argument(
+        "-c", "--config", default="config.json",
+        help="Path to your config.json (reloaded when the file changes)")
+    parser.add_argument(
+        "--host", default="127.0.0.1",
+        help="Interface to bind")
+    parser.add_argument(
+        "-p", "--port", type=int, default=8502,
+        help="Port to listen on")
+    parser.add_argument(
+        "-j", "--workers", type=int,
+        help=f"Worker processes for requests with more than {POOL_ITEM_THRESHOLD} items (default: CPU count)")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.config, args.workers), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import csv
+import io
+from datetime import datetime
+from pricing import PRICE_CUSTOMER_TYPES
+
+# Builds downloadable quote files from the rows the calculator already collects in
+# data_for_export (one priced dict per entry). Nothing here prices or renders anything.
+
+EXPORT_COLUMNS = [
+    "Type", "Material", "Num of pieces", "Width (in)", "Height (in)", "Sidedness",
+    "SQ' per piece", "Total SQ'", "Discount Tier", "Multiplier",
+    *PRICE_CUSTOMER_TYPES, *(f"{cust_type} per SQ'" for cust_type in PRICE_CUSTOMER_TYPES),
+]
+
+# Columns and widths (mm) of the printable PDF table; it fits an A4 landscape page.
+PDF_COLUMNS = [
+    ("Material", 62), ("Num of pieces", 16), ("Width (in)", 18), ("Height (in)", 18),
+    ("Total SQ'", 22), ("Discount Tier", 34), ("Multiplier", 16),
+    ("Preferred", 26), ("Corporate", 26), ("Wholesale", 26),
+]
+
+
+def order_totals(rows):
+    """Sums the order's square footage and per-customer-type prices."""
+    totals = {"Total SQ'": 0, **dict.fromkeys(PRICE_CUSTOMER_TYPES, 0)}
+    for row in rows:
+        for column in totals:
+            totals[column] += row.get(column) or 0
+    return {column: round(value, 2) for column, value in totals.items()}
+
+
+def _table(rows):
+    """Yields the header, one line per entry and the order totals line."""
+    yield EXPORT_COLUMNS
+    for row in rows:
+        yield [row.get(column, "") for column in EXPORT_COLUMNS]
+    totals = order_totals(rows)
+    yield ["Order total", *("" if column not in totals else totals[column] for column in EXPORT_COLUMNS[1:])]
+
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_table(rows))
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def to_xlsx(rows):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Quote")
+    for line in _table(rows):
+        sheet.append(line)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _money(value):
+    return f"${value:,.2f}"
+
+
+def _text(value):
+    # The PDF core fonts only cover Latin-1.
+    return str(value if value is not None else "").encode('latin-1', 'replace').decode('latin-1')
+
+
+def to_pdf(rows, title="Quote", customer=""):
+    from fpdf import FPDF
+    pdf = FPDF(orientation="L", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=12)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 8, _text(title), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=9)
+    subtitle = f"{_text(customer)} - " if customer else ""
+    pdf.cell(0, 6, f"{subtitle}{datetime.now():%Y-%m-%d %H:%M}", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(2)
+
+    def header():
+        pdf.set_font("Helvetica", "B", 8)
+        for column, width in PDF_COLUMNS:
+            pdf.cell(width, 6, column, border=1, align="C")
+        pdf.ln()
+        pdf.set_font("Helvetica", size=8)
+
+    header()
+    for row in rows:
+        if pdf.will_page_break(6):
+            pdf.add_page()
+            header()
+        for column, width in PDF_COLUMNS:
+            value = row.get(column, "")
+            if column in PRICE_CUSTOMER_TYPES:
+                value = _money(value or 0)
+            pdf.cell(width, 6, _text(value)[:40], border=1,
+                     align="L" if column in ("Material", "Discount Tier") else "R")
+        pdf.ln()
+
+    totals = order_totals(rows)
+    pdf.set_font("Helvetica", "B", 8)
+    for column, width in PDF_COLUMNS:
+        if column == "Material":
+            value = "Order total"
+        elif column in PRICE_CUSTOMER_TYPES:
+            value = _money(totals[column])
+        else:
+            value = totals.get(column, "")
+        pdf.cell(width, 6, _text(value), border=1, align="L" if column == "Material" else "R")
+    pdf.ln()
+    return bytes(pdf.output())
@@ -0,0 +1,368 @@
+import sqlite3
+import json
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.environ.get('QUOTES_DB_PATH', 'quotes.db')
+# Stored in PRAGMA user_version; bump it and extend QuoteStore._migrate when SCHEMA changes.
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    doc_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    customer TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    config_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS line_items (
+    quote_id TEXT NOT NULL REFERENCES quotes(id) ON DELETE CASCADE,
+    entry_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    type TEXT,
+    material TEXT,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (quote_id, entry_id)
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer ON quotes(customer COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_quotes_updated_at ON quotes(updated_at);
+CREATE INDEX IF NOT EXISTS idx_line_items_material ON line_items(material);
+CREATE INDEX IF NOT EXISTS idx_line_items_quote_position ON line_items(quote_id, position);
+"""
+
+# Version 1 gave quotes an INTEGER PRIMARY KEY doc_id for the search index. Databases from
+# before then are rebuilt in place; line_items keeps referencing quotes(id), and the search
+# index is backfilled once the store opens.
+MIGRATE_TO_DOC_ID_SQL = """
+BEGIN;
+CREATE TABLE quotes_migrated (
+    doc_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    customer TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    config_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+INSERT INTO quotes_migrated (id, customer, notes, config_version, created_at, updated_at)
+SELECT id, customer, notes, config_version, created_at, updated_at FROM quotes ORDER BY created_at;
+DROP TABLE quotes;
+ALTER TABLE quotes_migrated RENAME TO quotes;
+DROP TABLE IF EXISTS quote_search;
+COMMIT;
+"""
+
+# One search document per quote, stored under the quote's doc_id so it can be replaced
+# without scanning the index. Line item fields are concatenated into the document.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS quote_search USING fts5(
+    customer, material, finishing, size, notes,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# Column weights for bm25(): customer, material, finishing, size, notes.
+SEARCH_SQL = """
+SELECT q.id, q.customer, q.updated_at, q.config_version, s.score,
+       (SELECT COUNT(*) FROM line_items li WHERE li.quote_id = q.id),
+       (SELECT json_group_array(DISTINCT li.material) FROM line_items li WHERE li.quote_id = q.id)
+FROM (
+    SELECT rowid, bm25(quote_search, 4.0, 3.0, 2.0, 2.0, 1.0) AS score
+    FROM quote_search
+    WHERE quote_search MATCH ?
+    ORDER BY score
+    LIMIT ? OFFSET ?
+) s
+JOIN quotes q ON q.doc_id = s.rowid
+ORDER BY s.score
+"""
+
+UPSERT_LINE_ITEM_SQL = """
+INSERT INTO line_items (quote_id, entry_id, position, type, material, fingerprint, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(quote_id, entry_id) DO UPDATE SET
+    position = excluded.position,
+    type = excluded.type,
+    material = excluded.material,
+    fingerprint = excluded.fingerprint,
+    data = excluded.data
+"""
+
+LOAD_QUOTE_SQL = """
+SELECT q.id, q.customer, q.notes, q.config_version, q.created_at, q.updated_at, li.data
+FROM quotes q
+LEFT JOIN line_items li ON li.quote_id = q.id
+WHERE q.id = ?
+ORDER BY li.position
+"""
+
+
+def serialize_entry(entry):
+    return json.dumps(entry, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def size_token(w_ft=0, w_in=0, h_ft=0, h_in=0):
+    """One search token for a size: whole feet as '3x4', otherwise with inches, e.g. '3ft6inx4'."""
+    sides = []
+    for feet, inches in divmod(w_ft * 12 + w_in, 12), divmod(h_ft * 12 + h_in, 12):
+        sides.append(f"{feet}ft{inches}in" if inches else f"{feet}")
+    return "x".join(sides)
+
+
+# A size typed in a search, with optional inches: 3x4, 3'6"x4', 3ft 6in x 4ft.
+_SIZE_QUERY = re.compile(
+    r"""(?<!\w)(\d+)\s*(?:'|ft)?\s*(?:(\d+)\s*(?:"|in))?\s*[x×]\s*(\d+)\s*(?:'|ft)?\s*(?:(\d+)\s*(?:"|in))?(?!\w)""",
+    re.IGNORECASE
+)
+
+
+def search_document(entries, customer, notes):
+    """Builds the (customer, material, finishing, size, notes) columns indexed for a quote."""
+    materials, finishing, sizes = set(), set(), set()
+    for entry in entries:
+        materials.update(str(entry[field]) for field in ('type', 'material') if entry.get(field))
+        finishing.update(
+            str(entry[field]) for field in (
+                'sidedness', 'banner_mesh_selection', 'finishing_type', 'finishing_option',
+                'cut_cost_selection', 'added_install_selection'
+            ) if entry.get(field)
+        )
+        sizes.add(size_token(entry.get('w_ft', 0), entry.get('w_in', 0), entry.get('h_ft', 0), entry.get('h_in', 0)))
+    return customer, " | ".join(sorted(materials)), " | ".join(sorted(finishing)), " ".join(sorted(sizes)), notes
+
+
+def build_match_query(text):
+    """
+    Turns free text into an FTS5 query that requires every word, matching word prefixes.
+    Sizes match their exact size token, so 3x4 finds neither 3x40 nor 3'6"x4'.
+    """
+    sizes = [
+        size_token(int(w_ft), int(w_in or 0), int(h_ft), int(h_in or 0))
+        for w_ft, w_in, h_ft, h_in in _SIZE_QUERY.findall(text)
+    ]
+    tokens = re.findall(r"\w+", _SIZE_QUERY.sub(" ", text).lower())
+    return " ".join([*(f'"{size}"' for size in sizes), *(f'"{token}"*' for token in tokens)])
+
+
+class QuoteStore:
+    """
+    Local SQLite store for quotes and their line items.
+    One connection is shared per store; a lock serialises access so the store
+    can be cached across Streamlit's per-session threads.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Before foreign keys are enforced: rebuilding quotes must not cascade into line_items.
+        self._migrate()
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        has_search_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'quote_search'"
+        ).fetchone()
+        self._conn.executescript(SEARCH_SCHEMA)
+        if not has_search_index:
+            self.rebuild_search_index()
+
+    def _migrate(self):
+        """Upgrades a database written by an older version of the store to SCHEMA_VERSION."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(quotes)")}
+            if columns and 'doc_id' not in columns:
+                self._conn.executescript(MIGRATE_TO_DOC_ID_SQL)
+        if version < 2:
+            # Version 2 indexes sizes with their inches; documents from before are re-indexed.
+            self._conn.execute("DROP TABLE IF EXISTS quote_search")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save_quote(self, entries, config_version, customer='', notes='', quote_id=None):
+        """
+        Saves a quote, writing only the line items whose content or position changed.
+        Returns (quote_id, number_of_line_items_written, number_of_line_items_deleted).
+        """
+        now = time.time()
+        quote_id = quote_id or str(uuid.uuid4())
+        rows = []
+        for position, entry in enumerate(entries):
+            data = serialize_entry(entry)
+            rows.append((quote_id, entry['id'], position, entry.get('type'), entry.get('material'),
+                         hashlib.sha1(data.encode('utf-8')).hexdigest(), data))
+
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                "SELECT customer, notes FROM quotes WHERE id = ?", (quote_id,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO quotes (id, customer, notes, config_version, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    customer = excluded.customer,
+                    notes = excluded.notes,
+                    config_version = excluded.config_version,
+                    updated_at = excluded.updated_at
+                """,
+                (quote_id, customer, notes, config_version, now, now)
+            )
+            existing = {
+                entry_id: (position, fingerprint)
+                for entry_id, position, fingerprint in self._conn.execute(
+                    "SELECT entry_id, position, fingerprint FROM line_items WHERE quote_id = ?", (quote_id,)
+                )
+            }
+            changed = [row for row in rows if existing.get(row[1]) != (row[2], row[5])]
+            current_ids = {row[1] for row in rows}
+            removed = [(quote_id, entry_id) for entry_id in existing if entry_id not in current_ids]
+
+            if changed:
+                self._conn.executemany(UPSERT_LINE_ITEM_SQL, changed)
+            if removed:
+                self._conn.executemany("DELETE FROM line_items WHERE quote_id = ? AND entry_id = ?", removed)
+            if changed or removed or previous != (customer, notes):
+                self._index_quote(quote_id, customer, notes)
+        return quote_id, len(changed), len(removed)
+
+    def _index_quote(self, quote_id, customer, notes):
+        """Replaces the search document of one quote."""
+        doc_id = self._conn.execute("SELECT doc_id FROM quotes WHERE id = ?", (quote_id,)).fetchone()[0]
+        entries = [
+            json.loads(data) for (data,) in
+            self._conn.execute("SELECT data FROM line_items WHERE quote_id = ?", (quote_id,))
+        ]
+        self._conn.execute("DELETE FROM quote_search WHERE rowid = ?", (doc_id,))
+        self._conn.execute(
+            "INSERT INTO quote_search (rowid, customer, material, finishing, size, notes) VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_id, *search_document(entries, customer, notes))
+        )
+
+    def rebuild_search_index(self):
+        """Re-indexes every saved quote, e.g. for databases created before search existed."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM quote_search")
+            quotes = self._conn.execute("SELECT id, customer, notes FROM quotes").fetchall()
+            for quote_id, customer, notes in quotes:
+                self._index_quote(quote_id, customer, notes)
+
+    def search_quotes(self, text, page=0, page_size=20):
+        """
+        Full-text search over customer, materials, finishing, sizes and notes.
+        Returns (results, total_matching_quotes) for the requested page, best matches first.
+        """
+        match = build_match_query(text)
+        if not match:
+            return [], 0
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM quote_search WHERE quote_search MATCH ?", (match,)).fetchone()[0]
+            rows = self._conn.execute(SEARCH_SQL, (match, page_size, page * page_size)).fetchall()
+        results = [
+            {"id": r[0], "customer": r[1], "updated_at": r[2], "config_version": r[3],
+             "score": r[4], "line_count": r[5], "materials": [m for m in json.loads(r[6]) if m]}
+            for r in rows
+        ]
+        return results, total
+
+    def load_quote(self, quote_id):
+        """Loads a quote and all of its line items with a single query. Returns None if not found."""
+        with self._lock:
+            rows = self._conn.execute(LOAD_QUOTE_SQL, (quote_id,)).fetchall()
+        if not rows:
+            return None
+        q_id, customer, notes, version, created_at, updated_at, _ = rows[0]
+        return {
+            "id": q_id, "customer": customer, "notes": notes, "config_version": version,
+            "created_at": created_at, "updated_at": updated_at,
+            "entries": [json.loads(row[6]) for row in rows if row[6] is not None],
+        }
+
+    def count_quotes(self, material=None):
+        with self._lock:
+            if material:
+                return self._conn.execute(
+                    "SELECT COUNT(DISTINCT quote_id) FROM line_items WHERE material = ?", (material,)
+                ).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+
+    def iter_quotes(self, material=None, batch_size=500):
+        """
+        Streams every saved quote with its entries, a batch of quotes at a time, so a whole
+        corpus can be processed without holding it in memory (or the store's lock) at once.
+        """
+        material_clause = "AND id IN (SELECT quote_id FROM line_items WHERE material = ?)" if material else ""
+        last_doc_id = 0
+        while True:
+            with self._lock:
+                quotes = self._conn.execute(
+                    f"""
+                    SELECT doc_id, id, customer, notes, config_version, created_at, updated_at
+                    FROM quotes WHERE doc_id > ? {material_clause}
+                    ORDER BY doc_id LIMIT ?
+                    """,
+                    (last_doc_id, material, batch_size) if material else (last_doc_id, batch_size)
+                ).fetchall()
+                if not quotes:
+                    return
+                quote_ids = [q[1] for q in quotes]
+                items = self._conn.execute(
+                    f"SELECT quote_id, data FROM line_items WHERE quote_id IN ({','.join('?' * len(quote_ids))}) ORDER BY quote_id, position",
+                    quote_ids
+                ).fetchall()
+            entries = {}
+            for quote_id, data in items:
+                entries.setdefault(quote_id, []).append(json.loads(data))
+            for _, q_id, customer, notes, version, created_at, updated_at in quotes:
+                yield {
+                    "id": q_id, "customer": customer, "notes": notes, "config_version": version,
+                    "created_at": created_at, "updated_at": updated_at, "entries": entries.get(q_id, []),
+                }
+            last_doc_id = quotes[-1][0]
+
+    def list_quotes(self, customer=None, material=None, since=None, limit=50):
+        """Lists quote summaries, newest first, optionally filtered by customer, material or date."""
+        clauses, params = [], []
+        if customer:
+            clauses.append("q.customer = ? COLLATE NOCASE")
+            params.append(customer)
+        if material:
+            clauses.append("q.id IN (SELECT quote_id FROM line_items WHERE material = ?)")
+            params.append(material)
+        if since is not None:
+            clauses.append("q.updated_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"""
+            SELECT q.id, q.customer, q.updated_at, q.config_version,
+                   (SELECT COUNT(*) FROM line_items li WHERE li.quote_id = q.id)
+            FROM quotes q {where}
+            ORDER BY q.updated_at DESC
+            LIMIT ?
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit)).fetchall()
+        return [
+            {"id": r[0], "customer": r[1], "updated_at": r[2], "config_version": r[3], "line_count": r[4]}
+            for r in rows
+        ]
+
+    def delete_quote(self, quote_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM quote_search WHERE rowid IN (SELECT doc_id FROM quotes WHERE id = ?)", (quote_id,)
+            )
+            self._conn.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+import argparse
+import dataclasses
+import fnmatch
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import weakref
+from collections import deque
+
+# Memory accounting for Streamlit sessions. Every page calls track() on each run, which
+# registers the session without keeping it alive; measure_sessions() then walks each live
+# session's state and reports the approximate bytes retained per key. tracemalloc snapshots
+# are process-wide and diffed against the previous snapshot to find what grew between reruns.
+# The calculator's diagnostics panel shows both; run this file for the same report against
+# headless sessions.
+
+# Widget keys carry the entry id (qty_<uuid>); they are reported together as qty_*.
+_ENTRY_KEY = re.compile(r"_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+PROBE_KEY = "_session_memory_probe"
+SNAPSHOTS_KEPT = 2
+TRACEMALLOC_FRAMES = 1
+
+_lock = threading.Lock()
+# session id -> (weakref to the session's probe, last page, last seen)
+_sessions = {}
+_snapshots = deque(maxlen=SNAPSHOTS_KEPT)
+_CONTAINERS = (dict, list, tuple, set, frozenset, deque)
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, weakref.ref)
+
+
+def _session_state(ctx):
+    # SafeSessionState wraps the session's SessionState, which outlives each script run.
+    return object.__getattribute__(ctx.session_state, "_state")
+
+
+class _Probe:
+    """Stored in the session's own state: it lives exactly as long as the session does."""
+
+    __slots__ = ("state", "__weakref__")
+
+    def __init__(self, state):
+        self.state = state
+
+
+def track(page):
+    """Registers the running session; call once per script run from every page."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    if PROBE_KEY not in ctx.session_state:
+        # SessionState itself cannot be weakly referenced.
+        ctx.session_state[PROBE_KEY] = _Probe(_session_state(ctx))
+    probe = ctx.session_state[PROBE_KEY]
+    with _lock:
+        _sessions[ctx.session_id] = (weakref.ref(probe), page, time.time())
+
+
+def deep_sizeof(obj, seen):
+    """Approximate bytes reachable from obj that are not already in `seen`."""
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, _CONTAINERS):
+            stack.extend(obj)
+        elif type(obj).__sizeof__ is object.__sizeof__:
+            # Plain objects; types with their own __sizeof__ (DataFrames, arrays) already
+            # report their buffers.
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    value = getattr(obj, slot, None)
+                    if value is not None:
+                        stack.append(value)
+    return total
+
+
+def state_key_sizes(state):
+    """{key: bytes} for one SessionState, widget keys grouped.
+
+    Whatever Streamlit itself retains beyond the values (widget metadata, key maps) is
+    reported under "(internal) <field>".
+    """
+    seen = {id(state)}
+    sizes = {}
+    user_state = state.filtered_state
+    probe = user_state.pop(PROBE_KEY, None)
+    seen.add(id(probe))
+    # Largest values first, so an object shared by two keys is charged to the one that owns it.
+    for key in sorted(user_state, key=lambda k: (-sys.getsizeof(user_state[k]), k)):
+        group = _ENTRY_KEY.sub("_*", key)
+        sizes[group] = sizes.get(group, 0) + deep_sizeof(user_state[key], seen)
+    for field in dataclasses.fields(state):
+        size = deep_sizeof(getattr(state, field.name), seen)
+        if size:
+            sizes[f"(internal) {field.name.lstrip('_')}"] = size
+    return sizes
+
+
+def tracked_sessions():
+    """(session id, SessionState, last page, last seen) for every live tracked session."""
+    with _lock:
+        tracked = list(_sessions.items())
+    live = []
+    for session_id, (probe_ref, page, last_seen) in tracked:
+        probe = probe_ref()
+        if probe is None:
+            with _lock:
+                _sessions.pop(session_id, None)
+        else:
+            live.append((session_id, probe.state, page, last_seen))
+    return live
+
+
+def measure_sessions():
+    """One record per live tracked session, largest first."""
+    records = []
+    for session_id, state, page, last_seen in tracked_sessions():
+        try:
+            sizes = state_key_sizes(state)
+        except RuntimeError:
+            # The session's own script changed its state mid-walk; it is measured next time.
+            continue
+        records.append({
+            "session_id": session_id, "page": page, "idle_seconds": time.time() - last_seen,
+            "total_bytes": sum(sizes.values()), "keys": sizes,
+        })
+    records.sort(key=lambda r: r["total_bytes"], reverse=True)
+    return records
+
+
+# --- TRACEMALLOC SNAPSHOTS ---
+def tracing_memory():
+    return tracemalloc.is_tracing()
+
+
+def start_tracing(frames=TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing():
+    _snapshots.clear()
+    tracemalloc.stop()
+
+
+def take_snapshot(label):
+    """Snapshots the traced heap; keeps the previous one to diff against."""
+    if not tracemalloc.is_tracing():
+        return
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        # AppTest keeps every run's element tree; that is the harness, not the app.
+        tracemalloc.Filter(False, "*/streamlit/testing/*"),
+    ))
+    _snapshots.append((label, time.time(), snapshot))
+
+
+def snapshot_diff(top=15, group_by="lineno"):
+    """(from label, to label, rows) for the two latest snapshots, or None before there are two."""
+    if len(_snapshots) < 2:
+        return None
+    (old_label, _, old), (new_label, _, new) = _snapshots[-2], _snapshots[-1]
+    rows = []
+    for stat in new.compare_to(old, group_by)[:top]:
+        frame = stat.traceback[0]
+        rows.append({
+            "location": f"{frame.filename}:{frame.lineno}", "size_diff_kb": stat.size_diff / 1024,
+            "size_kb": stat.size / 1024, "count_diff": stat.count_diff,
+        })
+    return old_label, new_label, rows
+
+
+# --- CLI ---
+def _print_sessions(records, top_keys):
+    for record in records:
+        print(f"session {record['session_id']}  {record['total_bytes'] / 1024:,.1f} KiB  (last page: {record['page']})")
+        keys = sorted(record['keys'].items(), key=lambda item: item[1], reverse=True)
+        for key, size in keys[:top_keys]:
+            print(f"    {key:<36} {size / 1024:>12,.1f} KiB")
+
+
+def main():
+    from streamlit.testing.v1 import AppTest
+    from synthetic_data import make_config, make_order
+
+    parser = argparse.ArgumentParser(
+        description="Report memory retained per session and per state key for headless calculator sessions")
+    parser.add_argument(
+        "-n", "--entries", type=int, default=100,
+        help="Entries in each session's order")
+    parser.add_argument(
+        "-s", "--sessions", type=int, default=2,
+        help="Concurrent sessions to open")
+    parser.add_argument(
+        "-r", "--reruns", type=int, default=3,
+        help="Unchanged reruns per session after the first load")
+    parser.add_argument(
+        "--pages", default="*",
+        help="Glob of editor pages each session also visits, e.g. 'Material_*' ('' for none)")
+    parser.add_argument(
+        "--top", type=int, default=15,
+        help="Rows to show per session and in the tracemalloc diff")
+    parser.add_argument(
+        "--frames", type=int, default=TRACEMALLOC_FRAMES,
+        help="Traceback frames tracemalloc keeps per allocation (more is slower)")
+    parser.add_argument(
+        "--json", action="store_true",
+        help="Print the report as JSON")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    pages = sorted(
+        os.path.join("pages", name) for name in os.listdir(os.path.join(root, "pages"))
+        if name.endswith(".py") and args.pages and fnmatch.fnmatch(name, args.pages))
+    sessions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # The pages read config.json and write quotes.db relative to the working directory.
+        config = make_config(material_types=6, materials_per_type=10, volume_tiers=5)
+        with open(os.path.join(workdir, "config.json"), 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        os.environ["QUOTES_DB_PATH"] = os.path.join(workdir, "quotes.db")
+        os.environ["PRICE_BOOK_DIR"] = os.path.join(workdir, "price_book")
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for i in range(args.sessions):
+                at = AppTest.from_file(os.path.join(root, "Calculator.py"), default_timeout=600)
+                at.session_state.entries = make_order(config, args.entries, seed=i)
+                at.run()
+                for page in pages:
+                    at.switch_page(page).run()
+                at.switch_page("Calculator.py").run()
+                sessions.append(at)
+            # Only growth between the snapshots matters, so loading need not be traced.
+            start_tracing(args.frames)
+            take_snapshot("after first load")
+            for at in sessions:
+                for _ in range(args.reruns):
+                    at.run()
+            take_snapshot(f"after {args.reruns} more reruns")
+        finally:
+            os.chdir(cwd)
+
+    records = []
+    for i, at in enumerate(sessions):
+        sizes = state_key_sizes(object.__getattribute__(at._session_state, "_state"))
+        records.append({"session_id": f"headless-{i}", "page": "Calculator.py", "idle_seconds": 0.0,
+                        "total_bytes": sum(sizes.values()), "keys": sizes})
+    diff = snapshot_diff(args.top)
+    if args.json:
+        print(json.dumps({"sessions": records, "tracemalloc_diff": diff}, indent=2))
+        return
+    _print_sessions(records, args.top)
+    old_label, new_label, rows = diff
+    print(f"\ntracemalloc: {old_label} -> {new_label}")
+    for row in rows:
+        print(f"    {row['size_diff_kb']:>+10.1f} KiB {row['count_diff']:>+8} blocks  {row['location']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import functools
+import os
+import pickle
+import threading
+import time
+import zlib
+import session_memory
+
+# Bounded session state. Sessions idle past QUOTE_SPILL_IDLE_SECONDS, or idle past
+# QUOTE_SPILL_MIN_IDLE_SECONDS while all sessions together exceed the memory budget, have
+# their quote and config copies written to disk and dropped from memory. Every page calls
+# restore() before touching session state (and callbacks are wrapped with @restores), which
+# puts a spilled session back exactly as it was.
+#
+#   QUOTE_SESSION_BUDGET_MB       memory budget for all sessions; spilling is off when unset
+#   QUOTE_SPILL_IDLE_SECONDS      always spill sessions idle this long (default 1800)
+#   QUOTE_SPILL_MIN_IDLE_SECONDS  over budget, spill sessions idle at least this long (default 120)
+#   QUOTE_SPILL_DIR               where spilled sessions are kept (default session_spill)
+
+BUDGET_MB = os.environ.get('QUOTE_SESSION_BUDGET_MB')
+IDLE_SECONDS = float(os.environ.get('QUOTE_SPILL_IDLE_SECONDS', '1800'))
+MIN_IDLE_SECONDS = float(os.environ.get('QUOTE_SPILL_MIN_IDLE_SECONDS', '120'))
+SPILL_DIR = os.environ.get('QUOTE_SPILL_DIR', 'session_spill')
+SWEEP_INTERVAL_SECONDS = 30
+
+# Pickled together, so aliases survive (the editors' working copies are views into config).
+SPILL_KEYS = ("entries", "config", "materials_copy", "volume_tiers")
+SPILLED_KEY = "_spilled_to"
+
+_lock = threading.Lock()
+_sweeper = None
+# session id -> last time a run or callback of the session called restore()
+_activity = {}
+# session id -> (activity time when measured, bytes)
+_sizes = {}
+
+
+def enabled():
+    return bool(BUDGET_MB)
+
+
+def _spill_path(session_id):
+    return os.path.join(SPILL_DIR, f"{session_id}.pkl.z")
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def restore(state):
+    """Marks the session active and brings back its spilled state, if any.
+
+    Call with st.session_state at the top of every page, before anything reads it.
+    """
+    if not enabled():
+        return
+    session_id = _session_id()
+    with _lock:
+        _activity[session_id] = time.time()
+        path = state.get(SPILLED_KEY)
+        if path is None:
+            return
+        try:
+            with open(path, 'rb') as f:
+                spilled = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            # Cleaned up as an orphan; the pages fall back to a fresh quote and config.
+            spilled = {}
+        for key, value in spilled.items():
+            # Anything set since the spill (e.g. a quote opened from history) wins.
+            if key not in state:
+                state[key] = value
+        del state[SPILLED_KEY]
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def restores(callback):
+    """Decorates a widget callback: callbacks run before the page script, so restore first."""
+    import streamlit as st
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        restore(st.session_state)
+        return callback(*args, **kwargs)
+    return wrapper
+
+
+def spill(session_id, state, seen_active):
+    """Writes the session's quote and config to disk and drops them; returns False if it became active."""
+    with _lock:
+        if _activity.get(session_id, 0) > seen_active or SPILLED_KEY in state:
+            return False
+        spilled = {key: state[key] for key in SPILL_KEYS if key in state}
+        if not spilled:
+            return False
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        path = _spill_path(session_id)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(zlib.compress(pickle.dumps(spilled, protocol=pickle.HIGHEST_PROTOCOL)))
+        os.replace(path + ".tmp", path)
+        # Widget values stay: the browser still shows those widgets and their callbacks
+        # must keep firing when the user returns.
+        for key in spilled:
+            del state[key]
+        state[SPILLED_KEY] = path
+        return True
+
+
+def _size(session_id, state, active):
+    measured = _sizes.get(session_id)
+    if measured is None or measured[0] != active:
+        measured = _sizes[session_id] = (active, sum(session_memory.state_key_sizes(state).values()))
+    return measured[1]
+
+
+def sweep(now=None):
+    """Spills idle sessions; returns how many were spilled."""
+    now = time.time() if now is None else now
+    budget = float(BUDGET_MB) * 1024 * 1024
+    candidates, total = [], 0
+    live = set()
+    for session_id, state, page, last_seen in session_memory.tracked_sessions():
+        live.add(session_id)
+        active = max(last_seen, _activity.get(session_id, 0))
+        try:
+            size = _size(session_id, state, active)
+        except RuntimeError:
+            continue
+        total += size
+        if SPILLED_KEY not in state:
+            candidates.append((active, session_id, state, size))
+
+    spilled = 0
+    # Least recently active first.
+    for active, session_id, state, size in sorted(candidates, key=lambda c: c[0]):
+        idle = now - active
+        if idle >= IDLE_SECONDS or (total > budget and idle >= MIN_IDLE_SECONDS):
+            if spill(session_id, state, active):
+                spilled += 1
+                _sizes.pop(session_id, None)
+                total -= size - _size(session_id, state, active)
+
+    with _lock:
+        for session_id in [s for s in _activity if s not in live]:
+            _activity.pop(session_id, None)
+            _sizes.pop(session_id, None)
+    # Files of sessions that ended without returning, or from before a restart.
+    if os.path.isdir(SPILL_DIR):
+        for name in os.listdir(SPILL_DIR):
+            if name.split(".", 1)[0] not in live:
+                os.remove(os.path.join(SPILL_DIR, name))
+    return spilled
+
+
+def _sweep_forever():
+    while True:
+        time.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            sweep()
+        except Exception as e:
+            print(f"session_spill: sweep failed: {e}")
+
+
+def start():
+    """Starts the background sweeper (once per process) when a budget is configured."""
+    global _sweeper
+    if enabled() and _sweeper is None:
+        with _lock:
+            if _sweeper is None:
+                _sweeper = threading.Thread(target=_sweep_forever, name="session-spill", daemon=True)
+                _sweeper.start()
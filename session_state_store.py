@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from quote_store import serialize_entry
+
+# Externalized quote state. With QUOTE_STATE_BACKEND set, the calculator writes each
+# session's entries and order-level aggregates to a shared backend after every run (only
+# the entries that changed), keyed by a session key kept in the page URL. A session that
+# reconnects to a different server process behind a load balancer loads its quote from the
+# backend instead of starting empty.
+#
+#   QUOTE_STATE_BACKEND  memory            in-process (survives reconnects to the same process)
+#                        sqlite:<path>     a SQLite file shared by processes on one host
+#                        redis://host:port/db
+#                                          any Redis-protocol server; `python session_state_store.py
+#                                          serve` runs a small stand-in for development
+#   QUOTE_STATE_TTL      seconds an untouched session is kept (default 7 days)
+
+BACKEND_URL = os.environ.get('QUOTE_STATE_BACKEND')
+STATE_TTL = int(os.environ.get('QUOTE_STATE_TTL', str(7 * 24 * 3600)))
+SESSION_KEY_PARAM = "quote_session"
+# Order-level state saved with the entries.
+AGGREGATE_KEYS = ("total_sqft_order", "quote_id", "quote_customer", "quote_notes")
+
+
+# --- BACKENDS ---
+# Each backend stores, per session key, the entry order, one JSON document per entry and
+# the aggregates. write() applies one run's changes atomically.
+
+class MemoryBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def load(self, key):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                return None
+            return list(session['order']), dict(session['entries']), session['aggregates']
+
+    def write(self, key, upserts, deletes, entry_order, aggregates):
+        with self._lock:
+            session = self._sessions.setdefault(key, {'order': [], 'entries': {}, 'aggregates': '{}'})
+            session['entries'].update(upserts)
+            for entry_id in deletes:
+                session['entries'].pop(entry_id, None)
+            session['order'] = entry_order
+            session['aggregates'] = aggregates
+
+    def delete(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_quotes (
+    session_key TEXT PRIMARY KEY,
+    entry_order TEXT NOT NULL,
+    aggregates TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_entries (
+    session_key TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, entry_id)
+);
+CREATE INDEX IF NOT EXISTS idx_session_quotes_updated_at ON session_quotes(updated_at);
+"""
+
+
+class SQLiteBackend:
+    """Shared by processes on one host; WAL lets them read while one writes."""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self.purge(time.time() - STATE_TTL)
+
+    def load(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry_order, aggregates FROM session_quotes WHERE session_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entries = dict(self._conn.execute(
+                "SELECT entry_id, data FROM session_entries WHERE session_key = ?", (key,)))
+        return json.loads(row[0]), entries, row[1]
+
+    def write(self, key, upserts, deletes, entry_order, aggregates):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO session_quotes (session_key, entry_order, aggregates, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(session_key) DO UPDATE SET
+                    entry_order = excluded.entry_order,
+                    aggregates = excluded.aggregates,
+                    updated_at = excluded.updated_at
+                """,
+                (key, json.dumps(entry_order), aggregates, time.time()))
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_entries (session_key, entry_id, data) VALUES (?, ?, ?)",
+                    [(key, entry_id, data) for entry_id, data in upserts.items()])
+            if deletes:
+                self._conn.executemany(
+                    "DELETE FROM session_entries WHERE session_key = ? AND entry_id = ?",
+                    [(key, entry_id) for entry_id in deletes])
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM session_entries WHERE session_key = ?", (key,))
+            self._conn.execute("DELETE FROM session_quotes WHERE session_key = ?", (key,))
+
+    def purge(self, older_than):
+        """Drops sessions last written before `older_than` (a timestamp)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM session_entries WHERE session_key IN "
+                "(SELECT session_key FROM session_quotes WHERE updated_at < ?)", (older_than,))
+            self._conn.execute("DELETE FROM session_quotes WHERE updated_at < ?", (older_than,))
+
+
+class RespError(Exception):
+    pass
+
+
+# What a backend raises when it is unreachable or failing.
+BACKEND_ERRORS = (OSError, RespError, sqlite3.Error)
+
+
+def _encode_command(args):
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [_read_reply(reader) for _ in range(length)]
+    raise RespError(f"unexpected reply: {line!r}")
+
+
+class RespConnection:
+    """Minimal Redis-protocol (RESP2) client: one socket, commands pipelined per call."""
+
+    def __init__(self, host, port, db=0, password=None, timeout=5):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        setup = ([("AUTH", self.password)] if self.password else []) + ([("SELECT", self.db)] if self.db else [])
+        if setup:
+            self._send(setup)
+
+    def _send(self, commands):
+        self._sock.sendall(b"".join(_encode_command(command) for command in commands))
+        replies = [_read_reply(self._reader) for _ in commands]
+        for command, reply in zip(commands, replies):
+            if isinstance(reply, RespError):
+                raise reply
+            if command[0] == "EXEC":
+                # Commands queued by MULTI report runtime errors inside EXEC's reply, not their own.
+                if reply is None:
+                    raise RespError("EXEC returned nil: transaction aborted")
+                for result in reply:
+                    if isinstance(result, RespError):
+                        raise result
+        return replies
+
+    def pipeline(self, commands):
+        """Sends commands in one round trip and returns their replies; reconnects once."""
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(commands)
+                except (ConnectionError, OSError):
+                    self._sock = None
+                    if attempt == 2:
+                        raise
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+
+class RedisBackend:
+    """quote:<key>:entries is a hash of entry id -> JSON; quote:<key>:meta holds order and aggregates."""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.conn = RespConnection(
+            parsed.hostname or "localhost", parsed.port or 6379,
+            db=int(parsed.path.strip("/") or 0), password=parsed.password)
+
+    @staticmethod
+    def _keys(key):
+        return f"quote:{key}:entries", f"quote:{key}:meta"
+
+    def load(self, key):
+        entries_key, meta_key = self._keys(key)
+        meta, entries = self.conn.pipeline([("HGETALL", meta_key), ("HGETALL", entries_key)])
+        if not meta:
+            return None
+        meta = {meta[i].decode(): meta[i + 1].decode('utf-8') for i in range(0, len(meta), 2)}
+        entries = {entries[i].decode(): entries[i + 1].decode('utf-8') for i in range(0, len(entries), 2)}
+        return json.loads(meta['order']), entries, meta['aggregates']
+
+    def write(self, key, upserts, deletes, entry_order, aggregates):
+        entries_key, meta_key = self._keys(key)
+        commands = [("MULTI",)]
+        if upserts:
+            commands.append(("HSET", entries_key, *[part for item in upserts.items() for part in item]))
+        if deletes:
+            commands.append(("HDEL", entries_key, *deletes))
+        commands += [
+            ("HSET", meta_key, "order", json.dumps(entry_order), "aggregates", aggregates, "updated_at", time.time()),
+            ("EXPIRE", entries_key, STATE_TTL), ("EXPIRE", meta_key, STATE_TTL),
+            ("EXEC",),
+        ]
+        self.conn.pipeline(commands)
+
+    def delete(self, key):
+        self.conn.execute("DEL", *self._keys(key))
+
+
+def open_backend(url):
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:"):
+        return SQLiteBackend(url[len("sqlite:"):])
+    if url.startswith("redis://"):
+        return RedisBackend(url)
+    raise ValueError(f"Unknown QUOTE_STATE_BACKEND {url!r}; use memory, sqlite:<path> or redis://host:port/db")
+
+
+# --- SESSION SYNC ---
+def _fingerprint(data):
+    return hashlib.sha1(data.encode('utf-8')).digest()
+
+
+class SessionQuoteStore:
+    """Loads and incrementally saves one session's quote against a backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def load(self, key):
+        """(entries, aggregates, synced) for a stored session, or None."""
+        stored = self.backend.load(key)
+        if stored is None:
+            return None
+        entry_order, documents, aggregates = stored
+        entries = [json.loads(documents[entry_id]) for entry_id in entry_order if entry_id in documents]
+        synced = (tuple(entry_order), {e['id']: _fingerprint(documents[e['id']]) for e in entries}, aggregates)
+        return entries, json.loads(aggregates), synced
+
+    def save(self, key, entries, aggregates, synced=None):
+        """
+        Writes the entries that changed since `synced` (what the last save or load saw) and
+        returns (new synced, entries written, entries deleted).
+        """
+        old_order, old_fingerprints, old_aggregates = synced or ((), {}, None)
+        fingerprints, upserts = {}, {}
+        for entry in entries:
+            data = serialize_entry(entry)
+            fingerprint = fingerprints[entry['id']] = _fingerprint(data)
+            if old_fingerprints.get(entry['id']) != fingerprint:
+                upserts[entry['id']] = data
+        deletes = [entry_id for entry_id in old_fingerprints if entry_id not in fingerprints]
+        entry_order = tuple(fingerprints)
+        aggregates = json.dumps(aggregates, sort_keys=True, default=str)
+        if upserts or deletes or entry_order != old_order or aggregates != old_aggregates:
+            self.backend.write(key, upserts, deletes, list(entry_order), aggregates)
+        return (entry_order, fingerprints, aggregates), len(upserts), len(deletes)
+
+
+# --- REDIS-PROTOCOL STAND-IN ---
+class _StandInData:
+    """Hashes and strings with expiry, enough for RedisBackend."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.expires = {}
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return self.values.get(key)
+
+    def run(self, name, args):
+        if name == "PING":
+            return "PONG"
+        if name in ("SELECT", "AUTH"):
+            return "OK"
+        if name == "HSET":
+            target = self._live(args[0])
+            if target is None:
+                target = self.values[args[0]] = {}
+            added = sum(field not in target for field in args[1::2])
+            target.update(zip(args[1::2], args[2::2]))
+            return added
+        if name == "HGETALL":
+            return [part for item in (self._live(args[0]) or {}).items() for part in item]
+        if name == "HGET":
+            return (self._live(args[0]) or {}).get(args[1])
+        if name == "HDEL":
+            target = self._live(args[0]) or {}
+            return sum(target.pop(field, None) is not None for field in args[1:])
+        if name == "DEL":
+            removed = sum(self._live(key) is not None for key in args)
+            for key in args:
+                self.values.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+        if name == "EXPIRE":
+            if self._live(args[0]) is None:
+                return 0
+            self.expires[args[0]] = time.time() + int(args[1])
+            return 1
+        if name == "FLUSHDB":
+            self.values.clear()
+            self.expires.clear()
+            return "OK"
+        return RespError(f"ERR unknown command '{name}'")
+
+
+def _encode_reply(reply):
+    if isinstance(reply, RespError):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, list):
+        return f"*{len(reply)}\r\n".encode() + b"".join(_encode_reply(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        data = self.server.data
+        queued = None
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except ConnectionError:
+                return
+            name, args = command[0].decode().upper(), command[1:]
+            if name == "QUIT":
+                self.wfile.write(b"+OK\r\n")
+                return
+            if name == "MULTI":
+                queued, reply = [], "OK"
+            elif name == "EXEC":
+                with data.lock:
+                    reply = [data.run(n, a) for n, a in queued or []]
+                queued = None
+            elif queued is not None:
+                queued.append((name, args))
+                reply = "QUEUED"
+            else:
+                with data.lock:
+                    reply = data.run(name, args)
+            self.wfile.write(_encode_reply(reply))
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _StandInHandler)
+        self.data = _StandInData()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session quote state tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = commands.add_parser("serve", help="Run an in-memory Redis-protocol stand-in for development")
+    serve_cmd.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    serve_cmd.add_argument("-p", "--port", type=int, default=6379, help="Port to listen on")
+    show_cmd = commands.add_parser("show", help="Print a stored session's quote")
+    show_cmd.add_argument("session_key", help=f"The {SESSION_KEY_PARAM} value from the calculator URL")
+    show_cmd.add_argument("-b", "--backend", default=BACKEND_URL, help="Backend URL (default: QUOTE_STATE_BACKEND)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        with StandInServer((args.host, args.port)) as server:
+            print(f"Redis-protocol stand-in listening on {args.host}:{args.port}")
+            server.serve_forever()
+    else:
+        if not args.backend:
+            parser.error("no backend given and QUOTE_STATE_BACKEND is not set")
+        loaded = SessionQuoteStore(open_backend(args.backend)).load(args.session_key)
+        if loaded is None:
+            print(f"No stored quote for session {args.session_key}")
+            return
+        entries, aggregates, _ = loaded
+        print(json.dumps({"aggregates": aggregates, "entries": entries}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Mapping
+from pricing import CompiledConfig
+
+# One published config per host, shared by every server and API worker process. The
+# publisher writes the config and its material price table into a segment file with a
+# version header (put it on /dev/shm to keep it in memory) and atomically replaces the
+# previous one. Processes map the segment read-only and re-attach as soon as they notice
+# a new segment (one stat() per lookup): API requests price with it from then on, and
+# calculator sessions switch to it on their next run unless they hold unsaved config edits.
+# Only the material price table is used in place from the shared pages; each process still
+# parses the config JSON once per version (re-publishing the same version keeps the parsed
+# config already attached), so per-process memory grows with the config, not with sessions.
+#
+#   QUOTE_SHARED_CONFIG   segment file; sharing is off when unset
+
+SEGMENT_PATH = os.environ.get('QUOTE_SHARED_CONFIG')
+
+MAGIC = b"QCCONFIG"
+LAYOUT_VERSION = 1
+# magic, layout, config version, published at, config.json mtime (ns), JSON bytes, price rows
+HEADER = struct.Struct("<8sH16sdqQQ6x")
+PRICE_FIELDS = ('preferred_base', 'preferred_value', 'corporate_base', 'corporate_value', 'wholesale_base', 'wholesale_value')
+_FIELD_OFFSETS = {field: offset for offset, field in enumerate(PRICE_FIELDS)}
+
+_lock = threading.Lock()
+# segment path -> ((inode, mtime), attached config)
+_attached = {}
+
+
+class SharedPriceRow(Mapping):
+    """One material's prices (PRICE_FIELDS), read in place from the shared float table."""
+
+    __slots__ = ('_table', '_start')
+
+    def __init__(self, table, start):
+        self._table = table
+        self._start = start
+
+    def __getitem__(self, field):
+        return self._table[self._start + _FIELD_OFFSETS[field]]
+
+    def __iter__(self):
+        return iter(PRICE_FIELDS)
+
+    def __len__(self):
+        return len(PRICE_FIELDS)
+
+
+class SharedCompiledConfig(CompiledConfig):
+    """A CompiledConfig attached to a published segment."""
+
+    def __init__(self, config, version, material_prices, published_at, source_mtime_ns):
+        super().__init__(config, version, material_prices=material_prices)
+        self.published_at = published_at
+        self.source_mtime_ns = source_mtime_ns
+
+
+def _material_keys(config):
+    return [(material_type, name) for material_type, materials in config.get('MATERIALS', {}).items() for name in materials]
+
+
+def publish(config, path=SEGMENT_PATH, source_mtime_ns=0):
+    """Compiles config and atomically replaces the segment at path; returns the version."""
+    compiled = CompiledConfig(config)
+    payload = json.dumps(config, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    payload += b"\0" * (-len(payload) % 8)
+    keys = _material_keys(config)
+    table = array('d', (compiled.material_prices[key].get(field, 0) for key in keys for field in PRICE_FIELDS))
+    header = HEADER.pack(MAGIC, LAYOUT_VERSION, compiled.version.encode('ascii'), time.time(),
+                         source_mtime_ns, len(payload), len(keys))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+        table.tofile(f)
+    # Processes still mapping the old segment keep a consistent snapshot until they re-attach.
+    os.replace(tmp_path, path)
+    return compiled.version
+
+
+def _attach(path, current=None):
+    with open(path, 'rb') as f:
+        segment = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, layout, version, published_at, source_mtime_ns, payload_length, rows = HEADER.unpack_from(segment)
+    if magic != MAGIC or layout != LAYOUT_VERSION:
+        raise ValueError(f"{path} is not a layout {LAYOUT_VERSION} shared config segment")
+    if current is not None and current.version == version.decode('ascii'):
+        # Same config re-published (e.g. config.json saved unchanged): keep the one already parsed.
+        segment.close()
+        current.published_at, current.source_mtime_ns = published_at, source_mtime_ns
+        return current
+    payload_end = HEADER.size + payload_length
+    config = json.loads(segment[HEADER.size:payload_end].rstrip(b"\0"))
+    keys = _material_keys(config)
+    if len(keys) != rows:
+        raise ValueError(f"{path}: price table has {rows} rows for {len(keys)} materials")
+    table = memoryview(segment)[payload_end:payload_end + rows * len(PRICE_FIELDS) * 8].cast('d')
+    material_prices = {key: SharedPriceRow(table, row * len(PRICE_FIELDS)) for row, key in enumerate(keys)}
+    return SharedCompiledConfig(config, version.decode('ascii'), material_prices, published_at, source_mtime_ns)
+
+
+def attached(path=SEGMENT_PATH):
+    """The config in the segment at path, re-attached if a newer one was published; None if none."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns)
+    current = _attached.get(path)
+    if current is None or current[0] != identity:
+        with _lock:
+            current = _attached.get(path)
+            if current is None or current[0] != identity:
+                current = _attached[path] = (identity, _attach(path, current and current[1]))
+    return current[1]
+
+
+def publish_file(config_path, path=SEGMENT_PATH):
+    """Publishes config_path unless the segment was already published from this file as it is now."""
+    mtime = os.stat(config_path).st_mtime_ns
+    current = attached(path)
+    if current is None or current.source_mtime_ns != mtime:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            publish(json.load(f), path, source_mtime_ns=mtime)
+        current = attached(path)
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Publish config.json as the shared compiled config segment, or show the current one")
+    parser.add_argument(
+        "-c", "--config", default="config.json",
+        help="Path to your config.json")
+    parser.add_argument(
+        "-s", "--segment", default=SEGMENT_PATH,
+        help="Segment file (default: QUOTE_SHARED_CONFIG)")
+    parser.add_argument(
+        "--show", action="store_true",
+        help="Only print what the segment currently holds")
+    args = parser.parse_args()
+    if not args.segment:
+        parser.error("no segment given and QUOTE_SHARED_CONFIG is not set")
+
+    current = attached(args.segment) if args.show else publish_file(args.config, args.segment)
+    if current is None:
+        print(f"No segment at {args.segment}")
+        return
+    print(f"{args.segment}: config {current.version}, {len(current.material_prices)} materials, "
+          f"published {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(current.published_at))}")
+
+if __name__ == "__main__":
+    main()
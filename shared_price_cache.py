@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from pricing import canonical_fingerprint, price_entry
+
+# Process-wide cache of line-item prices for the standard items every estimator quotes.
+# One instance per process is shared by all Streamlit sessions (behind each session's own
+# PriceCache) and by all requests of the pricing API and each of its workers. Results are
+# keyed on the config version, the canonical inputs, and the order-level tiers and multiplier,
+# and kept for a TTL. The version is the hash of the contents a config was compiled from
+# (the calculator compiles a snapshot of the session's config, see get_compiled_config), so
+# a session pricing with unsaved edits caches under its own version, never the saved one's. Processes still serving an older config during a rollout keep their
+# results next to the new version's; results nobody asks for anymore age out of the LRU.
+#
+#   QUOTE_SHARED_PRICE_CACHE_ENTRIES   results kept per process; the cache is off when unset
+#   QUOTE_SHARED_PRICE_CACHE_TTL       seconds a result is served (default 3600)
+
+MAX_ENTRIES = os.environ.get('QUOTE_SHARED_PRICE_CACHE_ENTRIES')
+TTL_SECONDS = float(os.environ.get('QUOTE_SHARED_PRICE_CACHE_TTL', '3600'))
+
+_lock = threading.Lock()
+_cache = None
+
+
+class SharedPriceCache:
+    """Thread-safe LRU of price_entry results with a TTL, across config versions."""
+
+    def __init__(self, max_entries, ttl_seconds=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (expires at, result)
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def price(self, entry, compiled, total_sqft_order, multiples_value, tiers):
+        """price_entry(entry, ...); tiers is order_tiers(entry, compiled, total_sqft_order)."""
+        key = (compiled.version, canonical_fingerprint(entry, compiled), tiers, multiples_value)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > now:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        # Priced outside the lock; two sessions missing the same item at once both compute it.
+        result = price_entry(entry, compiled, total_sqft_order, multiples_value)
+        with self._lock:
+            self._results[key] = (now + self.ttl_seconds, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._results), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def get():
+    """This process's shared cache, or None when QUOTE_SHARED_PRICE_CACHE_ENTRIES is unset."""
+    global _cache
+    if not MAX_ENTRIES:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = SharedPriceCache(int(MAX_ENTRIES))
+    return _cache
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import json
+import random
+import sys
+import uuid
+from pricing import PLACEHOLDER, get_suggested_sides_tier
+
+# Reproducible synthetic configs and orders for benchmarks, load tests and the repricing
+# tools. Configs follow the schema the admin editors write; the same seed always produces
+# the same data.
+
+# Tier names get_suggested_sides_tier returns; SIDES_TIERS_MAP must use them verbatim.
+SIDES_TIERS = [
+    "NO PRINT",
+    "STANDARD OVER 1sq'", "SMALL Between 1sq' - 0.5sq'",
+    "SMALL BETWEEN 0.5 - .25 sq' /peice", "SMALLEST UNDER 0.05 sq' /peice",
+    "DOUBLE SIDED Over 1 SQ'", "DOUBLE SIDED between 1sq' - 0.5sq' per peice",
+    "DOUBLE SIDED under 0.5 - .25 sq' /peice", "DOUBLE SIDED under 0.05 sq' /peice",
+]
+SIDEDNESS_OPTIONS = ["Single Sided", "Double Sided", "No Print"]
+# The calculator's default and "Add New Entry" entries are Banner, so that type always exists.
+MATERIAL_TYPE_NAMES = ["Banner", "Mesh", "Vinyl", "Rigid", "Paper", "Fabric", "Magnet", "Film"]
+FINISHING_TYPE_NAMES = ["Lamination", "Mounting", "Hemming", "Edge Banding", "Overlaminate"]
+BANNER_MESH_NAMES = ["Hem & Grommet", "Pole Pocket", "Wind Slits", "Webbing"]
+PRODCUTS_AN_VARS = [
+    "AW_Roll_Costs", "AV_Material_Width", "AU_Material_Length", "AT_Labour",
+    "AS_Laminate_Loading", "AQ_SQ", "constant_BY8", "Per_hour_rate",
+]
+
+
+def _name(names, index, fallback):
+    return names[index] if index < len(names) else f"{fallback} {index + 1}"
+
+
+def _material(rng):
+    """One material in the layout the Material Management editor creates and the cost editor fills in."""
+    return {
+        "Preferred": {
+            "preferred_historical_price": round(rng.uniform(1, 15), 4),
+            "preferred_fine_tune_modifier": round(rng.uniform(0.9, 1.3), 4),
+            "preferred_discount_value": round(rng.uniform(0, 0.15), 4),
+        },
+        "Corporate": {
+            "corporate_historical_price": round(rng.uniform(0.8, 1.0), 4),
+            "corporate_discount_value": round(rng.uniform(0, 0.1), 4),
+        },
+        "Wholesale": {
+            "wholesale_historical_price": round(rng.uniform(0.6, 0.9), 4),
+            "wholesale_discount_value": round(rng.uniform(0, 0.1), 4),
+        },
+        "prodcuts_an_vars": {
+            "AW_Roll_Costs": round(rng.uniform(100, 900), 2),
+            "AV_Material_Width": rng.choice([38, 54, 60, 63, 126]),
+            "AU_Material_Length": rng.choice([900, 1200, 1800]),
+            "AT_Labour": round(rng.uniform(0, 5), 2),
+            "AS_Laminate_Loading": round(rng.uniform(0, 2), 2),
+            "AQ_SQ": 1,
+            "constant_BY8": rng.choice([10, 15, 20]),
+            "Per_hour_rate": rng.choice([45, 60, 75]),
+        },
+    }
+
+
+def _minimums(rng, count, step):
+    """0 plus count-1 distinct increasing thresholds."""
+    return [0] + sorted(rng.sample(range(step, step * count * 4, step), count - 1))
+
+
+def make_config(material_types=4, materials_per_type=5, volume_tiers=4, seed=0, *, multiples=3,
+                banner_mesh_options=2, banner_mesh_tiers=3, finishing_types=2, finishing_options=2,
+                cut_options=2, time_options=3, install_options=2):
+    """
+    Builds a config of the given scale. VOLUME_DISCOUNT_TIERS holds "min sqft" -> [description,
+    [p, c, w]], MULTIPLES_MAP "min entries" -> multiplier and every BANNER_MESH_FINISHING option a
+    [[min sqft, price, description], ...] list ordered from the highest threshold down.
+    """
+    rng = random.Random(seed)
+    return {
+        "MATERIALS": {
+            _name(MATERIAL_TYPE_NAMES, t, "Type"): {
+                f"{_name(MATERIAL_TYPE_NAMES, t, 'Type')} {m + 1}": _material(rng) for m in range(materials_per_type)
+            }
+            for t in range(material_types)
+        },
+        "SIDES_TIERS_MAP": {tier: (0 if tier == "NO PRINT" else round(1 + 0.2 * i, 2)) for i, tier in enumerate(SIDES_TIERS)},
+        "SIDEDNESS_OPTIONS": list(SIDEDNESS_OPTIONS),
+        "SPECIALTY_FINISHING": {
+            _name(FINISHING_TYPE_NAMES, f, "Finishing"): {
+                f"Option {o + 1}": round(rng.uniform(0.25, 3), 2) for o in range(finishing_options)
+            }
+            for f in range(finishing_types)
+        },
+        "BANNER_MESH_FINISHING": {
+            _name(BANNER_MESH_NAMES, b, "Banner Finishing"): [
+                [minimum, round(max(0.8 - 0.1 * i, 0.05), 2), f"{_name(BANNER_MESH_NAMES, b, 'Banner Finishing')} {minimum}+"]
+                for i, minimum in reversed(list(enumerate(_minimums(rng, banner_mesh_tiers, 50))))
+            ]
+            for b in range(banner_mesh_options)
+        },
+        "CUSTOMER_TYPES": ["Preferred", "Corporate", "Wholesale"],
+        "VOLUME_DISCOUNT_TIERS": {
+            str(minimum): [f"{minimum}+ sqft", [round(0.01 * i, 4), round(0.012 * i, 4), round(0.015 * i, 4)]]
+            for i, minimum in enumerate(_minimums(rng, volume_tiers, 25))
+        },
+        "PRINT_ADJUSTMENT_FIXED": {"None": 0.0, "Rush": -0.1, "Loyalty": 0.05},
+        "MULTIPLES_MAP": {
+            str(minimum if i else 1): round(1 + 0.5 * i, 2) for i, minimum in enumerate(_minimums(rng, multiples, 2))
+        },
+        "FALL_BACK_VALUE": 0.25,
+        "CUT_COST_MAP": {f"Cut {c + 1}": round(0.1 * (c + 1), 2) for c in range(cut_options)},
+        "ADDITIONAL_TIME_MAP": {"None": 0, **{f"{15 * t} min": 15 * t for t in range(1, time_options)}},
+        "ADDED_INSTALL_MAP": {"None": 0, **{f"Install {i}": round(2.5 * i, 2) for i in range(1, install_options)}},
+        "ADDITIONAL_COSTS": {
+            "cons_bx_4": {"variable_1": 30, "variable_2": 60, "variable_3": 20},
+            "cons_bx_6": {"variable_1": 20, "variable_2": 60, "variable_3": 15},
+            "prodcuts_an": 16.21,
+        },
+    }
+
+
+def check_config(config):
+    """Returns a list of schema problems the calculator would trip over (empty when the config is usable)."""
+    problems = []
+    tiers = config.get('SIDES_TIERS_MAP', {})
+    for sidedness in config.get('SIDEDNESS_OPTIONS', []):
+        for sqft in (2, 0.75, 0.3, 0.01):
+            tier = get_suggested_sides_tier(sqft, sidedness, list(tiers))
+            if tier not in tiers:
+                problems.append(f"SIDES_TIERS_MAP lacks '{tier}' ({sidedness}, {sqft} sqft)")
+    if "Banner" not in config.get('MATERIALS', {}):
+        problems.append("MATERIALS has no 'Banner' type")
+    for material_type, materials in config.get('MATERIALS', {}).items():
+        for name, material in materials.items():
+            missing = [key for key in ("Preferred", "Corporate", "Wholesale") if key not in material]
+            # prodcuts_an_vars is optional (the default prodcuts_an applies), but must be complete when present.
+            if 'prodcuts_an_vars' in material:
+                missing += [f"prodcuts_an_vars.{var}" for var in PRODCUTS_AN_VARS if var not in material['prodcuts_an_vars']]
+            if missing:
+                problems.append(f"{material_type}/{name} is missing {', '.join(missing)}")
+    for minimum, tier in config.get('VOLUME_DISCOUNT_TIERS', {}).items():
+        if not (isinstance(tier, list) and len(tier) == 2 and isinstance(tier[1], list) and len(tier[1]) == 3):
+            problems.append(f"VOLUME_DISCOUNT_TIERS['{minimum}'] is not [description, [p, c, w]]")
+    for option, tier_list in config.get('BANNER_MESH_FINISHING', {}).items():
+        minimums = [tier[0] for tier in tier_list]
+        if minimums != sorted(minimums, reverse=True):
+            problems.append(f"BANNER_MESH_FINISHING['{option}'] tiers must run from the highest sqft down")
+    return list(dict.fromkeys(problems))
+
+
+def make_order(config, entries=10, seed=0):
+    """Builds a list of calculator entries drawn from the config's own option names."""
+    rng = random.Random(seed)
+    material_types = list(config['MATERIALS'])
+    finishing = config.get('SPECIALTY_FINISHING', {})
+    order = []
+    for _ in range(entries):
+        material_type = rng.choice(material_types)
+        entry = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "type": material_type,
+            "material": rng.choice(list(config['MATERIALS'][material_type])),
+            "w_ft": rng.randint(0, 10), "w_in": rng.randint(0, 11),
+            "h_ft": rng.randint(0, 10), "h_in": rng.randint(1, 11),
+            "qty": rng.randint(1, 100),
+            "sidedness": rng.choice(config.get('SIDEDNESS_OPTIONS', SIDEDNESS_OPTIONS)),
+            "banner_mesh_selection": rng.choice([PLACEHOLDER, "None", *config.get('BANNER_MESH_FINISHING', {})]),
+            "finishing_type": rng.choice([PLACEHOLDER, *finishing]),
+            "cut_cost_selection": rng.choice([PLACEHOLDER, *config.get('CUT_COST_MAP', {})]),
+            "additional_time_selection": rng.choice(list(config.get('ADDITIONAL_TIME_MAP', {"None": 0}))),
+            "added_install_selection": rng.choice(list(config.get('ADDED_INSTALL_MAP', {"None": 0}))),
+            "print_adjustment": rng.choice(list(config.get('PRINT_ADJUSTMENT_FIXED', {"None": 0}))),
+        }
+        if entry['finishing_type'] in finishing:
+            entry['finishing_option'] = rng.choice(list(finishing[entry['finishing_type']]))
+        order.append(entry)
+    return order
+
+
+# Calculator entry field -> line item column (bulk_price.py, the paste box and the API).
+LINE_ITEM_FIELDS = {
+    "type": "type", "material": "material", "w_ft": "w_ft", "w_in": "w_in", "h_ft": "h_ft", "h_in": "h_in",
+    "qty": "qty", "sidedness": "sidedness", "banner_mesh_selection": "banner_mesh",
+    "finishing_type": "finishing_type", "finishing_option": "finishing_option", "cut_cost_selection": "cut",
+    "additional_time_selection": "time", "added_install_selection": "install", "print_adjustment": "adjustment",
+}
+
+
+def entry_to_line_item(entry):
+    return {column: ("" if entry.get(field) in (None, PLACEHOLDER) else entry[field]) for field, column in LINE_ITEM_FIELDS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate reproducible synthetic configs, orders and saved quotes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    config_cmd = commands.add_parser("config", help="Write a synthetic config.json")
+    config_cmd.add_argument("-o", "--output", default="config.json", help="Config file to write")
+    config_cmd.add_argument("--seed", type=int, default=0)
+    config_cmd.add_argument("--material-types", type=int, default=4)
+    config_cmd.add_argument("--materials-per-type", type=int, default=5)
+    config_cmd.add_argument("--volume-tiers", type=int, default=4)
+    config_cmd.add_argument("--multiples", type=int, default=3)
+    config_cmd.add_argument("--banner-mesh-options", type=int, default=2)
+    config_cmd.add_argument("--banner-mesh-tiers", type=int, default=3)
+    config_cmd.add_argument("--finishing-types", type=int, default=2)
+    config_cmd.add_argument("--finishing-options", type=int, default=2)
+    config_cmd.add_argument("--cut-options", type=int, default=2)
+    config_cmd.add_argument("--time-options", type=int, default=3)
+    config_cmd.add_argument("--install-options", type=int, default=2)
+
+    order_cmd = commands.add_parser("order", help="Write a random order for a config (.json entries or .csv line items)")
+    order_cmd.add_argument("-c", "--config", default="config.json", help="Path to your config.json")
+    order_cmd.add_argument("-n", "--entries", type=int, default=100)
+    order_cmd.add_argument("-o", "--output", default="order.json", help="Output file; .csv writes bulk_price.py line items")
+    order_cmd.add_argument("--seed", type=int, default=0)
+
+    quotes_cmd = commands.add_parser("quotes", help="Fill a quote store with random saved quotes")
+    quotes_cmd.add_argument("-c", "--config", default="config.json", help="Path to your config.json")
+    quotes_cmd.add_argument("-n", "--quotes", type=int, default=1000)
+    quotes_cmd.add_argument("--lines", type=int, default=20, help="Maximum line items per quote")
+    quotes_cmd.add_argument("--db", default="quotes.db", help="SQLite quote store to write to")
+    quotes_cmd.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "config":
+        config = make_config(
+            args.material_types, args.materials_per_type, args.volume_tiers, args.seed,
+            multiples=args.multiples, banner_mesh_options=args.banner_mesh_options,
+            banner_mesh_tiers=args.banner_mesh_tiers, finishing_types=args.finishing_types,
+            finishing_options=args.finishing_options, cut_options=args.cut_options,
+            time_options=args.time_options, install_options=args.install_options,
+        )
+        problems = check_config(config)
+        if problems:
+            sys.exit("Generated config is not usable:\n" + "\n".join(problems))
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        material_count = sum(len(materials) for materials in config['MATERIALS'].values())
+        print(f"Written config with {material_count} materials to {args.output}")
+        return
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for problem in check_config(config):
+        print(f"warning: {problem}", file=sys.stderr)
+
+    if args.command == "order":
+        order = make_order(config, args.entries, args.seed)
+        if args.output.lower().endswith(".csv"):
+            with open(args.output, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=list(LINE_ITEM_FIELDS.values()))
+                writer.writeheader()
+                writer.writerows(entry_to_line_item(entry) for entry in order)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(order, f, indent=2)
+        print(f"Written {len(order)} entries to {args.output}")
+
+    elif args.command == "quotes":
+        from pricing import config_version
+        from quote_store import QuoteStore
+        rng = random.Random(args.seed)
+        store = QuoteStore(args.db)
+        version = config_version(config)
+        for i in range(args.quotes):
+            entries = make_order(config, rng.randint(1, args.lines), seed=rng.getrandbits(32))
+            store.save_quote(entries, version, customer=f"Customer {rng.randint(1, max(1, args.quotes // 5))}", notes=f"Synthetic quote {i + 1}")
+        print(f"Written {args.quotes} quotes to {args.db}")
+
+if __name__ == "__main__":
+    main()
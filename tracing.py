@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+
+# Structured span traces of calculator reruns, written as JSON lines to a local file for
+# offline analysis. One trace covers one script run: a root "rerun" span plus child spans
+# for config loading, recalculation, entry rendering and pricing. Spans recorded by widget
+# callbacks, which run just before the script, join the trace of the run that follows.
+# A run that ends before finish() (st.stop(), an uncaught exception, a widget interrupting
+# it) is written with ended_by="interrupted" when the session's next run begins, and the
+# traces of sessions that never come back are written off after STALE_SECONDS.
+#
+#   QUOTE_TRACE_FILE       JSONL file to write; tracing is off when unset
+#   QUOTE_TRACE_SAMPLE     fraction of reruns traced (default 1.0)
+#   QUOTE_TRACE_MAX_BYTES  rotate the file past this size (default 10 MB)
+#   QUOTE_TRACE_BACKUPS    rotated files kept as <file>.1 ... <file>.N (default 5)
+
+TRACE_FILE = os.environ.get('QUOTE_TRACE_FILE')
+SAMPLE_RATE = float(os.environ.get('QUOTE_TRACE_SAMPLE', '1.0'))
+MAX_BYTES = int(os.environ.get('QUOTE_TRACE_MAX_BYTES', str(10 * 1024 * 1024)))
+BACKUP_COUNT = int(os.environ.get('QUOTE_TRACE_BACKUPS', '5'))
+STALE_SECONDS = 600
+
+_logger = None
+_logger_lock = threading.Lock()
+# session id -> _ActiveRun of that session's current script run
+_active = {}
+_last_sweep = 0.0
+
+
+def _span_logger():
+    """The rotating JSONL writer, created on first use."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                logger = logging.getLogger("quote_calculator.traces")
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                handler = RotatingFileHandler(TRACE_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                _logger = logger
+    return _logger
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attributes", "started")
+
+    def __init__(self, trace, name, attributes):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            # st.rerun()/st.stop() unwind through spans with BaseException control-flow exceptions.
+            self.attributes["error" if issubclass(exc_type, Exception) else "interrupted"] = exc_type.__name__
+        self.trace.spans.append((self.name, self.started, time.time() - self.started, self.attributes))
+        return False
+
+
+class Trace:
+    """Spans of one sampled script run."""
+
+    sampled = True
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.trace_id = uuid.uuid4().hex
+        self.started = time.time()
+        self.spans = []
+
+    def span(self, name, **attributes):
+        return _Span(self, name, attributes)
+
+    def write(self, ended=None, **attributes):
+        duration = (ended or time.time()) - self.started
+        root_id = uuid.uuid4().hex[:16]
+        common = {"trace_id": self.trace_id, "session_id": self.session_id}
+        lines = [json.dumps({
+            **common, "span_id": root_id, "parent_id": None, "name": "rerun",
+            "start": self.started, "duration_ms": duration * 1000, **attributes,
+        }, default=str)]
+        for name, started, seconds, span_attributes in self.spans:
+            lines.append(json.dumps({
+                **common, "span_id": uuid.uuid4().hex[:16], "parent_id": root_id, "name": name,
+                "start": started, "duration_ms": seconds * 1000, **span_attributes,
+            }, default=str))
+        _span_logger().info("\n".join(lines))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    sampled = False
+    _span = _NullSpan()
+
+    def span(self, name, **attributes):
+        return self._span
+
+    def write(self, ended=None, **attributes):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class _ActiveRun:
+    """A session's current trace, whether its script body has started, and when it was last used."""
+
+    __slots__ = ("trace", "script_started", "touched")
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.script_started = False
+        self.touched = time.time()
+
+
+def _write_off(session_id, run, ended_by):
+    """Writes a run that never reached finish(), timed up to its last use."""
+    if _active.get(session_id) is run:
+        _active.pop(session_id, None)
+    run.trace.write(ended=run.touched, ended_by=ended_by)
+
+
+def _sweep_stale(now):
+    """Writes off the runs of sessions that have not been seen for STALE_SECONDS."""
+    global _last_sweep
+    if now - _last_sweep < 60:
+        return
+    _last_sweep = now
+    for session_id, run in list(_active.items()):
+        if now - run.touched > STALE_SECONDS:
+            _write_off(session_id, run, "expired")
+
+
+def current(session_id, in_callback=False):
+    """
+    The trace of this session's current run, started (and sampled) on first use.
+    Widget callbacks pass in_callback=True: they run before the script body, so a trace
+    whose script body already started belongs to an earlier run that never finished.
+    """
+    if not TRACE_FILE:
+        return NULL_TRACE
+    run = _active.get(session_id)
+    if run is not None and in_callback and run.script_started:
+        _write_off(session_id, run, "interrupted")
+        run = None
+    if run is None:
+        run = _active[session_id] = _ActiveRun(Trace(session_id) if random.random() < SAMPLE_RATE else NULL_TRACE)
+    run.touched = time.time()
+    return run.trace
+
+
+def begin(session_id):
+    """
+    The trace for the script body of this session's run, called first thing in the script:
+    the one this run's callbacks started, else a new one. Also writes off stale sessions.
+    """
+    if not TRACE_FILE:
+        return NULL_TRACE
+    _sweep_stale(time.time())
+    run = _active.get(session_id)
+    if run is not None and run.script_started:
+        # No callbacks ran since a run that ended without finish().
+        _write_off(session_id, run, "interrupted")
+    trace = current(session_id)
+    _active[session_id].script_started = True
+    return trace
+
+
+def finish(session_id, **attributes):
+    """Ends the session's current trace and writes it if it was sampled."""
+    run = _active.pop(session_id, None)
+    if run is not None:
+        run.trace.write(**attributes)
+
+
+def _read_spans(path):
+    for file_path in sorted(glob.glob(f"{glob.escape(path)}*")):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize span latencies from calculator trace files (rotated files included)")
+    parser.add_argument(
+        "trace_file", nargs="?", default=TRACE_FILE or "traces.jsonl",
+        help="Trace JSONL file written with QUOTE_TRACE_FILE")
+    parser.add_argument(
+        "--since-hours", type=float,
+        help="Only include spans started in the last N hours")
+    args = parser.parse_args()
+
+    cutoff = time.time() - args.since_hours * 3600 if args.since_hours else None
+    durations = {}
+    for span in _read_spans(args.trace_file):
+        if cutoff is None or span['start'] >= cutoff:
+            durations.setdefault(span['name'], []).append(span['duration_ms'])
+    if not durations:
+        print(f"No spans found in {args.trace_file}*")
+        return
+
+    print(f"{'span':<32} {'count':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, values in sorted(durations.items()):
+        cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+        print(f"{name:<32} {len(values):>8} {cuts[49]:>10.2f} {cuts[94]:>10.2f} {cuts[98]:>10.2f} {max(values):>10.2f}")
+
+if __name__ == "__main__":
+    main()